@@ -0,0 +1,81 @@
+import gc
+from typing import Iterator
+
+import av
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Decoded frames are resampled in groups this large; fewer, bigger resampler calls
+RESAMPLE_GROUP_SAMPLES = 500000
+
+
+def _decoded_frames(container):
+    frames = container.decode(audio=0)
+    while True:
+        try:
+            frame = next(frames)
+        except StopIteration:
+            return
+        except av.error.InvalidDataError:
+            # A corrupt packet shouldn't cost the rest of the audio
+            continue
+        yield frame
+
+
+def iter_audio_windows(path: str, window_seconds: float, sampling_rate: int = SAMPLE_RATE,
+                       start_seconds: float = 0.0) -> Iterator[np.ndarray]:
+    """
+    Decodes an audio file into mono float32 windows of window_seconds,
+    the last one shorter, starting start_seconds in. Only the current
+    window and one resampler group are held in memory, however long the
+    file is.
+
+    Uses PyAV, the same bundled FFmpeg libraries faster-whisper's own
+    decode_audio uses, so no ffmpeg binary is needed.
+    """
+    window_samples = int(window_seconds * sampling_rate)
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+    fifo = av.audio.fifo.AudioFifo()
+    pending = []
+    pending_samples = 0
+    # Decoded and dropped rather than seeked to, so the samples line up exactly with a full decode
+    skip = int(start_seconds * sampling_rate)
+
+    def resampled(frame):
+        for output in resampler.resample(frame):
+            yield output.to_ndarray().reshape(-1)
+
+    def drain(chunks):
+        nonlocal pending, pending_samples, skip
+        for chunk in chunks:
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk, skip = chunk[dropped:], skip - dropped
+                if not len(chunk):
+                    continue
+            pending.append(chunk)
+            pending_samples += len(chunk)
+            while pending_samples >= window_samples:
+                joined = np.concatenate(pending)
+                yield joined[:window_samples].astype(np.float32) / 32768.0
+                rest = joined[window_samples:]
+                pending, pending_samples = ([rest] if len(rest) else []), len(rest)
+
+    try:
+        with av.open(path, mode="r", metadata_errors="ignore") as container:
+            for frame in _decoded_frames(container):
+                frame.pts = None  # Grouped frames don't need contiguous timestamps
+                fifo.write(frame)
+                if fifo.samples >= RESAMPLE_GROUP_SAMPLES:
+                    yield from drain(resampled(fifo.read()))
+            if fifo.samples:
+                yield from drain(resampled(fifo.read()))
+            # Flush what the resampler still buffers
+            yield from drain(resampled(None))
+        if pending_samples:
+            yield np.concatenate(pending).astype(np.float32) / 32768.0
+    finally:
+        # The resampler's native buffers are only released on collection
+        # (see faster-whisper's decode_audio)
+        del resampler
+        gc.collect()
@@ -0,0 +1,63 @@
+"""
+Measure recipe extraction latency per transcript.
+
+Builds synthetic whisper-style transcripts of a few lengths (a short reel
+up to a long YouTube video) and times extract_recipe on each. Run from api/:
+
+    python -m src.benchmarks.bench_extractor --runs 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+from ..recipe_extractor import extract_recipe
+
+SENTENCES = [
+    "Today we're making a creamy garlic mushroom pasta.",
+    "First, boil 200 grams of spaghetti in salted water.",
+    "Meanwhile melt 2 tablespoons of butter in a large pan",
+    "and add 3 cloves of minced garlic.",
+    "Then add 250 grams of sliced mushroom and cook for 5 minutes.",
+    "Pour in half a cup of heavy cream and a pinch of salt.",
+    "Stir in 50 grams of grated parmesan until it melts.",
+    "Toss the pasta with the sauce and garnish with parsley.",
+    "This serves two and it's ready in 20 minutes.",
+    "Don't forget to like and subscribe for more recipes!",
+    "Honestly this is one of my favourite weeknight dinners.",
+    "Season with black pepper to taste.",
+]
+
+# Segment counts roughly matching a 30s reel, a 3 minute short and a 20 minute video
+LENGTHS = {'reel': 12, 'short': 60, 'long': 400}
+
+def make_transcript(segment_count: int, rng: random.Random):
+    """Build a transcript dict with timed segments."""
+    segments = []
+    start = 0.0
+    for _ in range(segment_count):
+        duration = rng.uniform(1.5, 4.0)
+        segments.append({"start": start, "end": start + duration, "text": " " + rng.choice(SENTENCES)})
+        start += duration + rng.choice([0.1, 0.2, 2.0])
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=200, help='Transcripts per length')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'length':<8}{'segments':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, segment_count in LENGTHS.items():
+        timings = []
+        for _ in range(args.runs):
+            transcript = make_transcript(segment_count, rng)
+            started = time.perf_counter()
+            extract_recipe(transcript)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<8}{segment_count:>10}{statistics.median(timings):>10.2f}{p95:>10.2f}{timings[-1]:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure how reliably reposted audio is matched, and what it costs.
+
+Indexes synthetic clips with speech-like spectral movement, then looks up
+"reposts" of them: trimmed at the start, turned down and mixed with
+noise at several signal-to-noise ratios. Unrelated clips measure false
+matches. Whisper time saved is estimated from --whisper-rtf, the
+transcription real-time factor of the deployed model. Run from api/:
+
+    python -m src.benchmarks.bench_fingerprint --clips 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from ..fingerprint import FingerprintIndex, fingerprint_samples
+
+SAMPLE_RATE = 16000
+BLOCK = SAMPLE_RATE // 10  # spectral envelope changes every 100 ms
+
+def make_clip(seconds: float, seed: int) -> np.ndarray:
+    """Noise shaped by a random spectral envelope per block, normalized to [-1, 1]."""
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal(int(seconds * SAMPLE_RATE)).astype(np.float32)
+    clip = np.zeros_like(noise)
+    for start in range(0, len(noise), BLOCK):
+        block = noise[start:start + BLOCK]
+        spectrum = np.fft.rfft(block)
+        envelope = np.interp(np.arange(len(spectrum)), np.linspace(0, len(spectrum), 12), rng.uniform(0, 1, 12) ** 2)
+        clip[start:start + len(block)] = np.fft.irfft(spectrum * envelope, len(block)) * rng.uniform(0.3, 1)
+    return clip / np.abs(clip).max()
+
+def make_repost(clip: np.ndarray, rng: np.random.Generator, snr_db: float) -> np.ndarray:
+    """Trim up to 5 s from the start, lower the gain and add noise."""
+    repost = clip[int(rng.uniform(0, 5) * SAMPLE_RATE):] * 0.6
+    noise_power = np.mean(repost ** 2) / 10 ** (snr_db / 10)
+    return repost + np.sqrt(noise_power) * rng.standard_normal(len(repost)).astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clips', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--whisper-rtf', type=float, default=0.15, help='Transcription seconds per audio second')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    clips = [make_clip(args.seconds, seed) for seed in range(args.clips)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = FingerprintIndex(os.path.join(tmp, 'fingerprints.db'))
+        fingerprint_ms = []
+        for number, clip in enumerate(clips):
+            started = time.perf_counter()
+            fingerprint = fingerprint_samples(clip, SAMPLE_RATE)
+            fingerprint_ms.append((time.perf_counter() - started) * 1000)
+            index.add(f"run-{number}", None, fingerprint, "transcript.json", args.seconds * args.whisper_rtf)
+        print(f"Fingerprinting {args.seconds:.0f}s of audio: {statistics.median(fingerprint_ms):.1f} ms p50")
+
+        print(f"{'SNR dB':<8}{'match rate':>12}{'lookup p50 ms':>16}{'whisper s saved':>18}")
+        for snr_db in (30, 20, 15, 10):
+            matched = 0
+            lookup_ms = []
+            for number, clip in enumerate(clips):
+                fingerprint = fingerprint_samples(make_repost(clip, rng, snr_db), SAMPLE_RATE)
+                started = time.perf_counter()
+                match = index.lookup(fingerprint)
+                lookup_ms.append((time.perf_counter() - started) * 1000)
+                matched += match is not None and match["run_id"] == f"run-{number}"
+            saved = matched * args.seconds * args.whisper_rtf
+            print(f"{snr_db:<8}{matched / len(clips):>12.0%}{statistics.median(lookup_ms):>16.1f}{saved:>18.1f}")
+
+        false_matches = sum(
+            index.lookup(fingerprint_samples(make_clip(args.seconds, 100000 + seed), SAMPLE_RATE)) is not None
+            for seed in range(args.clips)
+        )
+        print(f"False matches on unrelated clips: {false_matches}/{args.clips}")
+        index.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the multilingual model against language routing on a corpus.
+
+Transcribes every audio file in --corpus twice: with WHISPER_MODEL alone,
+detecting the language as the pipeline used to, and through
+LanguageRoutedModel, which sends English audio to WHISPER_ENGLISH_MODEL.
+Reports the real-time factor of each, the word error rate against a
+reference transcript where one sits next to the audio (clip.mp3 and
+clip.txt), and how the routed clips were split. Needs the model weights;
+run from api/:
+
+    python -m src.benchmarks.bench_language_routing --corpus fixtures/english
+"""
+import argparse
+import os
+import re
+import time
+
+from ..audio_stream import SAMPLE_RATE
+from ..inference import WHISPER_ENGLISH_MODEL, WHISPER_MODEL, LanguageRoutedModel
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a", ".wav", ".ogg", ".opus", ".webm")
+
+def words(text: str):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance over the reference length."""
+    ref, hyp = words(reference), words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+def transcribe(model, samples):
+    started = time.perf_counter()
+    segments, info = model.transcribe(samples, beam_size=5)
+    text = "".join(segment.text for segment in segments)
+    return text, info.language, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", required=True, help="Directory of audio files, with optional .txt references")
+    parser.add_argument("--model", default=WHISPER_MODEL)
+    parser.add_argument("--english-model", default=WHISPER_ENGLISH_MODEL)
+    args = parser.parse_args()
+
+    from faster_whisper import WhisperModel
+    from faster_whisper.audio import decode_audio
+    multilingual = WhisperModel(args.model, device="cpu", compute_type="int8")
+    english = WhisperModel(args.english_model, device="cpu", compute_type="int8")
+    modes = {"multilingual": multilingual, "routed": LanguageRoutedModel(multilingual, english)}
+
+    totals = {mode: {"seconds": 0.0, "errors": [], "languages": {}} for mode in modes}
+    audio_seconds = 0.0
+    files = sorted(name for name in os.listdir(args.corpus) if name.endswith(AUDIO_EXTENSIONS))
+    for name in files:
+        samples = decode_audio(os.path.join(args.corpus, name), sampling_rate=SAMPLE_RATE)
+        audio_seconds += len(samples) / SAMPLE_RATE
+        reference_path = os.path.join(args.corpus, os.path.splitext(name)[0] + ".txt")
+        reference = open(reference_path, encoding="utf-8").read() if os.path.exists(reference_path) else None
+        for mode, model in modes.items():
+            text, language, seconds = transcribe(model, samples)
+            totals[mode]["seconds"] += seconds
+            totals[mode]["languages"][language] = totals[mode]["languages"].get(language, 0) + 1
+            if reference is not None:
+                totals[mode]["errors"].append(word_error_rate(reference, text))
+
+    print(f"{len(files)} files, {audio_seconds / 60:.1f} min of audio")
+    print(f"{'mode':<14}{'RTF':>8}{'speedup':>9}{'WER':>8}  languages")
+    baseline = totals["multilingual"]["seconds"]
+    for mode, total in totals.items():
+        wer = f"{sum(total['errors']) / len(total['errors']):.1%}" if total["errors"] else "-"
+        languages = ", ".join(f"{language} {count}" for language, count in sorted(total["languages"].items()))
+        print(f"{mode:<14}{total['seconds'] / audio_seconds:>8.3f}{baseline / total['seconds']:>8.2f}x{wer:>8}  {languages}")
+
+if __name__ == "__main__":
+    main()
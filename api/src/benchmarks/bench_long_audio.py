@@ -0,0 +1,108 @@
+"""
+Measure peak memory of the audio path as videos get longer.
+
+Encodes synthetic AAC files of increasing length, then runs each through
+the audio stages in a fresh process and reports its peak RSS. "whole"
+decodes the file into one array, fingerprints it and builds Whisper's
+features for all of it, which is what transcribing a decoded file does.
+"windowed" is the pipeline's path: fingerprint_audio, then the same
+features one TRANSCRIBE_WINDOW_SECONDS window at a time. Pass --model to
+run real transcription instead of the feature stage. Run from api/:
+
+    python -m src.benchmarks.bench_long_audio --minutes 5 15 30 120
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import av
+import numpy as np
+
+from ..audio_stream import SAMPLE_RATE
+
+def write_audio(path: str, minutes: float):
+    """Speech-like amplitude-modulated noise, encoded a second at a time."""
+    rng = np.random.default_rng(0)
+    with av.open(path, "w") as container:
+        stream = container.add_stream("aac", rate=SAMPLE_RATE)
+        stream.layout = "mono"
+        for second in range(int(minutes * 60)):
+            envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * (np.arange(SAMPLE_RATE) / SAMPLE_RATE + second))
+            chunk = (0.2 * envelope * rng.standard_normal(SAMPLE_RATE)).astype(np.float32)
+            frame = av.AudioFrame.from_ndarray(chunk.reshape(1, -1), format="flt", layout="mono")
+            frame.rate = SAMPLE_RATE
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+def run_stage(mode: str, path: str, model_name: str):
+    """Runs in the measured child process."""
+    from faster_whisper.audio import decode_audio
+    from faster_whisper.feature_extractor import FeatureExtractor
+    from ..fingerprint import fingerprint_samples
+    from ..video_pipeline import TRANSCRIBE_WINDOW_SECONDS, fingerprint_audio, transcribe_audio
+
+    model = None
+    if model_name:
+        from faster_whisper import WhisperModel
+        model = WhisperModel(model_name, device="cpu", compute_type="int8")
+    features = FeatureExtractor(feature_size=80)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    if mode == "whole":
+        samples = decode_audio(path, sampling_rate=SAMPLE_RATE)
+        fingerprint_samples(samples, SAMPLE_RATE)
+        transcribe_audio(model, samples) if model else features(samples)
+    else:
+        _, samples = fingerprint_audio(path)
+        if model:
+            transcribe_audio(model, samples if samples is not None else path)
+        else:
+            from ..audio_stream import iter_audio_windows
+            for window in iter_audio_windows(path, TRANSCRIBE_WINDOW_SECONDS):
+                features(window)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{peak / 1024:.0f} {(peak - baseline) / 1024:.0f} {elapsed:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[5, 15, 30, 120])
+    parser.add_argument("--max-whole-minutes", type=float, default=30,
+                        help="Longest audio to run the whole-file path on; it needs ~70 MB per minute")
+    parser.add_argument("--model", default="", help="Whisper model to transcribe with, e.g. tiny")
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_stage(*args.run, args.model)
+        return
+
+    print(f"{'minutes':<9}{'mode':<10}{'peak RSS MB':>12}{'growth MB':>11}{'seconds':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"{minutes:g}min.m4a")
+            write_audio(path, minutes)
+            for mode in ("whole", "windowed"):
+                if mode == "whole" and minutes > args.max_whole_minutes:
+                    print(f"{minutes:<9g}{mode:<10}{'skipped':>12}")
+                    continue
+                output = subprocess.run(
+                    [sys.executable, "-m", "src.benchmarks.bench_long_audio", "--run", mode, path,
+                     "--model", args.model],
+                    capture_output=True, text=True, env={**os.environ, "LOG_LEVEL": "WARNING"}
+                )
+                if output.returncode != 0:
+                    print(f"{minutes:<9g}{mode:<10}{'failed':>12}  {output.stderr.strip().splitlines()[-1]}")
+                    continue
+                peak, growth, seconds = output.stdout.split()[-3:]
+                print(f"{minutes:<9g}{mode:<10}{peak:>12}{growth:>11}{seconds:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Measure memory per API instance as the number of workers grows.
+
+Starts the API once per worker count in each serving mode: "per-worker"
+is plain uvicorn, where every worker loads its own Whisper model, and
+"shared" is src.serve, where one inference process holds the model for
+all workers. Once /health answers and memory settles, it sums peak RSS
+(VmHWM) and PSS, which splits shared pages between the processes using
+them, across the whole process tree. Needs the model to be downloadable
+or already cached. Run from api/:
+
+    python -m src.benchmarks.bench_memory --workers 1 2 4
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+MODES = {
+    "per-worker": lambda workers, port: [sys.executable, "-m", "uvicorn", "src.main:app",
+                                         "--port", str(port), "--workers", str(workers)],
+    "shared": lambda workers, port: [sys.executable, "-m", "src.serve", "--port", str(port), "--workers", str(workers)],
+}
+
+def process_tree(pid: int):
+    """pid and all of its descendants."""
+    pids = [pid]
+    for current in pids:
+        for task in os.listdir(f"/proc/{current}/task"):
+            try:
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+    return pids
+
+def memory_kb(pid: int, field: str, path: str = "status") -> int:
+    try:
+        with open(f"/proc/{pid}/{path}") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def wait_until_healthy(port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+def measure(mode: str, workers: int, port: int, settle: float, timeout: float):
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    env.pop("INFERENCE_ADDRESS", None)
+    server = subprocess.Popen(MODES[mode](workers, port), env=env, stdout=subprocess.DEVNULL)
+    try:
+        if not wait_until_healthy(port, timeout):
+            return None
+        # /health answers as soon as the first worker is up; give the rest time to load
+        time.sleep(settle)
+        pids = process_tree(server.pid)
+        return {
+            "processes": len(pids),
+            "peak_rss_mb": sum(memory_kb(pid, "VmHWM") for pid in pids) / 1024,
+            "pss_mb": sum(memory_kb(pid, "Pss", "smaps_rollup") for pid in pids) / 1024,
+        }
+    finally:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8391)
+    parser.add_argument("--settle", type=float, default=10, help="Seconds to wait after the first health check")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for startup")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12}{'workers':>8}{'processes':>11}{'peak RSS MB':>13}{'PSS MB':>9}{'PSS/worker':>12}")
+    for workers in args.workers:
+        for mode in MODES:
+            result = measure(mode, workers, args.port, args.settle, args.timeout)
+            if result is None:
+                print(f"{mode:<12}{workers:>8}  failed to start")
+                continue
+            print(f"{mode:<12}{workers:>8}{result['processes']:>11}{result['peak_rss_mb']:>13.0f}"
+                  f"{result['pss_mb']:>9.0f}{result['pss_mb'] / workers:>12.0f}")
+
+if __name__ == "__main__":
+    main()
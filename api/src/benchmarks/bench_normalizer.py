@@ -0,0 +1,73 @@
+"""
+Measure ingredient normalization throughput on transcript lines.
+
+Compares a naive loop that runs one regex per ingredient alias over each
+line with the token index in ingredient_normalizer, line by line and as a
+single batch. Run from api/:
+
+    python -m src.benchmarks.bench_normalizer --lines 5000
+"""
+import argparse
+import random
+import re
+import time
+
+from ..ingredient_normalizer import INGREDIENTS, normalize_line, normalize_lines
+
+AMOUNTS = ["2 cups", "1 1/2 tbsp", "a couple tbsp of", "½ tsp", "200g", "3 cloves of", "a pinch of", "", "half a cup of"]
+FILLER = ["so now we add", "then stir in", "and", "you'll want", "I like to use", "toss in some"]
+CHATTER = ["Don't forget to like and subscribe!", "This is honestly so good.", "Let it cool for 10 minutes."]
+
+def make_lines(count: int, rng: random.Random):
+    """Build transcript-like lines, most of them mentioning one or two ingredients."""
+    names = [alias for name, aliases in INGREDIENTS.items() for alias in [name] + aliases]
+    lines = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            lines.append(rng.choice(CHATTER))
+            continue
+        parts = [rng.choice(FILLER), rng.choice(AMOUNTS), rng.choice(names)]
+        if rng.random() < 0.4:
+            parts += ["and", rng.choice(AMOUNTS), rng.choice(names)]
+        lines.append(" ".join(part for part in parts if part))
+    return lines
+
+def build_naive():
+    """One compiled regex per alias, tried against every line."""
+    patterns = [
+        (re.compile(rf"\b{re.escape(alias)}s?\b"), name)
+        for name, aliases in INGREDIENTS.items()
+        for alias in [name] + aliases
+    ]
+
+    def normalize(line):
+        line = line.lower()
+        return [name for pattern, name in patterns if pattern.search(line)]
+    return normalize
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lines', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines, random.Random(0))
+    naive = build_naive()
+    runs = {
+        'naive regex per alias': lambda: [naive(line) for line in lines],
+        'index, line by line': lambda: [normalize_line(line) for line in lines],
+        'index, one batch': lambda: normalize_lines(lines),
+    }
+
+    print(f"{'approach':<24}{'best ms':>10}{'lines/sec':>14}")
+    for name, run in runs.items():
+        best = min(timed(run) for _ in range(args.repeat))
+        print(f"{name:<24}{best * 1000:>10.1f}{args.lines / best:>14.0f}")
+
+if __name__ == '__main__':
+    main()
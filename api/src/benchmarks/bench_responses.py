@@ -0,0 +1,95 @@
+"""
+Measure /process-url payload sizes, encode time and client parse time.
+
+Builds responses for auto-captioned videos of increasing length in the
+old shape (raw rolling-caption SRT, segment list and file paths, encoded
+with jsonable_encoder and json.dumps) and the new one (deduplicated
+captions, orjson, with and without a fields= projection), then
+compresses each the way CompressionMiddleware would. Run from api/:
+
+    python -m src.benchmarks.bench_responses
+"""
+import argparse
+import json
+import statistics
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from ..captions import captions_to_transcript
+from ..recipe_extractor import extract_recipe
+from ..responses import FastJSONResponse, _Compressor, brotli, project
+from ..main import DEFAULT_RESPONSE_FIELDS
+
+WORDS = ("so now we're going to add the garlic and the butter into the pan and let that melt down "
+         "then stir in two cups of rice with a pinch of salt and cook it for about ten minutes").split()
+LENGTHS = [("reel", 60), ("short", 600), ("long", 3600)]
+
+def _timestamp(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}".replace(".", ",")
+
+def make_rolling_srt(seconds: int) -> str:
+    """Auto-caption SRT the way YouTube rolls it: each line shown twice, growing word by word."""
+    cues, previous, start, word = [], "", 0.0, 0
+    while start < seconds:
+        line = []
+        for _ in range(7):
+            line.append(WORDS[word % len(WORDS)])
+            word += 1
+            cues.append((start, start + 0.4, f"{previous}\n{' '.join(line)}".strip()))
+            start += 0.4
+        previous = " ".join(line)
+    return "\n\n".join(f"{number}\n{_timestamp(begin)} --> {_timestamp(end)}\n{text}"
+                       for number, (begin, end, text) in enumerate(cues, 1))
+
+def _time_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"{'video':<8}{'response':<14}{'bytes':>10}" + "".join(f"{name + ' bytes':>12}" for name in encodings)
+          + f"{'encode ms':>11}{'parse ms':>10}")
+    for name, seconds in LENGTHS:
+        srt = make_rolling_srt(seconds)
+        transcript = captions_to_transcript(srt)
+        recipe = extract_recipe(transcript)
+
+        # Shape and encoding before: raw SRT, internal paths, jsonable_encoder + json.dumps
+        old = {"url": "https://youtu.be/x", "recipe": recipe, "transcript": {
+            "transcript": {"text": srt, "source": "subtitles", "url": "https://youtu.be/x"},
+            "recipe": recipe, "transcript_file_path": "data/run/transcript.json", "source": "subtitles",
+        }}
+        payload = {"url": "https://youtu.be/x", "source": "subtitles", "recipe": recipe,
+                   "transcript": {**transcript, "language": None, "reused_from": None}}
+        variants = [
+            ("before", lambda: json.dumps(jsonable_encoder(old), ensure_ascii=False,
+                                          separators=(",", ":")).encode("utf-8")),
+            ("default", lambda: FastJSONResponse(project(payload, DEFAULT_RESPONSE_FIELDS)).body),
+            ("segments", lambda: orjson.dumps(project(payload, ["transcript.segments"]))),
+            ("bot", lambda: orjson.dumps(project(payload, ["url", "source", "recipe"]))),
+        ]
+        for label, encode in variants:
+            body = encode()
+            sizes = []
+            for encoding in encodings:
+                compressor = _Compressor(encoding)
+                sizes.append(len(compressor.compress(body) + compressor.finish()))
+            encode_ms = _time_ms(encode, args.repeat)
+            parse_ms = _time_ms(lambda: json.loads(body), args.repeat)
+            print(f"{name:<8}{label:<14}{len(body):>10}" + "".join(f"{size:>12}" for size in sizes)
+                  + f"{encode_ms:>11.2f}{parse_ms:>10.2f}")
+
+if __name__ == '__main__':
+    main()
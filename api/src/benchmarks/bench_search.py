@@ -0,0 +1,64 @@
+"""
+Measure search latency against a large transcript index.
+
+Fills a temporary SearchIndex with synthetic transcripts, then times a
+mix of ingredient, title and prefix queries. Run from api/:
+
+    python -m src.benchmarks.bench_search --transcripts 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from ..ingredient_normalizer import INGREDIENTS
+from ..search_index import SearchIndex
+
+DISHES = ["noodles", "fried rice", "tacos", "curry", "pasta", "salad", "soup", "stir fry", "burger", "pancakes"]
+FILLER = ("so today I wanted to show you something quick and easy that you can make on a weeknight "
+          "and honestly it turned out so much better than I expected").split()
+QUERIES = ["gochujang butter", "garlic", "soy sauce noodles", "chicken curry", "parm", "lemon zest pasta",
+           "smoked paprika tacos", "mozz", "fish sauce", "brown sugar pancakes"]
+
+def make_transcript(rng: random.Random, words: int):
+    """Build a transcript and recipe with a few ingredients worked into the text."""
+    ingredients = rng.sample(list(INGREDIENTS), 6)
+    title = f"{rng.choice(ingredients).title()} {rng.choice(DISHES).title()}"
+    text = []
+    for _ in range(words // 10):
+        text.extend(rng.sample(FILLER, 8))
+        text.extend(rng.choice(ingredients).split())
+    return {"text": " ".join(text), "source": "audio_transcription"}, {"title": title, "ingredients": ingredients}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--transcripts', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=300, help='Words per transcript')
+    parser.add_argument('--runs', type=int, default=20, help='Times each query is run')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SearchIndex(os.path.join(tmp, 'search.db'))
+        started = time.perf_counter()
+        for number in range(args.transcripts):
+            transcript, recipe = make_transcript(rng, args.words)
+            index.add(f"run-{number}", f"https://youtu.be/{number:011d}", transcript, recipe)
+        elapsed = time.perf_counter() - started
+        print(f"Indexed {args.transcripts} transcripts in {elapsed:.1f}s "
+              f"({elapsed / args.transcripts * 1000:.2f} ms each)")
+
+        print(f"{'query':<24}{'results':>9}{'p50 ms':>10}{'max ms':>10}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                results = index.search(query, limit=10)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{query:<24}{len(results):>9}{statistics.median(timings):>10.2f}{max(timings):>10.2f}")
+        index.close()
+
+if __name__ == '__main__':
+    main()
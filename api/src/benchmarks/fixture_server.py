@@ -0,0 +1,185 @@
+"""
+Serve the real API with yt-dlp and Whisper replaced by local fixtures.
+
+Generates a set of fixture clips, each with MP3 audio and, for a share of
+them, SRT captions of a recipe. The pipeline's yt-dlp calls (probe,
+subtitles, download) are swapped for functions that copy a clip after a
+configurable delay, and the shared inference process runs a stand-in
+model that sleeps for the clip's transcription time. Everything else,
+from the HTTP layer to decoding, fingerprinting, checkpoints and recipe
+extraction, is the real code. Needs no network and no Whisper weights.
+
+A URL maps to a clip by the last number in its video ID, so reposts and
+cross-posts ("vid0000042", "re7-vid0000042") get the same audio. Used by
+the bot's end-to-end load test; run from api/:
+
+    python -m src.benchmarks.fixture_server --port 8765
+"""
+import argparse
+import functools
+import os
+import random
+import re
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import av
+import numpy as np
+import uvicorn
+import yt_dlp
+
+from ..audio_stream import SAMPLE_RATE
+from .bench_fingerprint import make_clip
+
+RECIPES = [
+    ["Today we're making a tomato pasta.", "You'll need 200g spaghetti, 2 cloves garlic and 1 can tomatoes.",
+     "First, boil the pasta for 10 minutes.", "Then fry the garlic in olive oil.",
+     "Add the tomatoes and simmer for 15 minutes.", "Finally, toss the pasta in the sauce."],
+    ["This is my quick fried rice.", "You need 2 cups cooked rice, 2 eggs and 1 tbsp soy sauce.",
+     "First, scramble the eggs in a hot wok.", "Next, add the rice and stir fry for 5 minutes.",
+     "Then add the soy sauce.", "Serve with spring onions on top."],
+    ["Let's bake banana bread.", "Take 3 ripe bananas, 250g flour, 100g butter and 2 eggs.",
+     "First, mash the bananas.", "Mix in the melted butter and eggs.",
+     "Fold in the flour.", "Bake at 180 degrees for 50 minutes."],
+]
+
+# Set by main() before the pipeline functions are swapped
+FIXTURES = SimpleNamespace(directory="", clips=0, subtitle_share=0.0, platform_latency=0.0,
+                           download_latency=0.0, error_rate=0.0, random=random.Random(0))
+
+def write_mp3(path: str, samples: np.ndarray):
+    with av.open(path, "w") as container:
+        stream = container.add_stream("libmp3lame", rate=SAMPLE_RATE)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1) * 0.5, format="flt", layout="mono")
+        frame.rate = SAMPLE_RATE
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+def write_srt(path: str, lines):
+    cues = []
+    for index, line in enumerate(lines):
+        cues.append(f"{index + 1}\n00:00:{index * 3:02d},000 --> 00:00:{index * 3 + 3:02d},000\n{line}\n")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(cues))
+
+def has_subtitles(clip: int) -> bool:
+    return random.Random(clip).random() < FIXTURES.subtitle_share
+
+def make_fixtures(directory: str, clips: int, seconds: float):
+    for clip in range(clips):
+        write_mp3(os.path.join(directory, f"clip-{clip}.mp3"), make_clip(seconds, seed=clip))
+        if has_subtitles(clip):
+            write_srt(os.path.join(directory, f"clip-{clip}.srt"), RECIPES[clip % len(RECIPES)])
+
+def _video_id(url: str) -> str:
+    match = re.search(r"(?:v=|youtu\.be/|shorts/|reel/|/p/|/tv/)([\w-]+)", url)
+    return match.group(1) if match else url
+
+def _clip(url: str) -> int:
+    numbers = re.findall(r"\d+", _video_id(url))
+    return int(numbers[-1]) % FIXTURES.clips if numbers else 0
+
+def _maybe_fail(url: str):
+    if FIXTURES.random.random() < FIXTURES.error_rate:
+        raise yt_dlp.utils.DownloadError(f"Fixture failure for {url}")
+
+def probe_video(url: str):
+    time.sleep(FIXTURES.platform_latency)
+    _maybe_fail(url)
+    clip = _clip(url)
+    return {
+        "id": _video_id(url),
+        "extractor": "Instagram" if "instagram.com" in url else "Youtube",
+        "title": f"Fixture clip {clip}",
+        "duration": None,
+        "has_subtitles": has_subtitles(clip),
+    }
+
+def extract_subtitles(url: str, output_base_path: str):
+    time.sleep(FIXTURES.platform_latency)
+    path = output_base_path + ".en.srt"
+    shutil.copyfile(os.path.join(FIXTURES.directory, f"clip-{_clip(url)}.srt"), path)
+    return path
+
+def download_audio(url: str, output_path: str, duration=None) -> str:
+    time.sleep(FIXTURES.download_latency)
+    _maybe_fail(url)
+    path = output_path + ".mp3"
+    shutil.copyfile(os.path.join(FIXTURES.directory, f"clip-{_clip(url)}.mp3"), path)
+    return path
+
+class FixtureWhisperModel:
+    """Stands in for WhisperModel: sleeps rtf seconds per audio second and reads out a recipe."""
+
+    def __init__(self, num_workers: int = 1, rtf: float = 0.15):
+        self.rtf = rtf
+
+    def transcribe(self, audio, **options):
+        duration = len(audio) / SAMPLE_RATE
+        time.sleep(self.rtf * duration)
+        # The same audio always reads out the same recipe
+        lines = RECIPES[int(np.abs(audio[:SAMPLE_RATE]).sum() * 1000) % len(RECIPES)]
+        step = duration / len(lines)
+        segments = [
+            SimpleNamespace(start=index * step, end=(index + 1) * step, text=" " + line)
+            for index, line in enumerate(lines)
+        ]
+        return iter(segments), SimpleNamespace(language=options.get("language") or "en", duration=duration)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clips", type=int, default=50, help="Distinct fixture clips")
+    parser.add_argument("--clip-seconds", type=float, default=20)
+    parser.add_argument("--subtitle-share", type=float, default=0.4, help="Share of clips with captions")
+    parser.add_argument("--platform-latency", type=float, default=0.2, help="Seconds per probe or caption fetch")
+    parser.add_argument("--download-latency", type=float, default=0.5, help="Seconds per audio download")
+    parser.add_argument("--whisper-rtf", type=float, default=0.15, help="Transcription seconds per audio second")
+    parser.add_argument("--inference-threads", type=int, default=2)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of probes and downloads that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from .. import inference, serve
+    workdir = tempfile.mkdtemp(prefix="fixture-api-")
+    fixture_dir = os.path.join(workdir, "fixtures")
+    os.makedirs(fixture_dir)
+    FIXTURES.__dict__.update(
+        directory=fixture_dir, clips=args.clips, subtitle_share=args.subtitle_share,
+        platform_latency=args.platform_latency, download_latency=args.download_latency,
+        error_rate=args.error_rate, random=random.Random(args.seed),
+    )
+    make_fixtures(fixture_dir, args.clips, args.clip_seconds)
+
+    process, address, authkey = serve.start_inference_process(
+        args.inference_threads, functools.partial(FixtureWhisperModel, rtf=args.whisper_rtf)
+    )
+    # src.serve hands these to its workers through the environment; here
+    # src.inference is already imported, so set them before src.main reads them
+    inference.INFERENCE_ADDRESS = address
+    inference.INFERENCE_AUTHKEY = authkey.hex()
+    from .. import main as api, video_pipeline
+    video_pipeline.probe_video = probe_video
+    video_pipeline.extract_subtitles = extract_subtitles
+    video_pipeline.download_audio = download_audio
+
+    # The pipeline saves under a relative data/ directory
+    os.chdir(workdir)
+    # uvicorn re-raises SIGTERM once it has shut down; exit through the finally below
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        uvicorn.run(api.app, host="127.0.0.1", port=args.port, log_level="warning")
+    finally:
+        process.terminate()
+        shutil.rmtree(os.path.dirname(address), ignore_errors=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# WebVTT may leave out the hours ("00:01.000 --> 00:03.000")
+_TIME_RE = re.compile(r"(?:(\d+):)?(\d+):(\d+)[,.](\d+)\s*-->\s*(?:(\d+):)?(\d+):(\d+)[,.](\d+)")
+# VTT styling and the per-word timestamps YouTube puts inside auto-caption cues
+_TAG_RE = re.compile(r"<[^>]*>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _seconds(hours: Optional[str], minutes: str, seconds: str, millis: str) -> float:
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_cues(text: str) -> List[Dict[str, Any]]:
+    """
+    Parses SRT or WebVTT text into cues with start/end times in seconds
+    and the cue's lines, stripped of markup.
+
+    Cues are split at timing lines rather than blank lines: YouTube's VTT
+    cues contain lines of a single space that a blank-line split would
+    cut in half.
+    """
+    lines = text.splitlines()
+    timings = [index for index, line in enumerate(lines) if _TIME_RE.search(line)]
+
+    cues = []
+    for position, index in enumerate(timings):
+        end = timings[position + 1] if position + 1 < len(timings) else len(lines)
+        # The line before the next timing line is that cue's number or identifier
+        if position + 1 < len(timings) and end - 1 > index and not lines[end - 2].strip():
+            end -= 1
+        groups = _TIME_RE.search(lines[index]).groups()
+        cue_lines = [_SPACE_RE.sub(" ", _TAG_RE.sub("", line)).strip() for line in lines[index + 1:end]]
+        cues.append({
+            "start": _seconds(*groups[:4]),
+            "end": _seconds(*groups[4:]),
+            "lines": [line for line in cue_lines if line],
+        })
+    return cues
+
+
+def parse_captions(text: str) -> List[Dict[str, Any]]:
+    """
+    Parses subtitle text into transcript segments, one per spoken line.
+
+    YouTube's auto-captions roll: every cue repeats the line shown before
+    it, and a line is often re-sent as it grows word by word. Each line is
+    kept once, in its longest form, spanning all the cues that showed it.
+    """
+    segments: List[Dict[str, Any]] = []
+    for cue in parse_cues(text):
+        for line in cue["lines"]:
+            # Rolled-over lines come back within the next couple of cues
+            repeated = next((segment for segment in segments[-2:] if segment["text"] == line), None)
+            if repeated is not None:
+                repeated["end"] = max(repeated["end"], cue["end"])
+            elif segments and line.startswith(segments[-1]["text"] + " "):
+                segments[-1]["text"] = line
+                segments[-1]["end"] = cue["end"]
+            else:
+                segments.append({"start": cue["start"], "end": cue["end"], "text": line})
+    return segments
+
+
+def captions_to_transcript(text: str) -> Dict[str, Any]:
+    """
+    Turns subtitle text into the same text/segments shape whisper produces.
+    """
+    segments = parse_captions(text)
+    return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
@@ -0,0 +1,276 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger()
+
+# Shared by the API and src.worker, whichever process runs the pipeline
+FINGERPRINT_INDEX_PATH = os.environ.get("FINGERPRINT_INDEX_PATH", os.path.join("data", "fingerprints.db"))
+
+# Audio is fingerprinted at 8 kHz: speech and music energy below 2 kHz
+# survives the re-encoding each platform applies to a repost.
+SAMPLE_RATE = 8000
+FRAME_SIZE = 2048  # 256 ms windows...
+HOP_SIZE = 64      # ...every 8 ms
+BAND_COUNT = 33    # 33 bands give 32 energy-difference bits per frame
+MIN_FREQ = 300
+MAX_FREQ = 2000
+
+# Only every fourth frame goes into the lookup table; queries use every frame,
+# so an aligned repost still hits and the table stays a quarter of the size.
+INDEX_STRIDE = 4
+# Hits that must agree on the same time offset before a candidate is verified
+MIN_VOTES = 8
+# Share of differing bits below which two aligned fingerprints are the same audio
+MAX_BIT_ERROR_RATE = 0.35
+# Clips shorter than this (in frames, ~3 s) are too short to match reliably
+MIN_OVERLAP_FRAMES = 375
+# Share of both the query and the stored clip the aligned overlap must cover.
+# A repost trimmed by a second or two still matches; a long video that merely
+# contains a short indexed clip (a compilation, a reused intro) doesn't.
+MIN_OVERLAP_SHARE = 0.9
+
+# Frames transformed per FFT call, bounding the spectrum buffer to ~8 MB
+FRAME_BLOCK = 1024
+
+_BAND_EDGES = np.geomspace(MIN_FREQ, MAX_FREQ, BAND_COUNT + 1)
+_BIN_FREQS = np.fft.rfftfreq(FRAME_SIZE, 1 / SAMPLE_RATE)
+_BAND_BINS = [
+    np.flatnonzero((_BIN_FREQS >= low) & (_BIN_FREQS < high))
+    for low, high in zip(_BAND_EDGES[:-1], _BAND_EDGES[1:])
+]
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+_BIT_WEIGHTS = (1 << np.arange(BAND_COUNT - 1, dtype=np.uint64)).astype(np.uint64)
+
+
+def _band_energy(samples: np.ndarray, frame_count: int) -> np.ndarray:
+    frames = np.lib.stride_tricks.as_strided(
+        samples, shape=(frame_count, FRAME_SIZE), strides=(samples.strides[0] * HOP_SIZE, samples.strides[0])
+    )
+    energy = np.empty((frame_count, BAND_COUNT))
+    # A block at a time: the spectrum of every frame at once is ~1 MB per second of audio
+    for start in range(0, frame_count, FRAME_BLOCK):
+        spectrum = np.abs(np.fft.rfft(frames[start:start + FRAME_BLOCK] * _WINDOW, axis=1)) ** 2
+        energy[start:start + len(spectrum)] = np.stack([spectrum[:, bins].sum(axis=1) for bins in _BAND_BINS], axis=1)
+    return energy
+
+
+def fingerprint_windows(windows: Iterable[np.ndarray], sample_rate: int = 16000) -> np.ndarray:
+    """
+    Computes a Philips-style fingerprint: one 32-bit word per frame, each
+    bit saying whether the energy difference between two neighbouring
+    bands rose or fell since the previous frame.
+
+    Audio arrives in consecutive windows, so a long file is never held in
+    memory at once; the result is the same as for the whole audio.
+
+    Args:
+        windows: Consecutive chunks of mono float audio
+        sample_rate: Rate of samples; must be a multiple of SAMPLE_RATE
+
+    Returns:
+        uint32 array with one sub-fingerprint per 8 ms of audio
+    """
+    factor = sample_rate // SAMPLE_RATE
+    words = []
+    undecimated = np.zeros(0, dtype=np.float32)
+    carry = np.zeros(0, dtype=np.float32)
+    previous_diff = None
+    for window in windows:
+        if factor > 1:
+            # Averaging each block of samples is a cheap low-pass before decimating
+            window = np.concatenate([undecimated, window]) if len(undecimated) else window
+            usable = len(window) - len(window) % factor
+            undecimated = window[usable:]
+            window = window[:usable].reshape(-1, factor).mean(axis=1)
+
+        # Frames overlap, so the samples after the last full frame start the next window
+        samples = np.ascontiguousarray(np.concatenate([carry, window]) if len(carry) else window, dtype=np.float32)
+        if len(samples) < FRAME_SIZE:
+            carry = samples
+            continue
+        frame_count = 1 + (len(samples) - FRAME_SIZE) // HOP_SIZE
+        energy = _band_energy(samples, frame_count)
+        band_diff = energy[:, :-1] - energy[:, 1:]
+        if previous_diff is not None:
+            band_diff = np.vstack([previous_diff, band_diff])
+        bits = (band_diff[1:] - band_diff[:-1]) > 0
+        words.append((bits.astype(np.uint64) @ _BIT_WEIGHTS).astype(np.uint32))
+        previous_diff = band_diff[-1:]
+        carry = samples[frame_count * HOP_SIZE:]
+
+    return np.concatenate(words) if words else np.zeros(0, dtype=np.uint32)
+
+
+def fingerprint_samples(samples: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Fingerprints audio already in memory; see fingerprint_windows.
+    """
+    return fingerprint_windows([samples], sample_rate)
+
+
+def compute_fingerprint(audio_path: str, window_seconds: float = 300) -> np.ndarray:
+    """
+    Decodes an audio file window by window and fingerprints it.
+    """
+    from .audio_stream import iter_audio_windows
+    return fingerprint_windows(iter_audio_windows(audio_path, window_seconds, 16000), 16000)
+
+
+def bit_error_rate(a: np.ndarray, b: np.ndarray) -> float:
+    """Share of bits that differ between two equal-length fingerprints."""
+    differing = np.unpackbits((a ^ b).view(np.uint8)).sum()
+    return float(differing) / (len(a) * 32)
+
+
+class FingerprintIndex:
+    """
+    Nearest-neighbour lookup of audio fingerprints, persisted in SQLite.
+
+    Sub-fingerprints are stored in a hash table mapping each 32-bit word to
+    the clips and frame offsets where it occurs. A lookup collects exact
+    word hits, votes on the time offset between query and clip, and
+    verifies the best candidates by bit error rate over the aligned
+    overlap, so a repost that was trimmed, re-encoded or turned up still
+    matches.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS clips (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL UNIQUE,
+                url TEXT,
+                transcript_path TEXT NOT NULL,
+                transcribe_seconds REAL,
+                fingerprint BLOB NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hashes (
+                hash INTEGER NOT NULL,
+                clip_id INTEGER NOT NULL,
+                frame INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS hashes_hash ON hashes (hash);
+        """)
+        self._db.commit()
+
+    def add(self, run_id: str, url: Optional[str], fingerprint: np.ndarray, transcript_path: str,
+            transcribe_seconds: Optional[float] = None):
+        """
+        Stores a clip's fingerprint along with where its transcript lives.
+        """
+        if len(fingerprint) < MIN_OVERLAP_FRAMES:
+            return
+        frames = np.arange(0, len(fingerprint), INDEX_STRIDE)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM hashes WHERE clip_id IN (SELECT id FROM clips WHERE run_id = ?)", (run_id,))
+            cursor = self._db.execute(
+                "INSERT OR REPLACE INTO clips (run_id, url, transcript_path, transcribe_seconds, fingerprint, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, url, transcript_path, transcribe_seconds, fingerprint.astype(np.uint32).tobytes(), time.time())
+            )
+            clip_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO hashes (hash, clip_id, frame) VALUES (?, ?, ?)",
+                ((int(fingerprint[frame]), clip_id, int(frame)) for frame in frames if fingerprint[frame])
+            )
+
+    def lookup(self, fingerprint: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Finds a stored clip with the same audio.
+
+        Returns:
+            The matching clip's run_id, url, transcript_path and
+            transcribe_seconds, plus the bit error rate and the offset in
+            seconds of the query within the clip; None if nothing matches
+        """
+        if len(fingerprint) < MIN_OVERLAP_FRAMES:
+            return None
+
+        # Frame where each distinct word first occurs in the query
+        words, first_frames = np.unique(fingerprint, return_index=True)
+        keep = words != 0
+        words, first_frames = words[keep], first_frames[keep]
+        query_frame = dict(zip(words.tolist(), first_frames.tolist()))
+
+        rows = []
+        with self._lock:
+            # Stay under SQLite's bound parameter limit
+            word_list = words.tolist()
+            for start in range(0, len(word_list), 900):
+                chunk = word_list[start:start + 900]
+                rows.extend(self._db.execute(
+                    f"SELECT hash, clip_id, frame FROM hashes WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        if not rows:
+            return None
+
+        # Vote for (clip, offset) pairs; a true repost piles its hits on one offset
+        hits = np.array(rows, dtype=np.int64)
+        offsets = hits[:, 2] - np.array([query_frame[word] for word in hits[:, 0].tolist()], dtype=np.int64)
+        pairs, counts = np.unique(np.stack([hits[:, 1], offsets], axis=1), axis=0, return_counts=True)
+        votes = Counter({(int(clip_id), int(offset)): int(count) for (clip_id, offset), count in zip(pairs, counts)})
+
+        for (clip_id, offset), count in votes.most_common(5):
+            if count < MIN_VOTES:
+                break
+            match = self._verify(clip_id, offset, fingerprint)
+            if match is not None:
+                return match
+        return None
+
+    def _verify(self, clip_id: int, offset: int, fingerprint: np.ndarray) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT run_id, url, transcript_path, transcribe_seconds, fingerprint FROM clips WHERE id = ?",
+                (clip_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        run_id, url, transcript_path, transcribe_seconds, blob = row
+        stored = np.frombuffer(blob, dtype=np.uint32)
+
+        # Align the query so its frame 0 sits at `offset` in the stored clip
+        query_start = max(0, -offset)
+        stored_start = max(0, offset)
+        overlap = min(len(fingerprint) - query_start, len(stored) - stored_start)
+        if overlap < MIN_OVERLAP_FRAMES:
+            return None
+        if overlap < MIN_OVERLAP_SHARE * len(fingerprint) or overlap < MIN_OVERLAP_SHARE * len(stored):
+            return None
+
+        ber = bit_error_rate(fingerprint[query_start:query_start + overlap], stored[stored_start:stored_start + overlap])
+        if ber > MAX_BIT_ERROR_RATE:
+            return None
+        return {
+            "run_id": run_id,
+            "url": url,
+            "transcript_path": transcript_path,
+            "transcribe_seconds": transcribe_seconds,
+            "bit_error_rate": round(ber, 3),
+            "offset_seconds": round(offset * HOP_SIZE / SAMPLE_RATE, 2),
+        }
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from .metrics import metrics
+
+# Seconds a finished job's result is kept for retries whose response was lost
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "1000"))
+
+attached_requests = metrics.counter(
+    "idempotent_requests_attached_total", "Requests that reused the job or result of an earlier request with their key"
+)
+
+
+class IdempotencyKeyConflict(ValueError):
+    """An Idempotency-Key was sent again with a different request."""
+
+
+class IdempotentJobs:
+    """
+    Runs at most one job per Idempotency-Key.
+
+    A request repeating a key whose job is still running waits for that
+    job instead of starting another, and one arriving after it finished
+    gets its result, for ttl seconds. Failed jobs are forgotten, so a
+    retry after a failure runs again. Jobs are shielded from the request
+    that started them: a client that times out and disconnects doesn't
+    cancel the work its retry is about to attach to.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        # key -> (request fingerprint, job task, finished at or None), oldest first
+        self._jobs: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def run(self, key: str, fingerprint: str, job: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of job(), or of the job already started for key.
+
+        Raises:
+            IdempotencyKeyConflict: The key was used for a different fingerprint
+        """
+        self._expire()
+        entry = self._jobs.get(key)
+        if entry is not None:
+            if entry[0] != fingerprint:
+                raise IdempotencyKeyConflict(f"Idempotency-Key {key} was already used for another request")
+            attached_requests.inc()
+            return await asyncio.shield(entry[1])
+
+        task = asyncio.ensure_future(job())
+        self._jobs[key] = (fingerprint, task, None)
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Future):
+        entry = self._jobs.get(key)
+        if entry is None or entry[1] is not task:
+            return
+        if task.cancelled() or task.exception() is not None:
+            del self._jobs[key]
+        else:
+            self._jobs[key] = (entry[0], task, time.monotonic())
+
+    def _expire(self):
+        now = time.monotonic()
+        for key, (_, _, finished_at) in list(self._jobs.items()):
+            if finished_at is not None and now - finished_at > self.ttl:
+                del self._jobs[key]
+        # Beyond the cap, drop the oldest finished results; running jobs always stay
+        excess = len(self._jobs) - self.max_keys
+        for key, (_, _, finished_at) in list(self._jobs.items()):
+            if excess <= 0:
+                break
+            if finished_at is not None:
+                del self._jobs[key]
+                excess -= 1
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .audio_stream import SAMPLE_RATE
+from .logger import setup_logger
+
+logger = setup_logger()
+
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "tiny")
+# English-only variant English audio is routed to; empty sends everything to WHISPER_MODEL
+WHISPER_ENGLISH_MODEL = os.environ.get("WHISPER_ENGLISH_MODEL", "tiny.en")
+# Detected English below this probability stays on the multilingual model
+LANGUAGE_ROUTING_THRESHOLD = float(os.environ.get("LANGUAGE_ROUTING_THRESHOLD", "0.7"))
+# Transcriptions the shared model runs in parallel; more queue in the inference process
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", "2"))
+# Set by src.serve for its uvicorn workers; empty means load the model in-process
+INFERENCE_ADDRESS = os.environ.get("INFERENCE_ADDRESS", "")
+INFERENCE_AUTHKEY = os.environ.get("INFERENCE_AUTHKEY", "")
+# Seconds a worker waits for the inference process to answer one transcription
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", "600"))
+
+
+class LanguageRoutedModel:
+    """
+    Stands in for WhisperModel, sending English audio to an English-only
+    model and the rest to the multilingual one.
+
+    Without a language from the caller, it is detected on the first 30 s
+    of the audio, one encoder pass that the multilingual model would
+    otherwise make itself. The detected language is passed on, so neither
+    model detects it again. The English-only variant of a size is faster
+    and more accurate on English than the multilingual one.
+    """
+
+    def __init__(self, multilingual, english=None, threshold: float = LANGUAGE_ROUTING_THRESHOLD):
+        self.multilingual = multilingual
+        self.english = english
+        self.threshold = threshold
+
+    def detect_language(self, audio: np.ndarray) -> Tuple[str, float]:
+        # Whisper pads shorter audio to a full 30 s window, so a shorter slice wouldn't be cheaper
+        language, probability, _ = self.multilingual.detect_language(audio[:30 * SAMPLE_RATE])
+        return language, probability
+
+    def transcribe(self, audio: Union[str, np.ndarray], language: Optional[str] = None, **options):
+        if language is not None and language not in self.multilingual.supported_languages:
+            language = None
+        if self.english is None or not self.multilingual.model.is_multilingual:
+            return self.multilingual.transcribe(audio, language=language, **options)
+
+        if language is None:
+            if isinstance(audio, str):
+                from faster_whisper.audio import decode_audio
+                audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+            started = time.perf_counter()
+            language, probability = self.detect_language(audio)
+            logger.info("Detected language %s (p=%.2f)", language, probability, extra={
+                "stage": "language", "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+            english = language == "en" and probability >= self.threshold
+        else:
+            english = language == "en"
+
+        model = self.english if english else self.multilingual
+        return model.transcribe(audio, language=language, **options)
+
+
+def load_whisper_model(num_workers: int = 1):
+    """
+    Loads the Whisper models: WHISPER_MODEL, plus WHISPER_ENGLISH_MODEL
+    for English audio. num_workers lets that many threads transcribe at
+    once on the same weights.
+    """
+    from faster_whisper import WhisperModel
+
+    def load(name):
+        # "tiny" on CPU with int8 keeps memory and latency low
+        return WhisperModel(name, device="cpu", compute_type="int8", num_workers=num_workers)
+
+    english = None
+    if WHISPER_ENGLISH_MODEL and WHISPER_ENGLISH_MODEL != WHISPER_MODEL:
+        english = load(WHISPER_ENGLISH_MODEL)
+    return LanguageRoutedModel(load(WHISPER_MODEL), english)
+
+
+def _transcribe(model, request: Dict[str, Any], samples: Optional[np.ndarray]):
+    segments, info = model.transcribe(samples if samples is not None else request["audio"], **request["options"])
+    # Segments are a lazy generator; run it here, where the model is
+    segments = [(segment.start, segment.end, segment.text) for segment in segments]
+    return segments, {"language": info.language, "duration": info.duration}
+
+
+def _serve_connection(model, conn):
+    with conn:
+        while True:
+            try:
+                request = conn.recv()
+                samples = np.frombuffer(conn.recv_bytes(), dtype=np.float32) if request.get("samples") else None
+            except (EOFError, OSError):
+                return
+            try:
+                reply = ("ok", *_transcribe(model, request, samples))
+            except Exception as e:
+                logger.exception("Transcription failed: %s", e)
+                reply = ("error", f"{type(e).__name__}: {e}")
+            try:
+                conn.send(reply)
+            except OSError:
+                # The worker timed out and closed its end
+                return
+
+
+def serve_inference(address: str, authkey: bytes, ready=None, threads: int = INFERENCE_THREADS,
+                    model_factory: Callable[..., Any] = load_whisper_model):
+    """
+    Loads the model once and serves transcriptions over a Unix socket,
+    one thread per connected API worker thread. Runs until killed.
+
+    Args:
+        address: Path of the Unix socket to listen on
+        authkey: Shared secret clients must present
+        ready: Optional multiprocessing.Event set once the model is loaded
+        threads: Transcriptions run in parallel on the shared weights
+    """
+    model = model_factory(num_workers=threads)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    logger.info("Inference process ready on %s with %s thread(s)", address, threads)
+    if ready is not None:
+        ready.set()
+    with listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # A client that fails the auth handshake shouldn't take the server down
+                logger.warning("Rejected inference connection: %s", e)
+                continue
+            threading.Thread(target=_serve_connection, args=(model, conn), daemon=True).start()
+
+
+class RemoteWhisperModel:
+    """
+    Stands in for WhisperModel in an API worker, forwarding transcribe()
+    to the inference process so every worker shares one copy of the
+    weights. Connections are pooled, one per concurrent caller. A call
+    that fails or gets no answer within `timeout` seconds closes its
+    connection rather than returning it to the pool, since a late reply
+    would be read as the answer to the next call.
+    """
+
+    def __init__(self, address: str, authkey: bytes, timeout: float = INFERENCE_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+        self._authkey = authkey
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio: Union[str, np.ndarray], **options):
+        """
+        Same call and result shape as WhisperModel.transcribe: an iterable
+        of segments with start, end and text, and info with language.
+        """
+        conn = self._acquire()
+        try:
+            if isinstance(audio, np.ndarray):
+                conn.send({"options": options, "samples": True})
+                conn.send_bytes(np.ascontiguousarray(audio, dtype=np.float32))
+            else:
+                conn.send({"options": options, "audio": audio})
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"The inference process did not answer within {self.timeout:g}s")
+            status, *result = conn.recv()
+        except BaseException:
+            # Dropped, timed out or interrupted mid-request; the connection's state is unknown
+            conn.close()
+            raise
+        self._release(conn)
+
+        if status == "error":
+            raise RuntimeError(f"Inference process error: {result[0]}")
+        segments, info = result
+        return (
+            [SimpleNamespace(start=start, end=end, text=text) for start, end, text in segments],
+            SimpleNamespace(**info),
+        )
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return Client(self.address, family="AF_UNIX", authkey=self._authkey)
+
+    def _release(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
@@ -0,0 +1,378 @@
+import bisect
+import re
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Canonical ingredient name -> other ways people say it. Every canonical
+# name also matches itself and its plural.
+INGREDIENTS: Dict[str, List[str]] = {
+    "all-purpose flour": ["all purpose flour", "ap flour", "plain flour"],
+    "flour": [], "bread flour": ["strong flour"], "cornstarch": ["corn starch", "cornflour", "corn flour"],
+    "baking powder": [], "baking soda": ["bicarb", "bicarbonate of soda"], "yeast": [],
+    "sugar": ["white sugar", "granulated sugar", "caster sugar"], "brown sugar": [],
+    "powdered sugar": ["icing sugar", "confectioners sugar"], "honey": [], "maple syrup": [],
+    "salt": ["kosher salt", "sea salt"], "black pepper": ["pepper", "ground pepper"],
+    "red pepper flakes": ["chili flakes", "chilli flakes", "crushed red pepper"], "paprika": [],
+    "smoked paprika": [], "cumin": ["ground cumin"], "turmeric": [], "cinnamon": [], "nutmeg": [],
+    "oregano": [], "thyme": [], "rosemary": [], "basil": [], "parsley": [],
+    "cilantro": ["coriander leaves", "fresh coriander"], "coriander": ["ground coriander"], "dill": [],
+    "mint": [], "bay leaf": ["bay leaves"], "chili powder": ["chilli powder"], "curry powder": [],
+    "garam masala": [], "gochujang": ["korean chili paste"], "garlic": ["garlic clove"],
+    "garlic powder": [], "onion": ["yellow onion", "white onion"], "onion powder": [],
+    "red onion": [], "shallot": [], "green onion": ["scallion", "spring onion"], "ginger": [],
+    "chili": ["chilli", "chile", "chili pepper"], "jalapeno": ["jalapeño"],
+    "bell pepper": ["capsicum", "red pepper", "green pepper"], "tomato": ["tomatoes"],
+    "cherry tomato": ["cherry tomatoes"], "tomato paste": ["tomato puree"], "tomato sauce": [],
+    "potato": ["potatoes"], "sweet potato": ["sweet potatoes"], "carrot": [], "celery": [],
+    "broccoli": [], "cauliflower": [], "spinach": [], "kale": [], "lettuce": [], "cabbage": [],
+    "zucchini": ["courgette"], "eggplant": ["aubergine"], "mushroom": [], "cucumber": [],
+    "avocado": [], "corn": ["sweetcorn", "sweet corn"], "peas": [], "green beans": [],
+    "chickpeas": ["garbanzo beans"], "black beans": [], "lentils": [], "rice": [], "pasta": [],
+    "spaghetti": [], "noodles": [], "bread": [], "breadcrumbs": ["bread crumbs"], "panko": [],
+    "tortilla": [], "egg": [], "egg yolk": [], "egg white": [], "butter": [],
+    "unsalted butter": [], "milk": ["whole milk"], "heavy cream": ["double cream", "whipping cream"],
+    "cream": [], "sour cream": [], "yogurt": ["yoghurt"], "greek yogurt": ["greek yoghurt"],
+    "cream cheese": [], "cheese": [], "parmesan": ["parmigiano", "parmigiano reggiano", "parm"],
+    "cheddar": [], "mozzarella": [], "feta": [], "olive oil": ["evoo", "extra virgin olive oil"],
+    "vegetable oil": ["canola oil", "neutral oil", "sunflower oil"], "sesame oil": [],
+    "coconut oil": [], "oil": [], "vinegar": [], "balsamic vinegar": ["balsamic"],
+    "rice vinegar": ["rice wine vinegar"], "soy sauce": ["soy", "soya sauce", "light soy"],
+    "dark soy sauce": ["dark soy"], "fish sauce": [], "oyster sauce": [],
+    "worcestershire sauce": ["worcestershire"], "hot sauce": [], "sriracha": [], "ketchup": [],
+    "mustard": [], "dijon mustard": ["dijon"], "mayonnaise": ["mayo"], "stock": [],
+    "chicken stock": ["chicken broth"], "beef stock": ["beef broth"],
+    "vegetable stock": ["vegetable broth", "veggie stock"], "broth": [], "water": [], "wine": [],
+    "white wine": [], "red wine": [], "lemon": [], "lemon juice": [], "lemon zest": [], "lime": [],
+    "lime juice": [], "orange": [], "apple": [], "banana": [], "berries": [], "strawberries": [],
+    "blueberries": [], "raisins": [], "chocolate": [], "chocolate chips": [],
+    "cocoa powder": ["cocoa"], "vanilla extract": ["vanilla", "vanilla essence"],
+    "peanut butter": [], "almonds": [], "walnuts": [], "peanuts": [], "sesame seeds": [],
+    "coconut milk": [], "chicken": [], "chicken breast": [], "chicken thighs": [], "beef": [],
+    "ground beef": ["minced beef", "beef mince"], "pork": [], "bacon": [], "sausage": [], "ham": [],
+    "lamb": [], "turkey": [], "salmon": [], "tuna": [], "shrimp": ["prawns", "prawn"], "tofu": [],
+}
+
+# Canonical unit -> aliases
+UNITS: Dict[str, List[str]] = {
+    "cup": ["cups", "c"],
+    "tbsp": ["tablespoons", "tablespoon", "tbs", "tbl", "tbsps"],
+    "tsp": ["teaspoons", "teaspoon", "tsps"],
+    "g": ["grams", "gram", "gr"],
+    "kg": ["kilograms", "kilogram", "kilos", "kilo"],
+    "ml": ["milliliters", "millilitres", "milliliter", "millilitre", "mls"],
+    "l": ["liters", "litres", "liter", "litre"],
+    "oz": ["ounces", "ounce"],
+    "fl oz": ["fluid ounces", "fluid ounce"],
+    "lb": ["pounds", "pound", "lbs"],
+    "pinch": ["pinches"],
+    "dash": ["dashes"],
+    "clove": ["cloves"],
+    "can": ["cans", "tins", "tin"],
+    "slice": ["slices"],
+    "handful": ["handfuls"],
+    "piece": ["pieces"],
+    "stick": ["sticks"],
+    "sprig": ["sprigs"],
+    "bunch": ["bunches"],
+}
+
+# Units spelled as words get a plural when the quantity is above one
+_COUNTABLE_UNITS = {"cup", "pinch", "dash", "clove", "can", "slice", "handful", "piece", "stick", "sprig", "bunch"}
+
+NUMBER_WORDS: Dict[str, float] = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "dozen": 12, "half": 0.5, "a half": 0.5,
+    "half a": 0.5, "half an": 0.5, "a quarter": 0.25, "quarter": 0.25, "a couple": 2, "a couple of": 2,
+    "couple": 2, "a few": 3, "one and a half": 1.5,
+}
+
+UNICODE_FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3, "⅛": 0.125}
+
+# Descriptive words allowed between an amount and the ingredient: "2 cups chopped fresh basil"
+MAX_DESCRIPTORS = 2
+_STOP_WORDS = {"seconds", "second", "secs", "minutes", "minute", "mins", "min", "hours", "hour", "hrs", "degrees"}
+
+# Words, numbers (1, 1/2, 1.5, 2-3, 1½) and the punctuation that ends a phrase
+_TOKEN_RE = re.compile(
+    r"\d+(?:\.\d+|/\d+)?(?:-\d+(?:\.\d+)?)?[½¼¾⅓⅔⅛]?|[½¼¾⅓⅔⅛]|[^\W\d_]+(?:['-][^\W\d_]+)*|[\n,.;:!?()]"
+)
+_NUMBER_RE = re.compile(r"^(\d+(?:\.\d+)?)?([½¼¾⅓⅔⅛])?(?:/(\d+))?(?:-\d+(?:\.\d+)?)?$")
+_BREAK_TOKENS = set("\n,.;:!?()")
+
+
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """Splits lowercased text into (token, offset) pairs."""
+    return [(match.group(), match.start()) for match in _TOKEN_RE.finditer(text.lower())]
+
+
+class TokenTrie:
+    """
+    Aho-Corasick automaton over word tokens.
+
+    Patterns are phrases ("olive oil", "extra virgin olive oil"), so a
+    single walk over a transcript's tokens finds every ingredient mention,
+    however many names and aliases are indexed.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        # Per node: children, failure link, (length, value) of the pattern
+        # ending here, and the nearest node down the failure chain with one
+        self._children: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[Tuple[int, str]]] = [None]
+        self._next_output: List[int] = [0]
+
+        for phrase, value in patterns.items():
+            words = [token for token, _ in tokenize(phrase)]
+            node = 0
+            for word in words:
+                child = self._children[node].get(word)
+                if child is None:
+                    child = len(self._children)
+                    self._children.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._next_output.append(0)
+                    self._children[node][word] = child
+                node = child
+            self._output[node] = (len(words), value)
+
+        queue = deque(self._children[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._children[node].items():
+                fail = self._fail[node]
+                while fail and word not in self._children[fail]:
+                    fail = self._fail[fail]
+                target = self._children[fail].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._next_output[child] = link if self._output[link] else self._next_output[link]
+                queue.append(child)
+
+    def find(self, words: List[str]) -> Iterator[Tuple[int, int, str]]:
+        """Yields (start, end, value) token spans of every match, overlaps included."""
+        children, fail, output, next_output = self._children, self._fail, self._output, self._next_output
+        node = 0
+        for index, word in enumerate(words):
+            while node and word not in children[node]:
+                node = fail[node]
+            node = children[node].get(word, 0)
+            match = node if output[node] else next_output[node]
+            while match:
+                length, value = output[match]
+                yield index + 1 - length, index + 1, value
+                match = next_output[match]
+
+    def find_longest(self, words: List[str]) -> List[Tuple[int, int, str]]:
+        """Matches with overlaps resolved leftmost-longest, in order."""
+        matches = sorted(self.find(words), key=lambda m: (m[0], m[0] - m[1]))
+        selected = []
+        end = 0
+        for match in matches:
+            if match[0] >= end:
+                selected.append(match)
+                end = match[1]
+        return selected
+
+
+@dataclass
+class Ingredient:
+    """One ingredient mention, normalized."""
+    name: str
+    quantity: Optional[float] = None
+    unit: Optional[str] = None
+
+    def display(self) -> str:
+        """Renders the mention for people, e.g. "1 1/2 cups all-purpose flour"."""
+        if self.quantity is None:
+            return self.name
+        name = self.name
+        if self.unit is None and self.quantity > 1:
+            name = _plural_name(name)
+        unit = self.unit
+        if unit in _COUNTABLE_UNITS and self.quantity > 1:
+            unit += "es" if unit.endswith(("ch", "sh")) else "s"
+        return " ".join(part for part in (format_quantity(self.quantity), unit, name) if part)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _plural(word: str) -> str:
+    if word.endswith(("s", "sh", "ch", "x")):
+        return word + "es"
+    if word.endswith("y") and word[-2:-1] not in "aeiou":
+        return word[:-1] + "ies"
+    if word.endswith("f"):
+        return word[:-1] + "ves"
+    return word + "s"
+
+
+def _plural_name(name: str) -> str:
+    """"egg" -> "eggs" for counted ingredients; names like "peas" stay as they are."""
+    if name.endswith("s"):
+        return name
+    irregular = name + "es"
+    return irregular if irregular in INGREDIENTS.get(name, []) else _plural(name)
+
+
+def _build_index() -> TokenTrie:
+    patterns = {}
+    for name, aliases in INGREDIENTS.items():
+        for phrase in [name] + aliases:
+            patterns.setdefault(_plural(phrase), name)
+    # Exact names win over another entry's plural form
+    for name, aliases in INGREDIENTS.items():
+        for phrase in [name] + aliases:
+            patterns[phrase] = name
+    return TokenTrie(patterns)
+
+
+INGREDIENT_INDEX = _build_index()
+_UNIT_LOOKUP = {alias: unit for unit, aliases in UNITS.items() for alias in [unit] + aliases}
+_NUMBER_PHRASES = sorted(((tuple(phrase.split()), value) for phrase, value in NUMBER_WORDS.items()),
+                         key=lambda item: -len(item[0]))
+
+
+def parse_quantity(text: str) -> Optional[float]:
+    """
+    Parses a quantity such as "2", "1.5", "1/2", "1 1/2", "1½", "2-3"
+    (the lower bound) or "a couple". Returns None if it isn't one.
+    """
+    words = [token for token, _ in tokenize(text)]
+    quantity, used = _quantity_before(words, len(words))
+    return quantity if used == len(words) else None
+
+
+def _number(token: str) -> Optional[float]:
+    if token in UNICODE_FRACTIONS:
+        return UNICODE_FRACTIONS[token]
+    match = _NUMBER_RE.match(token)
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    whole, fraction, denominator = match.groups()
+    if denominator:
+        if fraction or not whole or int(denominator) == 0:
+            return None
+        return float(whole) / int(denominator)
+    return (float(whole) if whole else 0.0) + UNICODE_FRACTIONS.get(fraction, 0.0)
+
+
+def _whole_number(token: str) -> Optional[float]:
+    value = NUMBER_WORDS.get(token)
+    if value is None:
+        value = _number(token)
+    return value if value is not None and value >= 1 and value == int(value) else None
+
+
+def _quantity_before(words: List[str], end: int, floor: int = 0) -> Tuple[Optional[float], int]:
+    """Reads a quantity ending just before words[end]. Returns it and the tokens it used."""
+    for phrase, value in _NUMBER_PHRASES:
+        start = end - len(phrase)
+        if start >= floor and tuple(words[start:end]) == phrase:
+            # "two and a half", "2 and a quarter": the whole number comes first
+            if phrase[0] == "a" and value < 1 and start - 2 >= floor and words[start - 1] == "and":
+                whole = _whole_number(words[start - 2])
+                if whole is not None:
+                    return whole + value, len(phrase) + 2
+            return value, len(phrase)
+    if end <= floor:
+        return None, 0
+    value = _number(words[end - 1])
+    if value is None:
+        return None, 0
+    # "1 1/2" and "1 ½" are one quantity
+    if end - 2 >= floor and value < 1:
+        whole = _number(words[end - 2])
+        if whole is not None and whole >= 1 and whole == int(whole):
+            return whole + value, 2
+    return value, 1
+
+
+def _amount_before(words: List[str], start: int, floor: int) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Reads "<quantity> <unit> of <descriptors>" backwards from an ingredient
+    mention at words[start], without crossing words[floor].
+    """
+    index = start
+    descriptors = 0
+    while index > floor:
+        word = words[index - 1]
+        if word == "of":
+            index -= 1
+        elif (word not in _BREAK_TOKENS and word not in _STOP_WORDS and word not in _UNIT_LOOKUP
+              and _number(word) is None and word not in ("a", "an") and descriptors < MAX_DESCRIPTORS
+              and not any(word == phrase[-1] for phrase, _ in _NUMBER_PHRASES)):
+            index -= 1
+            descriptors += 1
+        else:
+            break
+
+    unit = None
+    if index - 2 >= floor and f"{words[index - 2]} {words[index - 1]}" in _UNIT_LOOKUP:
+        unit = _UNIT_LOOKUP[f"{words[index - 2]} {words[index - 1]}"]
+        index -= 2
+    elif index - 1 >= floor and words[index - 1] in _UNIT_LOOKUP:
+        unit = _UNIT_LOOKUP[words[index - 1]]
+        index -= 1
+
+    quantity, _ = _quantity_before(words, index, floor)
+    if quantity is None and unit and index - 1 >= floor and words[index - 1] in ("a", "an"):
+        quantity = 1
+    if quantity is None:
+        # "you can add salt" has a unit-shaped word but no amount
+        return None, None
+    return quantity, unit
+
+
+def normalize_lines(lines: List[str]) -> List[List[Ingredient]]:
+    """
+    Normalizes every ingredient mention in a batch of lines.
+
+    All lines are tokenized and matched against the index in one pass;
+    amounts are read from the words just before each mention.
+
+    Returns:
+        For each line, its ingredient mentions in order
+    """
+    text = "\n".join(lines)
+    tokens = tokenize(text)
+    words = [token for token, _ in tokens]
+
+    # Line number of each token, from the offsets where lines start
+    line_starts = [0]
+    for line in lines[:-1]:
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    results: List[List[Ingredient]] = [[] for _ in lines]
+    previous_end = 0
+    for start, end, name in INGREDIENT_INDEX.find_longest(words):
+        quantity, unit = _amount_before(words, start, previous_end)
+        line = bisect.bisect_right(line_starts, tokens[start][1]) - 1
+        results[line].append(Ingredient(name, quantity, unit))
+        previous_end = end
+    return results
+
+
+def normalize_line(line: str) -> List[Ingredient]:
+    """Normalizes the ingredient mentions in one line."""
+    return normalize_lines([line])[0]
+
+
+def format_quantity(quantity: float) -> str:
+    """Formats 1.5 as "1 1/2", 0.25 as "1/4", 2.0 as "2"."""
+    whole = int(quantity)
+    remainder = quantity - whole
+    fraction = ""
+    for value, text in ((0.125, "1/8"), (0.25, "1/4"), (1 / 3, "1/3"), (0.5, "1/2"), (2 / 3, "2/3"), (0.75, "3/4")):
+        if abs(remainder - value) < 0.02:
+            fraction = text
+            break
+    else:
+        if remainder > 0.02:
+            return f"{quantity:g}"
+    if whole and fraction:
+        return f"{whole} {fraction}"
+    return fraction or str(whole)
@@ -0,0 +1,515 @@
+"""
+Queue of pipeline jobs shared by the HTTP front end and worker processes.
+
+The front end submits a job per video and serves its result; workers
+lease jobs, keep the lease alive with heartbeats while they run, and
+store the result. A lease that isn't renewed (the worker crashed or was
+scaled away) expires, and the job goes back to the queue for another
+worker, up to max_attempts times.
+
+Backends: "memory" (one process, for tests), "sqlite" (processes on one
+host) and "redis" (any Redis-compatible server, for several nodes).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+JOB_QUEUE = os.environ.get("JOB_QUEUE", "memory").lower()  # 'memory', 'sqlite' or 'redis'
+JOB_QUEUE_URL = os.environ.get("JOB_QUEUE_URL", "")  # SQLite file path or redis:// URL
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs are kept this long, so repeat requests for a video get its result
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "86400"))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class JobQueue(ABC):
+    """
+    Leased job queue. Every method is blocking and safe to call from
+    several threads.
+    """
+
+    def __init__(self, lease_seconds: float = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 result_ttl: float = JOB_RESULT_TTL):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+
+    @abstractmethod
+    def submit(self, payload: Dict[str, Any], key: Optional[str] = None) -> str:
+        """
+        Queues a job and returns its ID. While a job submitted with the
+        same key is pending, running or finished within result_ttl, its
+        ID is returned instead. A failed job's key can be submitted again.
+        """
+
+    @abstractmethod
+    def lease(self, worker_id: str) -> Optional[Job]:
+        """Claims the oldest pending job for lease_seconds, or returns None."""
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extends a lease. False if the worker no longer holds it."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Stores a job's result. False if the worker no longer holds the lease."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Records a failed attempt: the job is queued again while it has
+        attempts left, and marked failed after that.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Returns a job, or None if it is unknown or has expired."""
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Jobs pending or running."""
+
+    def close(self):
+        """Releases any resources held by the queue."""
+
+
+class MemoryJobQueue(JobQueue):
+    """Job queue for a single process."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, str] = {}
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, payload, key=None):
+        with self._lock:
+            self._expire()
+            existing = self._jobs.get(self._keys.get(key)) if key else None
+            if existing is not None and existing["status"] != FAILED:
+                return existing["id"]
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {"id": job_id, "payload": payload, "status": PENDING, "attempts": 0,
+                                  "worker": None, "expires_at": None, "result": None, "error": None}
+            if key:
+                self._keys[key] = job_id
+            self._pending.append(job_id)
+            return job_id
+
+    def lease(self, worker_id):
+        with self._lock:
+            self._expire()
+            while self._pending:
+                job = self._jobs.get(self._pending.popleft())
+                if job is None or job["status"] != PENDING:
+                    continue
+                job.update(status=RUNNING, worker=worker_id, attempts=job["attempts"] + 1,
+                           expires_at=time.time() + self.lease_seconds)
+                return self._to_job(job)
+            return None
+
+    def heartbeat(self, job_id, worker_id):
+        with self._lock:
+            job = self._held(job_id, worker_id)
+            if job is None:
+                return False
+            job["expires_at"] = time.time() + self.lease_seconds
+            return True
+
+    def complete(self, job_id, worker_id, result):
+        with self._lock:
+            job = self._held(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(status=DONE, result=result, worker=None, expires_at=time.time() + self.result_ttl)
+            return True
+
+    def fail(self, job_id, worker_id, error):
+        with self._lock:
+            job = self._held(job_id, worker_id)
+            if job is None:
+                return False
+            self._retry_or_fail(job, error)
+            return True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._to_job(job) if job is not None else None
+
+    def depth(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["status"] in (PENDING, RUNNING))
+
+    def _held(self, job_id, worker_id):
+        job = self._jobs.get(job_id)
+        if job is None or job["status"] != RUNNING or job["worker"] != worker_id:
+            return None
+        return job
+
+    def _retry_or_fail(self, job, error):
+        job.update(worker=None, error=error)
+        if job["attempts"] < self.max_attempts:
+            job.update(status=PENDING, expires_at=None)
+            self._pending.append(job["id"])
+        else:
+            job.update(status=FAILED, expires_at=time.time() + self.result_ttl)
+
+    def _expire(self):
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if job["expires_at"] is None or job["expires_at"] > now:
+                continue
+            if job["status"] == RUNNING:
+                self._retry_or_fail(job, "Lease expired")
+            else:
+                del self._jobs[job["id"]]
+
+    @staticmethod
+    def _to_job(job):
+        return Job(job["id"], job["payload"], job["status"], job["attempts"], job["result"], job["error"])
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue in a SQLite file, shared by API and worker processes on one
+    host. Leases are taken in IMMEDIATE transactions, so two processes
+    never claim the same job.
+    """
+
+    def __init__(self, path: str, **options):
+        super().__init__(**options)
+        self.path = path
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                key TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                expires_at REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key);
+        """)
+
+    def _transaction(self, fn, *args):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(*args)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def _expire(self):
+        now = time.time()
+        self._db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND expires_at <= ?", (DONE, FAILED, now))
+        self._db.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, expires_at = NULL, error = 'Lease expired' "
+            "WHERE status = ? AND expires_at <= ? AND attempts < ?",
+            (PENDING, RUNNING, now, self.max_attempts)
+        )
+        self._db.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, expires_at = ?, error = 'Lease expired' "
+            "WHERE status = ? AND expires_at <= ?",
+            (FAILED, now + self.result_ttl, RUNNING, now)
+        )
+
+    def submit(self, payload, key=None):
+        def submit():
+            self._expire()
+            if key:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE key = ? AND status != ? ORDER BY created_at DESC LIMIT 1",
+                    (key, FAILED)
+                ).fetchone()
+                if row:
+                    return row[0]
+            job_id = uuid.uuid4().hex
+            self._db.execute(
+                "INSERT INTO jobs (id, key, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, key, json.dumps(payload), PENDING, time.time())
+            )
+            return job_id
+        return self._transaction(submit)
+
+    def lease(self, worker_id):
+        def lease():
+            self._expire()
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, expires_at = ? WHERE id = ?",
+                (RUNNING, worker_id, time.time() + self.lease_seconds, row[0])
+            )
+            return self._get(row[0])
+        return self._transaction(lease)
+
+    def heartbeat(self, job_id, worker_id):
+        return self._transaction(
+            self._update_held, job_id, worker_id, "expires_at = ?", (time.time() + self.lease_seconds,)
+        )
+
+    def complete(self, job_id, worker_id, result):
+        return self._transaction(
+            self._update_held, job_id, worker_id, "status = ?, result = ?, worker = NULL, expires_at = ?",
+            (DONE, json.dumps(result), time.time() + self.result_ttl)
+        )
+
+    def fail(self, job_id, worker_id, error):
+        def fail():
+            job = self._get(job_id)
+            if job is None or not self._holds(job_id, worker_id):
+                return False
+            if job.attempts < self.max_attempts:
+                values = (PENDING, None, error)
+            else:
+                values = (FAILED, time.time() + self.result_ttl, error)
+            self._db.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, expires_at = ?, error = ? WHERE id = ?", (*values, job_id)
+            )
+            return True
+        return self._transaction(fail)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._get(job_id)
+
+    def depth(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (PENDING, RUNNING)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _holds(self, job_id, worker_id):
+        return self._db.execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND status = ? AND worker = ?", (job_id, RUNNING, worker_id)
+        ).fetchone() is not None
+
+    def _update_held(self, job_id, worker_id, assignments, values):
+        cursor = self._db.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND status = ? AND worker = ?",
+            (*values, job_id, RUNNING, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def _get(self, job_id):
+        row = self._db.execute(
+            "SELECT id, payload, status, attempts, result, error FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return Job(row[0], json.loads(row[1]), row[2], row[3], json.loads(row[4]) if row[4] else None, row[5])
+
+
+# Queues a job unless the key (KEYS[1], '' for none) belongs to a live job; returns the job's ID.
+# KEYS: key name, pending list. ARGV: new job ID, payload, now, result ttl, prefix
+_SUBMIT_SCRIPT = """
+if KEYS[1] ~= '' then
+    local existing = redis.call('GET', KEYS[1])
+    if existing then
+        local status = redis.call('HGET', ARGV[5] .. 'job:' .. existing, 'status')
+        if status and status ~= 'failed' then
+            return existing
+        end
+    end
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[4])
+end
+redis.call('HSET', ARGV[5] .. 'job:' .. ARGV[1], 'payload', ARGV[2], 'status', 'pending', 'attempts', 0,
+           'worker', '', 'created_at', ARGV[3])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+return ARGV[1]
+"""
+
+# Reclaims expired leases, then moves the oldest pending job to running; returns its ID.
+# KEYS: pending list, running sorted set. ARGV: now, lease seconds, worker, max attempts, result ttl, prefix
+_LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    local job = ARGV[6] .. 'job:' .. id
+    redis.call('ZREM', KEYS[2], id)
+    if redis.call('HGET', job, 'status') == 'running' then
+        redis.call('HSET', job, 'worker', '', 'error', 'Lease expired')
+        if tonumber(redis.call('HGET', job, 'attempts')) < tonumber(ARGV[4]) then
+            redis.call('HSET', job, 'status', 'pending')
+            redis.call('LPUSH', KEYS[1], id)
+        else
+            redis.call('HSET', job, 'status', 'failed')
+            redis.call('EXPIRE', job, ARGV[5])
+        end
+    end
+end
+while true do
+    local id = redis.call('RPOP', KEYS[1])
+    if not id then
+        return nil
+    end
+    local job = ARGV[6] .. 'job:' .. id
+    if redis.call('HGET', job, 'status') == 'pending' then
+        redis.call('HSET', job, 'status', 'running', 'worker', ARGV[3])
+        redis.call('HINCRBY', job, 'attempts', 1)
+        redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[2]), id)
+        return id
+    end
+end
+"""
+
+# Acts on a job if the worker still holds its lease; returns 1 if it did.
+# KEYS: job hash, running sorted set, pending list.
+# ARGV: job ID, worker, action ('extend', 'done', 'fail'), now, lease seconds, max attempts, result ttl, data
+_UPDATE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'running' or redis.call('HGET', KEYS[1], 'worker') ~= ARGV[2] then
+    return 0
+end
+if ARGV[3] == 'extend' then
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[4]) + tonumber(ARGV[5]), ARGV[1])
+    return 1
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if ARGV[3] == 'done' then
+    redis.call('HSET', KEYS[1], 'status', 'done', 'worker', '', 'result', ARGV[8])
+elseif tonumber(redis.call('HGET', KEYS[1], 'attempts')) < tonumber(ARGV[6]) then
+    redis.call('HSET', KEYS[1], 'status', 'pending', 'worker', '', 'error', ARGV[8])
+    redis.call('LPUSH', KEYS[3], ARGV[1])
+    return 1
+else
+    redis.call('HSET', KEYS[1], 'status', 'failed', 'worker', '', 'error', ARGV[8])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+return 1
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Job queue on a Redis-compatible server, shared by every node. Each job
+    is a hash; pending IDs are a list and running ones a sorted set
+    scored by lease expiry. Every state change runs as a Lua script, so
+    it is atomic across workers. Job keys are built inside the scripts,
+    so a single server (or a primary with replicas) is needed, not a
+    cluster.
+    """
+
+    def __init__(self, url: str, prefix: str = "mealbot:", client=None, **options):
+        super().__init__(**options)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("JOB_QUEUE=redis needs the redis package: pip install redis")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self._redis = client
+        self.prefix = prefix
+        self._pending_key = prefix + "pending"
+        self._running_key = prefix + "running"
+        self._submit_script = client.register_script(_SUBMIT_SCRIPT)
+        self._lease_script = client.register_script(_LEASE_SCRIPT)
+        self._update_script = client.register_script(_UPDATE_SCRIPT)
+
+    def _job_key(self, job_id):
+        return f"{self.prefix}job:{job_id}"
+
+    def submit(self, payload, key=None):
+        return self._submit_script(
+            keys=[f"{self.prefix}key:{key}" if key else "", self._pending_key],
+            args=[uuid.uuid4().hex, json.dumps(payload), time.time(), int(self.result_ttl), self.prefix]
+        )
+
+    def lease(self, worker_id):
+        job_id = self._lease_script(
+            keys=[self._pending_key, self._running_key],
+            args=[time.time(), self.lease_seconds, worker_id, self.max_attempts, int(self.result_ttl), self.prefix]
+        )
+        return self.get(job_id) if job_id else None
+
+    def heartbeat(self, job_id, worker_id):
+        return self._update(job_id, worker_id, "extend")
+
+    def complete(self, job_id, worker_id, result):
+        return self._update(job_id, worker_id, "done", json.dumps(result))
+
+    def fail(self, job_id, worker_id, error):
+        return self._update(job_id, worker_id, "fail", error)
+
+    def get(self, job_id):
+        fields = self._redis.hgetall(self._job_key(job_id))
+        if not fields:
+            return None
+        return Job(
+            job_id, json.loads(fields["payload"]), fields["status"], int(fields["attempts"]),
+            json.loads(fields["result"]) if fields.get("result") else None, fields.get("error") or None
+        )
+
+    def depth(self):
+        return self._redis.llen(self._pending_key) + self._redis.zcard(self._running_key)
+
+    def close(self):
+        self._redis.close()
+
+    def _update(self, job_id, worker_id, action, data=""):
+        return bool(self._update_script(
+            keys=[self._job_key(job_id), self._running_key, self._pending_key],
+            args=[job_id, worker_id, action, time.time(), self.lease_seconds, self.max_attempts,
+                  int(self.result_ttl), data]
+        ))
+
+
+def create_job_queue(backend: str = JOB_QUEUE, url: str = JOB_QUEUE_URL) -> JobQueue:
+    """
+    Builds the configured job queue.
+
+    Args:
+        backend: 'memory', 'sqlite' or 'redis'
+        url: Database path for 'sqlite', server URL for 'redis'
+    """
+    if backend == "memory":
+        return MemoryJobQueue()
+    if backend == "sqlite":
+        return SQLiteJobQueue(url or os.path.join("data", "jobs.db"))
+    if backend == "redis":
+        return RedisJobQueue(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown JOB_QUEUE backend: {backend}")
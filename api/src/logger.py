@@ -0,0 +1,143 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()  # 'json' or 'text'
+LOG_FILE = os.environ.get("LOG_FILE", "")  # Cloud Run collects stdout, so no file by default
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", "5"))
+
+# Structured fields attached to every record logged inside a log_context() block
+CONTEXT_FIELDS = ("request_id", "url", "stage")
+_context = {field: contextvars.ContextVar(field, default=None) for field in CONTEXT_FIELDS}
+
+# Extra fields copied into JSON records when passed via `extra=`
+EXTRA_FIELDS = CONTEXT_FIELDS + ("latency_ms",)
+
+# Log arguments of these types can't change before the listener thread formats them
+IMMUTABLE_ARG_TYPES = (str, int, float, bytes, type(None))
+
+_listener = None
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attaches structured fields (request_id, url, stage) to every record
+    logged in this block.
+    """
+    tokens = [(_context[name], _context[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def get_log_context(field: str):
+    """
+    Returns the current value of a structured logging field.
+    """
+    return _context[field].get()
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the current log_context() fields onto each record.
+    """
+    def filter(self, record):
+        for field, var in _context.items():
+            if getattr(record, field, None) is None:
+                setattr(record, field, var.get())
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread,
+    so %-style arguments are only formatted when a handler emits the record.
+    Records with a mutable argument (a list, a dict, an exception) are
+    formatted on the calling thread instead, so they log the values the
+    arguments had at the call.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        # A mapping of named arguments is itself mutable
+        lazy = isinstance(record.args, tuple) and all(isinstance(arg, IMMUTABLE_ARG_TYPES) for arg in record.args)
+        if record.args and not lazy:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+    """
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logger(name: str = "experience_api") -> logging.Logger:
+    """
+    Returns the API logger, configuring the queue-based pipeline on first use.
+    Handlers run on a background listener thread so slow stdout or disk
+    writes never block request handling.
+    """
+    global _listener
+
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+
+    log_level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
+    logger.setLevel(log_level)
+
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+
+    if LOG_FILE:
+        log_dir = os.path.dirname(LOG_FILE)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    return logger
@@ -1,43 +1,278 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from functools import partial
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
-from faster_whisper import WhisperModel # Import WhisperModel from faster_whisper
+from typing import AsyncIterator, Optional
 
-from .video_pipeline import process_video_url, download_audio, transcribe_audio, save_transcript_to_json # Import individual functions
+from .video_pipeline import process_video_url, index_transcript, download_audio, transcribe_audio, save_transcript_to_json, SAVE_BASE_DIR # Import individual functions
+from .search_index import SearchIndex
+from .fingerprint import FINGERPRINT_INDEX_PATH, FingerprintIndex
+from .inference import INFERENCE_ADDRESS, INFERENCE_AUTHKEY, RemoteWhisperModel, load_whisper_model
+from .metrics import metrics
+from .responses import CompressionMiddleware, FastJSONResponse, build_payload, parse_fields, project
+from .idempotency import IdempotencyKeyConflict, IdempotentJobs
+from .job_queue import DONE, FAILED, JOB_QUEUE, create_job_queue
+from .prefetch import Prefetcher
+from .profiling import authorized, profile_path, requested_profile_id, run_profiled, valid_profile_id
+from .logger import setup_logger, log_context
+
+logger = setup_logger()
+
+SEARCH_INDEX_PATH = os.environ.get("SEARCH_INDEX_PATH", os.path.join(SAVE_BASE_DIR, "search.db"))
+# 'all' runs the pipeline in-process; 'frontend' queues jobs for src.worker processes
+API_MODE = os.environ.get("API_MODE", "all").lower()
+# Seconds a frontend /process-url waits for its job before answering 202 with a /jobs URL to poll
+JOB_WAIT_SECONDS = float(os.environ.get("JOB_WAIT_SECONDS", "20"))
+JOB_POLL_INTERVAL = 0.25
+
+# Fields /process-url can return; `fields=` picks a subset
+RESPONSE_FIELDS = (
+    "url", "source", "recipe", "transcript",
+    "transcript.text", "transcript.language", "transcript.segments", "transcript.reused_from",
+)
+# Segment timings are only needed by clients that ask for them
+DEFAULT_RESPONSE_FIELDS = ["url", "source", "recipe", "transcript.text", "transcript.language", "transcript.reused_from"]
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    # Load the Whisper model on startup
-    print("Loading Faster Whisper model...")
-    # Use "tiny" model, device "cpu", and compute_type "int8" for efficiency
-    app.state.whisper_model = WhisperModel("tiny", device="cpu", compute_type="int8")
-    print("Faster Whisper model loaded.")
+    app.state.whisper_model = None
+    app.state.fingerprint_index = None
+    app.state.job_queue = None
+    if API_MODE == "frontend":
+        if JOB_QUEUE == "memory":
+            # Workers are other processes and would never see a job queued in this one's memory
+            raise RuntimeError("API_MODE=frontend needs a shared JOB_QUEUE: sqlite or redis")
+        # Workers hold the model and the fingerprint index; this node only queues and answers
+        app.state.job_queue = create_job_queue()
+        # Job IDs whose transcripts were already added to the search index
+        app.state.indexed_jobs = OrderedDict()
+        metrics.gauge("job_queue_depth", "Jobs pending or running in the shared queue", fn=app.state.job_queue.depth)
+        logger.info("Front end mode: jobs go to the %s queue", type(app.state.job_queue).__name__)
+    elif INFERENCE_ADDRESS:
+        # Started by src.serve: one inference process holds the model for every worker
+        app.state.whisper_model = RemoteWhisperModel(INFERENCE_ADDRESS, bytes.fromhex(INFERENCE_AUTHKEY))
+        logger.info("Using the shared Whisper model at %s", INFERENCE_ADDRESS)
+    else:
+        # Load the Whisper model on startup
+        logger.info("Loading Faster Whisper model...")
+        app.state.whisper_model = load_whisper_model()
+        logger.info("Faster Whisper model loaded.")
+    app.state.search_index = SearchIndex(SEARCH_INDEX_PATH)
+    # Pick up transcripts saved before the index existed
+    backfilled = app.state.search_index.backfill(SAVE_BASE_DIR)
+    logger.info("Search index ready with %s transcripts (%s backfilled)", app.state.search_index.count(), backfilled)
+    if API_MODE != "frontend":
+        app.state.fingerprint_index = FingerprintIndex(FINGERPRINT_INDEX_PATH)
+        logger.info("Fingerprint index ready with %s clips", app.state.fingerprint_index.count())
+    app.state.jobs = IdempotentJobs()
+    # Workers have their own data directories, so a front end has nothing to warm
+    app.state.prefetcher = Prefetcher() if API_MODE != "frontend" else None
     yield
+    if app.state.prefetcher is not None:
+        app.state.prefetcher.close()
+    app.state.search_index.close()
+    if app.state.fingerprint_index is not None:
+        app.state.fingerprint_index.close()
+    if app.state.job_queue is not None:
+        app.state.job_queue.close()
+    if isinstance(app.state.whisper_model, RemoteWhisperModel):
+        app.state.whisper_model.close()
     # Clean up on shutdown (if any)
-    print("Application shutdown.")
+    logger.info("Application shutdown.")
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """
+    Tags every log record for a request with its ID (taken from the bot's
+    X-Request-ID header when present) and logs the request latency.
+    """
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    with log_context(request_id=request_id):
+        started = time.perf_counter()
+        response = await call_next(request)
+        logger.info("%s %s -> %s", request.method, request.url.path, response.status_code, extra={
+            "stage": "response",
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+        })
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+# Added last so it wraps everything and compresses the final body
+app.add_middleware(CompressionMiddleware)
 
 class URLItem(BaseModel):
     video_url: str
     source: str
 
 @app.post("/process-url")
-async def process_url_endpoint(item: URLItem):
+async def process_url_endpoint(item: URLItem, fields: Optional[str] = Query(None, max_length=300),
+                               idempotency_key: Optional[str] = Header(None, max_length=200),
+                               x_profile: Optional[str] = Header(None, max_length=200)):
     """
-    Accepts a URL string, downloads and transcribes the content.
+    Accepts a URL string, downloads and transcribes the content, and
+    extracts the recipe from the transcript.
+
+    `fields` is a comma-separated subset of RESPONSE_FIELDS, e.g.
+    "recipe" or "transcript.text"; without it the segment list is left out.
+
+    A request repeating the Idempotency-Key header of an earlier one gets
+    that request's job, still running or finished, instead of a new one.
+    Keys are tracked per worker; a retry that lands on another worker
+    waits on the video's pipeline lock and is answered from its saved
+    results instead.
+
+    With API_MODE=frontend the video is queued for a worker instead, once
+    per URL, and the response waits up to JOB_WAIT_SECONDS for the result.
+    A job still running then is answered with 202 and a Location header
+    pointing at GET /jobs/{job_id}.
+
+    With an X-Profile header matching PROFILE_TOKEN, the pipeline run is
+    sampled and its profile saved for GET /profiles/{id}; the ID is
+    returned in X-Profile-ID. Only in-process runs are profiled, not
+    queued jobs or requests that join another request's job.
     """
-    url = item.url
+    url = item.video_url
     if not url:
         raise HTTPException(status_code=400, detail="URL cannot be empty")
+    try:
+        selected = parse_fields(fields, RESPONSE_FIELDS) or DEFAULT_RESPONSE_FIELDS
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if app.state.job_queue is not None:
+        job_id = await run_in_threadpool(app.state.job_queue.submit, {"url": url, "source": item.source}, url)
+        with log_context(url=url):
+            return await job_response(job_id, selected, wait=JOB_WAIT_SECONDS)
 
+    profile_id = requested_profile_id(x_profile)
+    headers = {"X-Profile-ID": profile_id} if profile_id else None
     try:
-        # Pass the pre-loaded model to the video pipeline
-        transcript = process_video_url(url, app.state.whisper_model)
-        return {"url": url, "transcript": transcript}
+        # Pass the pre-loaded model to the video pipeline. The pipeline blocks
+        # for the whole download and transcription, so keep it off the event loop.
+        def run_pipeline():
+            pipeline = partial(
+                process_video_url, url, app.state.whisper_model, app.state.search_index, app.state.fingerprint_index
+            )
+            if profile_id:
+                pipeline = partial(run_profiled, profile_id, pipeline)
+            return run_in_threadpool(pipeline)
+
+        with log_context(url=url):
+            if idempotency_key:
+                result = await app.state.jobs.run(idempotency_key, url, run_pipeline)
+            else:
+                result = await run_pipeline()
+        payload = build_payload(url, result)
+        # Returned as a response directly, skipping FastAPI's jsonable_encoder pass over every segment
+        return FastJSONResponse(project(payload, selected), headers=headers)
+    except IdempotencyKeyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing video: {e}")
+        logger.exception("Error processing video: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error processing video: {e}", headers=headers)
+
+@app.post("/prefetch", status_code=202)
+async def prefetch_endpoint(item: URLItem):
+    """
+    Probes a URL and fetches its subtitles in the background, at low
+    priority, so that a /process-url for it that follows skips the
+    extractor round trips. Answers at once; the status is "queued", or
+    "skipped" when the URL is already queued or the backlog is full.
+    """
+    if not item.video_url:
+        raise HTTPException(status_code=400, detail="URL cannot be empty")
+    queued = app.state.prefetcher is not None and app.state.prefetcher.submit(item.video_url)
+    return {"status": "queued" if queued else "skipped"}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile: Optional[str] = Header(None, max_length=200)):
+    """
+    A saved pipeline profile in the folded stack format, for flamegraph.pl
+    or speedscope. Needs the same X-Profile header as the profiled request.
+    """
+    if not authorized(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+    path = profile_path(profile_id) if valid_profile_id(profile_id) else None
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=f"{profile_id}.folded")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, fields: Optional[str] = Query(None, max_length=300)):
+    """
+    The result of a job queued by /process-url in front end mode: 200 with
+    the same body /process-url returns, 202 while it is pending or running,
+    500 if it failed and 404 once its result has expired.
+    """
+    if app.state.job_queue is None:
+        raise HTTPException(status_code=404, detail="Jobs are only queued with API_MODE=frontend")
+    try:
+        selected = parse_fields(fields, RESPONSE_FIELDS) or DEFAULT_RESPONSE_FIELDS
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await job_response(job_id, selected)
+
+async def job_response(job_id: str, selected, wait: float = 0):
+    """
+    Answers for a queued job, polling the queue for up to wait seconds
+    while it hasn't finished.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        job = await run_in_threadpool(app.state.job_queue.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found or expired")
+        if job.status == DONE:
+            await run_in_threadpool(index_job_result, job)
+            return FastJSONResponse(project(job.result, selected))
+        if job.status == FAILED:
+            logger.error("Job %s failed: %s", job_id, job.error)
+            raise HTTPException(status_code=500, detail=f"Error processing video: {job.error}")
+        if time.monotonic() >= deadline:
+            return JSONResponse(
+                {"job_id": job_id, "status": job.status}, status_code=202, headers={"Location": f"/jobs/{job_id}"}
+            )
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+def index_job_result(job, max_remembered: int = 1000):
+    """Adds a worker's transcript to this node's search index, once per job."""
+    if job.id in app.state.indexed_jobs:
+        return
+    result = job.result
+    transcript = dict(result["transcript"], url=result["url"], source=result["source"])
+    index_transcript(app.state.search_index, result.get("run_id") or job.id, transcript, result["recipe"])
+    app.state.indexed_jobs[job.id] = True
+    if len(app.state.indexed_jobs) > max_remembered:
+        app.state.indexed_jobs.popitem(last=False)
+
+@app.get("/search")
+def search_transcripts(q: str = Query(..., max_length=200), limit: int = Query(10, ge=1, le=50)):
+    """
+    Ranked full-text search over processed transcripts, their titles and
+    ingredients.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    started = time.perf_counter()
+    results = app.state.search_index.search(q, limit)
+    took_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("Search returned %s results", len(results), extra={"stage": "search", "latency_ms": took_ms})
+    return {"query": q, "results": results, "took_ms": took_ms}
+
+@app.get("/metrics")
+async def serve_metrics():
+    """Prometheus metrics, including the fingerprint match rate and Whisper time saved."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/")
 async def read_root():
@@ -0,0 +1,62 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .logger import setup_logger
+from .metrics import metrics
+from .video_pipeline import prefetch_video
+
+logger = setup_logger()
+
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "2"))
+# URLs waiting beyond this are turned away; a prefetch is only worth it ahead of the request
+PREFETCH_MAX_PENDING = int(os.environ.get("PREFETCH_MAX_PENDING", "50"))
+# Niceness of prefetch threads, so they yield the CPU to real requests
+PREFETCH_NICE = int(os.environ.get("PREFETCH_NICE", "10"))
+
+prefetches = metrics.counter("prefetch_requests_total", "Prefetch requests, by whether they were queued")
+
+
+def _lower_priority():
+    try:
+        # Linux schedules threads individually, so this renices only the prefetch thread
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICE)
+    except (AttributeError, OSError) as e:
+        logger.warning("Could not lower the prefetch thread's priority: %s", e)
+
+
+class Prefetcher:
+    """
+    Runs prefetch_video in the background on a few low-priority threads,
+    at most once at a time per URL.
+    """
+
+    def __init__(self, workers: int = PREFETCH_WORKERS, max_pending: int = PREFETCH_MAX_PENDING):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="prefetch", initializer=_lower_priority)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, url: str) -> bool:
+        """Queues a URL. False if it is already queued or too many are waiting."""
+        with self._lock:
+            if url in self._pending or len(self._pending) >= self.max_pending:
+                prefetches.inc(result="skipped")
+                return False
+            self._pending.add(url)
+        prefetches.inc(result="queued")
+        self._executor.submit(self._run, url)
+        return True
+
+    def _run(self, url: str):
+        try:
+            prefetch_video(url)
+        except Exception as e:
+            # The request proper will run into the same problem and report it
+            logger.warning("Prefetch of %s failed: %s", url, e)
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,136 @@
+"""
+Opt-in sampling profiles of single pipeline runs.
+
+A request sent with `X-Profile: <PROFILE_TOKEN>` has its pipeline run
+sampled: a background thread records the stack of the thread running it
+every PROFILE_INTERVAL seconds. Stacks are written in the folded format
+that flamegraph.pl and speedscope read, one file per request ID. Sampling
+wall-clock stacks shows time waiting on yt-dlp's network calls, ffmpeg
+and CTranslate2 as well as time in Python. Other requests only pay for
+the header check.
+"""
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Optional
+
+from .logger import get_log_context, setup_logger
+
+logger = setup_logger()
+
+# Profiling is off unless a token is set; requests must send it in X-Profile
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join("data", "profiles"))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+# Oldest profiles are deleted beyond this many
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "100"))
+
+# Request IDs come from a client header, so only these become file names
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def valid_profile_id(profile_id: Optional[str]) -> bool:
+    return bool(profile_id) and _PROFILE_ID.match(profile_id) is not None
+
+
+def authorized(token: Optional[str]) -> bool:
+    """Whether an X-Profile header value matches PROFILE_TOKEN. Always False while profiling is off."""
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def requested_profile_id(token: Optional[str]) -> Optional[str]:
+    """
+    The ID to save the current request's profile under, or None if it
+    shouldn't be profiled. That is the request ID when it makes a safe
+    file name, a new ID otherwise.
+    """
+    if not authorized(token):
+        return None
+    request_id = get_log_context("request_id")
+    return request_id if valid_profile_id(request_id) else uuid.uuid4().hex[:12]
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename.replace(os.sep, "/").rsplit("/", 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack at a fixed interval from a background
+    thread, counting identical stacks. Unlike cProfile it doesn't hook
+    every call, so the profiled code runs at nearly full speed.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Stacks in the folded format: root-first frames joined by ';', then a sample count."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _prune():
+    profiles = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".folded")),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:max(0, len(profiles) - PROFILE_MAX_FILES)]:
+        os.remove(entry.path)
+
+
+def run_profiled(profile_id: str, fn: Callable[[], Any]) -> Any:
+    """
+    Calls fn() on this thread while sampling it, and saves the profile
+    under profile_id, whether or not fn raises.
+    """
+    profiler = SamplingProfiler(threading.get_ident())
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        return fn()
+    finally:
+        profiler.stop()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(profile_path(profile_id), "w", encoding="utf-8") as f:
+                f.write(profiler.folded())
+            _prune()
+            logger.info("Saved profile %s: %s samples", profile_id, profiler.samples, extra={
+                "stage": "profile", "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+        except OSError as e:
+            logger.error("Could not save profile %s: %s", profile_id, e)
@@ -0,0 +1,156 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from .captions import parse_captions
+from .ingredient_normalizer import Ingredient, NUMBER_WORDS, normalize_lines
+
+# Verbs that make a sentence a cooking step rather than chatter
+COOKING_VERBS = [
+    "add", "bake", "beat", "blend", "boil", "bring", "chop", "combine", "cook", "cover", "cut", "dice",
+    "drain", "drizzle", "fold", "fry", "garnish", "grate", "grill", "heat", "knead", "marinate", "mash",
+    "melt", "mince", "mix", "place", "pour", "preheat", "put", "reduce", "remove", "roast", "roll",
+    "saute", "sauté", "season", "serve", "simmer", "slice", "spread", "sprinkle", "stir", "toss",
+    "transfer", "whisk",
+]
+
+# Words that open a new step even when the speaker doesn't pause
+STEP_CUES = ["first", "then", "next", "now", "after that", "once", "finally", "lastly", "meanwhile"]
+
+# Seconds of silence between segments that start a new step
+STEP_GAP = 1.5
+MAX_STEPS = 15
+MAX_STEP_LENGTH = 200
+
+
+def _alternation(words: List[str]) -> str:
+    # Longest first so "after that" wins over a shorter entry it starts with
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# Compiled once at import: extracting a recipe is one pass of the ingredient
+# index plus a handful of regex scans
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_VERB_RE = re.compile(rf"\b(?:{_alternation(COOKING_VERBS)})\b")
+_CUE_RE = re.compile(rf"^(?:{_alternation(STEP_CUES)})\b")
+_DURATION = r"(?P<amount>\d+(?:\s*(?:-|to)\s*\d+)?|" + _alternation(list(NUMBER_WORDS)) + r")\s*(?P<unit>minutes?|mins?|hours?|hrs?)\b"
+_PREP_TIME_RE = re.compile(rf"\b(?:prep|takes?|ready in|in just|in about|in under)\b[^.!?]{{0,30}}?{_DURATION}")
+_COOK_TIME_RE = re.compile(rf"\b(?:bake|cook|simmer|roast|fry|boil|grill|air fry)\b[^.!?]{{0,30}}?\bfor\s+(?:about\s+)?{_DURATION}")
+_SERVINGS_RE = re.compile(r"\b(?:serves|feeds|servings?|makes|enough for)\s+(?:about\s+)?(?P<count>\d+|" + _alternation(list(NUMBER_WORDS)) + r")\b")
+_TITLE_RE = re.compile(
+    r"\b(?:making|make|recipe for|how to make|cooking)\s+(?:a |an |some |the |my |this |these |our )?"
+    r"(?P<title>[a-z][a-z' -]{2,40}?)(?=\s+(?:today|with|that|which|for|in)\b|[.,!?]|$)"
+)
+
+
+def extract_ingredients(sentences: List[str]) -> List[Ingredient]:
+    """
+    Finds the ingredients mentioned across a transcript's sentences,
+    normalized, with the quantity and unit spoken just before them.
+    """
+    found: Dict[str, Ingredient] = {}
+    for mentions in normalize_lines(sentences):
+        for ingredient in mentions:
+            # Keep the first mention, unless only a later one says how much
+            current = found.get(ingredient.name)
+            if current is None or (current.quantity is None and ingredient.quantity is not None):
+                found[ingredient.name] = ingredient
+
+    # A bare "butter" is usually the "unsalted butter" measured elsewhere
+    names = list(found)
+    for name in names:
+        if found[name].quantity is None and any(other != name and f" {name}" in f" {other}" for other in names):
+            del found[name]
+    return list(found.values())
+
+
+def segment_steps(segments: List[Dict[str, Any]]) -> List[str]:
+    """
+    Groups transcript segments into instruction steps.
+    A new step starts after a pause of STEP_GAP seconds, at a cue word
+    ("then", "next", ...) or at a sentence ending; steps without a
+    cooking verb are dropped as chatter.
+    """
+    steps: List[List[str]] = []
+    previous_end = None
+    for segment in segments:
+        start = segment.get("start")
+        paused = previous_end is not None and start is not None and start - previous_end > STEP_GAP
+        previous_end = segment.get("end", previous_end)
+
+        for index, sentence in enumerate(_SENTENCE_SPLIT_RE.split(segment["text"].strip())):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            starts_step = (
+                not steps
+                or (index == 0 and paused)
+                or bool(_CUE_RE.match(sentence.lower()))
+                or steps[-1][-1].endswith((".", "!", "?"))
+            )
+            if starts_step:
+                steps.append([sentence])
+            else:
+                steps[-1].append(sentence)
+
+    instructions = []
+    for parts in steps:
+        step = " ".join(parts)
+        if _VERB_RE.search(step.lower()):
+            if len(step) > MAX_STEP_LENGTH:
+                step = step[:MAX_STEP_LENGTH - 3].rstrip() + "..."
+            instructions.append(step[0].upper() + step[1:])
+            if len(instructions) == MAX_STEPS:
+                break
+    return instructions
+
+
+def _duration(match: Optional[re.Match]) -> Optional[str]:
+    if not match:
+        return None
+    unit = match.group("unit")
+    unit = "hours" if unit.startswith("h") else "minutes"
+    return f"{match.group('amount')} {unit}"
+
+
+def extract_recipe(transcript: Dict[str, Any], title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Turns a transcript into the structured fields the bot's recipe embed
+    uses: title, ingredients, instructions, prep_time, cook_time, servings,
+    plus ingredient_details with each ingredient's normalized name,
+    quantity and unit.
+
+    Works on transcript segments when present, otherwise on SRT/VTT subtitle text.
+    Precompiled lexicons and matchers only, so it runs in milliseconds.
+    """
+    segments = transcript.get("segments")
+    if not segments:
+        # Transcripts saved before subtitles were parsed on download hold raw SRT text
+        segments = parse_captions(transcript.get("text", ""))
+    if not segments and transcript.get("text"):
+        segments = [{"start": None, "end": None, "text": transcript["text"]}]
+
+    sentences = [
+        sentence.lower()
+        for segment in segments
+        for sentence in _SENTENCE_SPLIT_RE.split(segment["text"].strip())
+        if sentence
+    ]
+    text = " ".join(sentences)
+
+    if not title:
+        match = _TITLE_RE.search(text)
+        title = match.group("title").strip().title() if match else None
+
+    ingredients = extract_ingredients(sentences)
+    servings = _SERVINGS_RE.search(text)
+    count = servings.group("count") if servings else None
+
+    return {
+        "title": title,
+        "ingredients": [ingredient.display() for ingredient in ingredients],
+        "ingredient_details": [ingredient.to_dict() for ingredient in ingredients],
+        "instructions": segment_steps(segments),
+        "prep_time": _duration(_PREP_TIME_RE.search(text)),
+        "cook_time": _duration(_COOK_TIME_RE.search(text)),
+        "servings": int(count) if count and count.isdigit() else NUMBER_WORDS.get(count),
+    }
@@ -0,0 +1,174 @@
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger()
+
+# bm25 weights for the title, ingredients and text columns
+COLUMN_WEIGHTS = (10.0, 5.0, 1.0)
+SNIPPET_TOKENS = 16
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turns free text into an FTS5 query: every word must match, and the
+    last one may be a prefix so results show up while it's being typed.
+    Quoting each word keeps FTS5 operators in user input from being parsed.
+    """
+    terms = _TERM_RE.findall(query.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class SearchIndex:
+    """
+    Full-text index over processed transcripts, backed by SQLite FTS5.
+
+    Each transcript is added as soon as it is saved, keyed by URL so
+    processing the same video again replaces its entry.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # FastAPI runs sync endpoints in a thread pool, so share one connection under a lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL UNIQUE,
+                url TEXT,
+                title TEXT,
+                source TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_url ON documents (url);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                title, ingredients, text,
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+        """)
+        self._db.commit()
+
+    def add(self, run_id: str, url: Optional[str], transcript: Dict[str, Any],
+            recipe: Optional[Dict[str, Any]] = None, created_at: Optional[float] = None):
+        """
+        Indexes one transcript, replacing any earlier entry for the same URL.
+        """
+        recipe = recipe or {}
+        title = recipe.get("title") or ""
+        ingredients = " ".join(recipe.get("ingredients") or [])
+        text = transcript.get("text", "")
+
+        with self._lock, self._db:
+            stale = self._db.execute(
+                "SELECT id FROM documents WHERE run_id = ? OR (url IS NOT NULL AND url = ?)", (run_id, url)
+            ).fetchall()
+            for (doc_id,) in stale:
+                self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                self._db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+            cursor = self._db.execute(
+                "INSERT INTO documents (run_id, url, title, source, created_at) VALUES (?, ?, ?, ?, ?)",
+                (run_id, url, title, transcript.get("source"), created_at or time.time())
+            )
+            self._db.execute(
+                "INSERT INTO documents_fts (rowid, title, ingredients, text) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, title, ingredients, text)
+            )
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Ranked search over titles, ingredients and transcript text.
+
+        Returns:
+            Best matches first, each with url, title, source and a snippet
+            of the transcript with matched words in **bold**
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        with self._lock:
+            rows = self._db.execute(
+                f"""
+                SELECT d.run_id, d.url, d.title, d.source, d.created_at,
+                       snippet(documents_fts, 2, '**', '**', '…', {SNIPPET_TOKENS}),
+                       bm25(documents_fts, ?, ?, ?) AS score
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+                """,
+                (*COLUMN_WEIGHTS, match, limit)
+            ).fetchall()
+
+        return [
+            {
+                "run_id": run_id,
+                "url": url,
+                "title": title or None,
+                "source": source,
+                "created_at": created_at,
+                "snippet": snippet,
+                # bm25() is lower-is-better, flip it so higher means more relevant
+                "score": round(-score, 3),
+            }
+            for run_id, url, title, source, created_at, snippet, score in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def backfill(self, data_dir: str) -> int:
+        """
+        Indexes transcripts saved before the index existed.
+
+        Returns:
+            Number of transcripts added
+        """
+        with self._lock:
+            known = {run_id for (run_id,) in self._db.execute("SELECT run_id FROM documents")}
+
+        added = 0
+        for transcript_path in glob.glob(os.path.join(data_dir, "*", "transcript.json")):
+            run_dir = os.path.dirname(transcript_path)
+            run_id = os.path.basename(run_dir)
+            if run_id in known:
+                continue
+            try:
+                with open(transcript_path, "r", encoding="utf-8") as f:
+                    transcript = json.load(f)
+                recipe = None
+                recipe_path = os.path.join(run_dir, "recipe.json")
+                if os.path.exists(recipe_path):
+                    with open(recipe_path, "r", encoding="utf-8") as f:
+                        recipe = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping unreadable transcript %s: %s", transcript_path, e)
+                continue
+            self.add(run_id, transcript.get("url"), transcript, recipe, os.path.getmtime(transcript_path))
+            added += 1
+        return added
+
+    def close(self):
+        self._db.close()
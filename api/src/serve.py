@@ -0,0 +1,81 @@
+"""
+Runs the API with several worker processes sharing one Whisper model.
+
+The model is loaded once, in a dedicated inference process. Each uvicorn
+worker sends it decoded audio over a local Unix socket instead of loading
+its own copy, so adding workers adds request concurrency without adding
+model memory. Run from api/:
+
+    python -m src.serve --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from .inference import INFERENCE_THREADS, load_whisper_model, serve_inference
+from .logger import setup_logger
+
+logger = setup_logger()
+
+# Seconds to wait for the model to load, including a first download
+MODEL_LOAD_TIMEOUT = 600
+
+
+def start_inference_process(threads: int, model_factory=load_whisper_model):
+    """
+    Starts the inference process and waits until its model is loaded.
+    model_factory must be importable by name, the process is spawned.
+
+    Returns:
+        The process, the socket address and the auth key clients need
+    """
+    socket_dir = tempfile.mkdtemp(prefix="experience-api-")
+    address = os.path.join(socket_dir, "inference.sock")
+    authkey = os.urandom(16)
+
+    # Spawned rather than forked: the parent never touches the model, and
+    # CTranslate2's thread pools don't survive a fork anyway
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    process = context.Process(
+        target=serve_inference, args=(address, authkey, ready, threads, model_factory), name="whisper-inference", daemon=True
+    )
+    process.start()
+
+    waited = 0
+    while not ready.wait(timeout=1):
+        waited += 1
+        if not process.is_alive() or waited >= MODEL_LOAD_TIMEOUT:
+            process.terminate()
+            shutil.rmtree(socket_dir, ignore_errors=True)
+            raise RuntimeError("Inference process failed to load the Whisper model")
+    return process, address, authkey
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("API_WORKERS", "2")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    parser.add_argument("--inference-threads", type=int, default=INFERENCE_THREADS)
+    args = parser.parse_args()
+
+    process, address, authkey = start_inference_process(args.inference_threads)
+    # Read by src.main in every worker, which then uses the shared model
+    os.environ["INFERENCE_ADDRESS"] = address
+    os.environ["INFERENCE_AUTHKEY"] = authkey.hex()
+    logger.info("Starting %s API worker(s) sharing the model at %s", args.workers, address)
+    try:
+        uvicorn.run("src.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        process.terminate()
+        process.join(timeout=10)
+        shutil.rmtree(os.path.dirname(address), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Tests package for the Experience API
@@ -0,0 +1,125 @@
+import pytest
+
+from src import video_pipeline
+from src.captions import captions_to_transcript, parse_captions, parse_cues
+
+SRT = """1
+00:00:01,000 --> 00:00:03,500
+Preheat the oven
+
+2
+00:00:03,500 --> 00:01:02,250
+to <i>200 degrees</i>.
+"""
+
+VTT_HOURS = """WEBVTT
+
+00:00:01.000 --> 00:00:03.500
+Preheat the oven
+
+01:00:03.500 --> 01:00:05.000 align:start position:0%
+to 200 degrees.
+"""
+
+VTT_NO_HOURS = """WEBVTT
+
+intro
+00:01.000 --> 00:03.500
+Preheat the oven
+
+01:03.500 --> 01:05.000
+to 200 degrees.
+"""
+
+# YouTube auto-captions: each cue repeats the previous line, and lines grow
+# word by word with per-word timestamps and lines holding a single space
+YOUTUBE_AUTO = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+
+add<00:00:00.500><c> the</c><00:00:01.000><c> flour</c>
+
+00:00:02.000 --> 00:00:02.010 align:start position:0%
+add the flour
+
+
+00:00:02.010 --> 00:00:04.000 align:start position:0%
+add the flour
+and<00:00:02.500><c> stir</c>
+
+00:00:04.000 --> 00:00:04.010 align:start position:0%
+and stir
+
+
+00:00:04.010 --> 00:00:06.000 align:start position:0%
+and stir
+and stir well
+"""
+
+
+class TestParseCaptions:
+    """Test cases for parsing SRT and WebVTT subtitles."""
+
+    def test_srt(self):
+        """Test SRT cues keep their times and lose their markup."""
+        segments = parse_captions(SRT)
+
+        assert segments == [
+            {"start": 1.0, "end": 3.5, "text": "Preheat the oven"},
+            {"start": 3.5, "end": 62.25, "text": "to 200 degrees."},
+        ]
+
+    def test_vtt_with_hours(self):
+        """Test VTT timings with hours and cue settings."""
+        cues = parse_cues(VTT_HOURS)
+
+        assert [(cue["start"], cue["end"]) for cue in cues] == [(1.0, 3.5), (3603.5, 3605.0)]
+        assert [cue["lines"] for cue in cues] == [["Preheat the oven"], ["to 200 degrees."]]
+
+    def test_vtt_without_hours(self):
+        """Test VTT timings that leave out the hours, and cue identifiers."""
+        cues = parse_cues(VTT_NO_HOURS)
+
+        assert [(cue["start"], cue["end"]) for cue in cues] == [(1.0, 3.5), (63.5, 65.0)]
+        assert [cue["lines"] for cue in cues] == [["Preheat the oven"], ["to 200 degrees."]]
+
+    def test_youtube_rolling_captions(self):
+        """Test each rolling auto-caption line is kept once, in its longest form."""
+        transcript = captions_to_transcript(YOUTUBE_AUTO)
+
+        assert transcript["text"] == "add the flour and stir well"
+        assert transcript["segments"] == [
+            {"start": 0.0, "end": 4.0, "text": "add the flour"},
+            {"start": 2.01, "end": 6.0, "text": "and stir well"},
+        ]
+
+    def test_no_cues(self):
+        """Test text without timing lines gives no segments."""
+        assert captions_to_transcript("WEBVTT\n\nNOTE nothing here\n") == {"text": "", "segments": []}
+
+
+class TestSubtitleStage:
+    """Test cases for the pipeline's use of downloaded subtitles."""
+
+    def test_uses_subtitles(self, tmp_path, monkeypatch):
+        """Test parsed subtitles become the transcript without touching the audio."""
+        (tmp_path / "subtitle.en.srt").write_text(SRT, encoding="utf-8")
+        monkeypatch.setattr(video_pipeline, "_transcribe_stages", pytest.fail)
+
+        result = video_pipeline._run_stages("https://youtu.be/a", "youtube-a", str(tmp_path), {}, None, None, None)
+
+        assert result["source"] == "subtitles"
+        assert result["transcript"]["text"] == "Preheat the oven to 200 degrees."
+
+    def test_unparseable_subtitles_fall_back_to_audio(self, tmp_path, monkeypatch):
+        """Test subtitles that yield no segments are transcribed from audio instead."""
+        (tmp_path / "subtitle.en.vtt").write_text("WEBVTT\n\n", encoding="utf-8")
+        transcribed = {"text": "from the audio", "segments": [{"start": 0.0, "end": 1.0, "text": "from the audio"}]}
+        monkeypatch.setattr(video_pipeline, "_transcribe_stages", lambda *args: (dict(transcribed), None))
+
+        result = video_pipeline._run_stages("https://youtu.be/a", "youtube-a", str(tmp_path), {}, None, None, None)
+
+        assert result["source"] == "audio_transcription"
+        assert result["transcript"]["text"] == "from the audio"
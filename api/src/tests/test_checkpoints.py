@@ -0,0 +1,181 @@
+import json
+import os
+import shutil
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import video_pipeline
+from src.video_pipeline import _load_chunks, transcribe_audio
+
+RATE = 16000
+WINDOW_SECONDS = 10
+
+
+def write_wav(path, seconds=25):
+    """16 kHz mono WAV whose level steps each second, so a window's content shows where it starts."""
+    samples = np.repeat(np.arange(seconds, dtype=np.int16) * 100, RATE)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(samples.tobytes())
+    return str(path)
+
+
+class StubModel:
+    """
+    Stands in for faster-whisper: one segment per two seconds of the
+    window, named after the second it starts on. Raises on call
+    fail_on_call, as a recycled instance would stop mid-transcription.
+    """
+
+    def __init__(self, fail_on_call=None):
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def transcribe(self, audio, beam_size=5, language=None, initial_prompt=None):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("instance recycled")
+        segments = [
+            SimpleNamespace(start=start / RATE, end=min(start + 2 * RATE, len(audio)) / RATE,
+                            text=f" second {round(float(audio[start]) * 327.68)}.")
+            for start in range(0, len(audio), 2 * RATE)
+        ]
+        return iter(segments), SimpleNamespace(language=language or "en")
+
+
+@pytest.fixture
+def wav(tmp_path):
+    return write_wav(tmp_path / "audio.wav")
+
+
+class TestTranscribeCheckpoints:
+    """Test cases for resuming an interrupted transcription from its chunks."""
+
+    def test_uninterrupted(self, wav):
+        """Test the stub transcribes every second exactly once."""
+        transcript = transcribe_audio(StubModel(), wav, window_seconds=WINDOW_SECONDS)
+
+        assert [segment["text"] for segment in transcript["segments"]] == [f" second {n}." for n in range(0, 25, 2)]
+        assert transcript["segments"][-1]["end"] == 25.0
+
+    def test_resume_matches_uninterrupted(self, wav, tmp_path):
+        """Test a run interrupted after two windows resumes to the same segments."""
+        expected = transcribe_audio(StubModel(), wav, window_seconds=WINDOW_SECONDS, checkpoint_dir=None)
+        chunks = tmp_path / "chunks"
+        chunks.mkdir()
+
+        with pytest.raises(RuntimeError):
+            transcribe_audio(StubModel(fail_on_call=3), wav, window_seconds=WINDOW_SECONDS, checkpoint_dir=str(chunks))
+        assert len(os.listdir(chunks)) == 2
+
+        model = StubModel()
+        resumed = transcribe_audio(model, wav, window_seconds=WINDOW_SECONDS, checkpoint_dir=str(chunks))
+
+        assert resumed == expected
+        # Only the windows after the checkpoints are transcribed again
+        assert model.calls == 1
+
+    def test_resume_keeps_the_language(self, wav, tmp_path):
+        """Test the language found before the interruption is reused."""
+        chunks = tmp_path / "chunks"
+        chunks.mkdir()
+        with pytest.raises(RuntimeError):
+            transcribe_audio(StubModel(fail_on_call=2), wav, window_seconds=WINDOW_SECONDS,
+                             checkpoint_dir=str(chunks), language="de")
+
+        resumed = transcribe_audio(StubModel(), wav, window_seconds=WINDOW_SECONDS, checkpoint_dir=str(chunks))
+
+        assert resumed["language"] == "de"
+
+
+class TestLoadChunks:
+    """Test cases for reading transcription checkpoints."""
+
+    def test_no_checkpoints(self, tmp_path):
+        """Test a missing or empty checkpoint directory starts from the beginning."""
+        assert _load_chunks(None) == ([], None, 0.0)
+        assert _load_chunks(str(tmp_path)) == ([], None, 0.0)
+
+    def test_chunks_in_order(self, tmp_path):
+        """Test chunks are joined in order and the last one sets the offset."""
+        for index, start in enumerate((0.0, 8.0)):
+            (tmp_path / f"{index:05d}.json").write_text(json.dumps({
+                "segments": [{"start": start, "end": start + 8, "text": f" from {start}"}],
+                "language": "en", "offset": start + 8,
+            }))
+
+        segments, language, offset = _load_chunks(str(tmp_path))
+
+        assert [segment["text"] for segment in segments] == [" from 0.0", " from 8.0"]
+        assert (language, offset) == ("en", 16.0)
+
+    def test_unreadable_chunk_is_dropped_with_later_ones(self, tmp_path):
+        """Test loading stops at a broken chunk and removes it and the ones after it."""
+        (tmp_path / "00000.json").write_text(json.dumps({
+            "segments": [{"start": 0.0, "end": 8.0, "text": " kept"}], "language": "en", "offset": 8.0,
+        }))
+        (tmp_path / "00001.json").write_text('{"segments": [')
+        (tmp_path / "00002.json").write_text(json.dumps({"segments": [], "language": "en", "offset": 24.0}))
+
+        segments, language, offset = _load_chunks(str(tmp_path))
+
+        assert [segment["text"] for segment in segments] == [" kept"]
+        assert offset == 8.0
+        assert sorted(os.listdir(tmp_path)) == ["00000.json"]
+
+
+class TestPipelineResume:
+    """Test cases for resuming _run_stages after an interruption."""
+
+    @pytest.fixture
+    def downloads(self, wav, monkeypatch):
+        """Stubs yt-dlp's download with a copy of the test audio, recording each call."""
+        calls = []
+
+        def download_audio(url, output_path, duration=None):
+            calls.append(url)
+            return shutil.copy(wav, output_path + ".wav")
+
+        monkeypatch.setattr(video_pipeline, "download_audio", download_audio)
+        monkeypatch.setattr(video_pipeline, "TRANSCRIBE_WINDOW_SECONDS", WINDOW_SECONDS)
+        return calls
+
+    def run(self, save_dir, model):
+        save_dir.mkdir(exist_ok=True)
+        return video_pipeline._run_stages("https://youtu.be/a", "youtube-a", str(save_dir), {}, model, None, None)
+
+    def test_resumed_run_matches_uninterrupted(self, tmp_path, downloads):
+        """Test a run that fails mid-transcription resumes without repeating finished stages."""
+        expected = self.run(tmp_path / "uninterrupted", StubModel())
+
+        save_dir = tmp_path / "interrupted"
+        with pytest.raises(RuntimeError):
+            self.run(save_dir, StubModel(fail_on_call=3))
+        assert os.path.exists(save_dir / "fingerprint.npy")
+        assert len(os.listdir(save_dir / "chunks")) == 2
+
+        model = StubModel()
+        resumed = self.run(save_dir, model)
+
+        assert resumed["transcript"]["segments"] == expected["transcript"]["segments"]
+        assert resumed["transcript"]["text"] == expected["transcript"]["text"]
+        assert len(downloads) == 2
+        assert model.calls == 1
+        assert not os.path.exists(save_dir / "chunks")
+
+    def test_finished_run_is_answered_from_disk(self, tmp_path, downloads):
+        """Test a video already processed is answered without downloading or transcribing."""
+        first = self.run(tmp_path / "video", StubModel())
+
+        model = StubModel()
+        again = self.run(tmp_path / "video", model)
+
+        assert again["transcript"] == first["transcript"]
+        assert again["recipe"] == first["recipe"]
+        assert model.calls == 0
+        assert len(downloads) == 1
@@ -0,0 +1,84 @@
+import pytest
+
+from src import video_pipeline
+from src.video_pipeline import download_audio, download_bytes, download_seconds
+
+
+class FakeYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL, recording its options and reporting a finished download."""
+
+    instances = []
+
+    def __init__(self, options):
+        self.options = options
+        FakeYoutubeDL.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        for hook in self.options["progress_hooks"]:
+            hook({"status": "downloading", "downloaded_bytes": 100})
+            hook({"status": "finished", "total_bytes": 3000})
+        path = self.options["outtmpl"].replace("%(ext)s", "m4a")
+        return {"extractor_key": "FakeTube", "format_id": "139", "abr": 48,
+                "requested_downloads": [{"filepath": path}]}
+
+
+def metric_sample(metric, name, platform):
+    """The sample line of `name` for `platform`, or None before its first observation."""
+    prefix = f'{name}{{platform="{platform}"}} '
+    return next((line[len(prefix):] for line in metric.samples() if line.startswith(prefix)), None)
+
+
+@pytest.fixture
+def ydl(monkeypatch):
+    FakeYoutubeDL.instances = []
+    monkeypatch.setattr(video_pipeline.yt_dlp, "YoutubeDL", FakeYoutubeDL)
+    monkeypatch.setattr(video_pipeline, "MAX_AUDIO_SECONDS", 0)
+    return FakeYoutubeDL.instances
+
+
+class TestDownloadAudio:
+    """Test cases for the yt-dlp options and metrics of the audio download."""
+
+    def test_smallest_speech_format_with_parallel_fragments(self, ydl, tmp_path, monkeypatch):
+        """Test the format selector, ascending bitrate sort and fragment concurrency are passed."""
+        monkeypatch.setattr(video_pipeline, "DOWNLOAD_FRAGMENTS", 6)
+
+        path = download_audio("https://youtu.be/abc", str(tmp_path / "audio"))
+
+        options = ydl[0].options
+        assert path == str(tmp_path / "audio.m4a")
+        assert options["format"] == video_pipeline.AUDIO_FORMAT
+        assert options["format"].startswith(f"bestaudio[abr>=?{video_pipeline.AUDIO_MIN_ABR}]")
+        assert options["format_sort"] == ["+abr"]
+        assert options["concurrent_fragment_downloads"] == 6
+        assert "download_ranges" not in options
+
+    @pytest.mark.parametrize("duration, capped", [(None, True), (600, True), (60, False)])
+    def test_duration_cap(self, ydl, tmp_path, monkeypatch, duration, capped):
+        """Test only MAX_AUDIO_SECONDS is downloaded from videos that are, or may be, longer."""
+        monkeypatch.setattr(video_pipeline, "MAX_AUDIO_SECONDS", 120)
+
+        download_audio("https://youtu.be/abc", str(tmp_path / "audio"), duration=duration)
+
+        ranges = ydl[0].options.get("download_ranges")
+        assert (ranges is not None) == capped
+        if capped:
+            assert list(ranges({}, None)) == [{"start_time": 0, "end_time": 120}]
+
+    def test_bytes_and_time_per_platform(self, ydl, tmp_path):
+        """Test finished downloads count their bytes and wall time under the extractor's name."""
+        before_bytes = float(metric_sample(download_bytes, "audio_download_bytes_total", "faketube") or 0)
+        before_count = int(metric_sample(download_seconds, "audio_download_duration_seconds_count", "faketube") or 0)
+
+        download_audio("https://youtu.be/abc", str(tmp_path / "audio"))
+
+        assert float(metric_sample(download_bytes, "audio_download_bytes_total", "faketube")) == before_bytes + 3000
+        assert int(metric_sample(download_seconds, "audio_download_duration_seconds_count", "faketube")) == (
+            before_count + 1
+        )
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.fingerprint import FingerprintIndex, fingerprint_samples
+
+RATE = 16000
+
+
+def audio(seconds, seed):
+    """Deterministic noise with a slowly varying envelope, standing in for speech."""
+    rng = np.random.default_rng(seed)
+    samples = rng.standard_normal(int(seconds * RATE)).astype(np.float32)
+    envelope = np.repeat(rng.uniform(0.2, 1.0, int(seconds * 10) + 1), RATE // 10)[:len(samples)]
+    return samples * envelope.astype(np.float32)
+
+
+def reencoded(samples, seed=99):
+    """The same audio at another gain with a little added noise, as a repost comes back."""
+    rng = np.random.default_rng(seed)
+    return (samples * 0.7 + rng.standard_normal(len(samples)).astype(np.float32) * 0.02).astype(np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "fingerprints.db"))
+    yield index
+    index.close()
+
+
+class TestFingerprintIndex:
+    """Test cases for matching reposted audio."""
+
+    def test_repost_matches(self, index):
+        """Test a re-encoded copy of an indexed clip matches it."""
+        clip = audio(20, seed=1)
+        index.add("youtube-a", "https://youtu.be/a", fingerprint_samples(clip), "a/transcript.json")
+
+        match = index.lookup(fingerprint_samples(reencoded(clip)))
+
+        assert match is not None
+        assert match["run_id"] == "youtube-a"
+        assert match["bit_error_rate"] < 0.2
+
+    def test_trimmed_repost_matches(self, index):
+        """Test a repost with a second cut from the start still matches, at the right offset."""
+        clip = audio(20, seed=2)
+        index.add("youtube-b", None, fingerprint_samples(clip), "b/transcript.json")
+
+        match = index.lookup(fingerprint_samples(reencoded(clip[RATE:])))
+
+        assert match is not None
+        assert match["run_id"] == "youtube-b"
+        assert match["offset_seconds"] == pytest.approx(1.0, abs=0.05)
+
+    def test_video_containing_a_clip_does_not_match(self, index):
+        """Test a long video that contains a short indexed clip isn't given the clip's transcript."""
+        clip = audio(8, seed=3)
+        index.add("instagram-intro", None, fingerprint_samples(clip), "intro/transcript.json")
+        video = np.concatenate([audio(30, seed=4), clip, audio(30, seed=5)])
+
+        assert index.lookup(fingerprint_samples(video)) is None
+
+    def test_clip_of_an_indexed_video_does_not_match(self, index):
+        """Test a short excerpt of a long indexed video isn't given the whole video's transcript."""
+        video = audio(60, seed=6)
+        index.add("youtube-long", None, fingerprint_samples(video), "long/transcript.json")
+
+        assert index.lookup(fingerprint_samples(video[20 * RATE:28 * RATE])) is None
+
+    def test_different_audio_does_not_match(self, index):
+        """Test unrelated audio of the same length doesn't match."""
+        index.add("youtube-c", None, fingerprint_samples(audio(20, seed=7)), "c/transcript.json")
+
+        assert index.lookup(fingerprint_samples(audio(20, seed=8))) is None
@@ -0,0 +1,170 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.inference import LanguageRoutedModel, RemoteWhisperModel, serve_inference
+
+AUTHKEY = b"test-key"
+
+
+class SlowModel:
+    """Answers with one segment after `delay` seconds."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def transcribe(self, audio, **options):
+        time.sleep(self.delay)
+        if options.get("language") == "xx":
+            raise ValueError("unsupported language")
+        segments = [SimpleNamespace(start=0.0, end=1.0, text=f" {len(audio)} samples")]
+        return iter(segments), SimpleNamespace(language=options.get("language") or "en", duration=1.0)
+
+
+class StubWhisper:
+    """Records which model transcribed, with which language; detects `detected`."""
+
+    def __init__(self, name, calls, detected=("en", 0.9), multilingual=True):
+        self.name = name
+        self.calls = calls
+        self.detected = detected
+        self.detections = 0
+        self.supported_languages = ["en", "de", "fr"]
+        self.model = SimpleNamespace(is_multilingual=multilingual)
+
+    def detect_language(self, audio):
+        self.detections += 1
+        return self.detected[0], self.detected[1], []
+
+    def transcribe(self, audio, language=None, **options):
+        self.calls.append((self.name, language))
+        return iter([]), SimpleNamespace(language=language)
+
+
+def record_connections(remote):
+    """Keeps every connection the model takes, to check what happened to it."""
+    taken = []
+    acquire = remote._acquire
+
+    def recording_acquire():
+        conn = acquire()
+        taken.append(conn)
+        return conn
+
+    remote._acquire = recording_acquire
+    return taken
+
+
+@pytest.fixture
+def serve(tmp_path):
+    """Starts an inference server on a Unix socket in a daemon thread."""
+    def start(model):
+        address = str(tmp_path / "inference.sock")
+        ready = threading.Event()
+        threading.Thread(target=serve_inference, args=(address, AUTHKEY, ready),
+                         kwargs={"model_factory": lambda num_workers: model}, daemon=True).start()
+        assert ready.wait(5)
+        return address
+    return start
+
+
+class TestRemoteWhisperModel:
+    """Test cases for the worker side of the shared inference process."""
+
+    def test_transcribe_reuses_the_connection(self, serve):
+        """Test results come back in WhisperModel's shape and the connection is pooled."""
+        remote = RemoteWhisperModel(serve(SlowModel()), AUTHKEY, timeout=5)
+
+        segments, info = remote.transcribe(np.zeros(160, dtype=np.float32), language="de")
+        remote.transcribe(np.zeros(16, dtype=np.float32))
+
+        assert [(s.start, s.end, s.text) for s in segments] == [(0.0, 1.0, " 160 samples")]
+        assert info.language == "de"
+        assert len(remote._idle) == 1
+        remote.close()
+
+    def test_model_errors_keep_the_connection(self, serve):
+        """Test an error answered by the inference process leaves the connection usable."""
+        remote = RemoteWhisperModel(serve(SlowModel()), AUTHKEY, timeout=5)
+
+        with pytest.raises(RuntimeError, match="unsupported language"):
+            remote.transcribe(np.zeros(16, dtype=np.float32), language="xx")
+
+        assert len(remote._idle) == 1
+        remote.close()
+
+    def test_timeout_closes_the_connection(self, serve):
+        """Test a call that gets no answer in time fails and its connection isn't reused."""
+        remote = RemoteWhisperModel(serve(SlowModel(delay=0.5)), AUTHKEY, timeout=0.1)
+        taken = record_connections(remote)
+
+        with pytest.raises(TimeoutError):
+            remote.transcribe(np.zeros(16, dtype=np.float32))
+
+        assert remote._idle == []
+        assert taken[0].closed
+        # The late answer goes nowhere; the next call gets a fresh connection and its own result
+        remote.timeout = 5
+        segments, _ = remote.transcribe(np.zeros(32, dtype=np.float32))
+        assert segments[0].text == " 32 samples"
+        remote.close()
+
+    def test_send_failure_closes_the_connection(self, serve):
+        """Test a request that can't be sent doesn't leave its connection in the pool."""
+        remote = RemoteWhisperModel(serve(SlowModel()), AUTHKEY, timeout=5)
+        taken = record_connections(remote)
+
+        with pytest.raises(Exception):
+            # Lambdas can't be pickled, so the send fails
+            remote.transcribe(np.zeros(16, dtype=np.float32), callback=lambda: None)
+
+        assert remote._idle == []
+        assert taken[0].closed
+        remote.close()
+
+    def test_unreachable_server(self, tmp_path):
+        """Test a missing inference process surfaces as a connection error."""
+        remote = RemoteWhisperModel(str(tmp_path / "missing.sock"), AUTHKEY, timeout=1)
+
+        with pytest.raises(OSError):
+            remote.transcribe(np.zeros(16, dtype=np.float32))
+
+
+class TestLanguageRoutedModel:
+    """Test cases for sending English audio to the English-only model."""
+
+    def route(self, detected=("en", 0.9), multilingual=True, threshold=0.7, **options):
+        calls = []
+        base = StubWhisper("multilingual", calls, detected=detected, multilingual=multilingual)
+        model = LanguageRoutedModel(base, StubWhisper("english", calls), threshold=threshold)
+        model.transcribe(np.zeros(16, dtype=np.float32), **options)
+        return calls, base.detections
+
+    def test_confident_english_goes_to_english(self):
+        """Test audio detected as English above the threshold uses the English-only model."""
+        assert self.route(detected=("en", 0.9)) == ([("english", "en")], 1)
+
+    def test_unsure_english_stays_multilingual(self):
+        """Test English detected below the threshold stays on the multilingual model."""
+        assert self.route(detected=("en", 0.5)) == ([("multilingual", "en")], 1)
+
+    def test_other_languages_stay_multilingual(self):
+        """Test audio in another language uses the multilingual model."""
+        assert self.route(detected=("de", 0.99)) == ([("multilingual", "de")], 1)
+
+    def test_given_language_skips_detection(self):
+        """Test a language from the caller is used as is, without detecting one."""
+        assert self.route(detected=("de", 0.99), language="en") == ([("english", "en")], 0)
+        assert self.route(detected=("en", 0.99), language="fr") == ([("multilingual", "fr")], 0)
+
+    def test_unsupported_language_is_dropped(self):
+        """Test a language code the model doesn't know is replaced by detection."""
+        assert self.route(detected=("de", 0.99), language="xx") == ([("multilingual", "de")], 1)
+
+    def test_english_only_base_never_routes(self):
+        """Test a base model that isn't multilingual transcribes everything itself."""
+        assert self.route(multilingual=False) == ([("multilingual", None)], 0)
+        assert self.route(multilingual=False, language="en") == ([("multilingual", "en")], 0)
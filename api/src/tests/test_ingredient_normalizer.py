@@ -0,0 +1,136 @@
+import pytest
+
+from src.ingredient_normalizer import (Ingredient, TokenTrie, format_quantity, normalize_line, normalize_lines,
+                                       parse_quantity, tokenize)
+
+
+def words(text):
+    return [token for token, _ in tokenize(text)]
+
+
+class TestTokenTrie:
+    """Test cases for the Aho-Corasick phrase matcher."""
+
+    @pytest.fixture
+    def trie(self):
+        return TokenTrie({
+            "oil": "oil", "olive oil": "olive oil", "extra virgin olive oil": "olive oil",
+            "soy": "soy sauce", "soy sauce": "soy sauce", "sauce": "sauce",
+        })
+
+    def test_finds_overlapping_matches(self, trie):
+        """Test every match is reported, including ones inside longer phrases."""
+        matches = sorted(trie.find(words("extra virgin olive oil")))
+
+        assert matches == [(0, 4, "olive oil"), (2, 4, "olive oil"), (3, 4, "oil")]
+
+    def test_longest_match_wins(self, trie):
+        """Test overlaps resolve to the leftmost, longest phrase."""
+        assert trie.find_longest(words("soy sauce and olive oil")) == [(0, 2, "soy sauce"), (3, 5, "olive oil")]
+
+    def test_failure_links(self, trie):
+        """Test a phrase that breaks off part way still finds the match that follows."""
+        assert trie.find_longest(words("extra virgin sauce")) == [(2, 3, "sauce")]
+        assert trie.find_longest(words("olive soy sauce")) == [(1, 3, "soy sauce")]
+
+    def test_no_match(self, trie):
+        """Test text without any phrase gives no matches."""
+        assert trie.find_longest(words("a pinch of salt")) == []
+
+
+class TestParseQuantity:
+    """Test cases for reading quantities."""
+
+    @pytest.mark.parametrize("text, expected", [
+        ("2", 2.0),
+        ("1.5", 1.5),
+        ("1/2", 0.5),
+        ("3/4", 0.75),
+        ("1 1/2", 1.5),
+        ("½", 0.5),
+        ("1½", 1.5),
+        ("2 ¾", 2.75),
+        ("2-3", 2.0),
+        ("1.5-2", 1.5),
+        ("three", 3),
+        ("a couple", 2),
+        ("a couple of", 2),
+        ("a few", 3),
+        ("half", 0.5),
+        ("half an", 0.5),
+        ("one and a half", 1.5),
+        ("two and a half", 2.5),
+        ("2 and a half", 2.5),
+        ("1 and a quarter", 1.25),
+        ("1/0", None),
+        ("salt", None),
+        ("", None),
+    ])
+    def test_quantities(self, text, expected):
+        """Test numbers, fractions, unicode fractions, ranges and number words."""
+        if expected is None:
+            assert parse_quantity(text) is None
+        else:
+            assert parse_quantity(text) == pytest.approx(expected)
+
+
+class TestNormalizeLine:
+    """Test cases for normalizing ingredient mentions."""
+
+    @pytest.mark.parametrize("line, expected", [
+        ("1 1/2 cups all purpose flour", Ingredient("all-purpose flour", 1.5, "cup")),
+        ("1½ cups flour", Ingredient("flour", 1.5, "cup")),
+        ("2-3 cloves garlic", Ingredient("garlic", 2.0, "clove")),
+        ("a couple of eggs", Ingredient("egg", 2, None)),
+        ("half an onion", Ingredient("onion", 0.5, None)),
+        ("two and a half cups flour", Ingredient("flour", 2.5, "cup")),
+        ("3 and a half tablespoons butter", Ingredient("butter", 3.5, "tbsp")),
+        ("half a cup of sugar", Ingredient("sugar", 0.5, "cup")),
+        ("200 grams of butter", Ingredient("butter", 200.0, "g")),
+        ("500 ml chicken broth", Ingredient("chicken stock", 500.0, "ml")),
+        ("1.5 kilos potatoes", Ingredient("potato", 1.5, "kg")),
+        ("2 fluid ounces heavy cream", Ingredient("heavy cream", 2.0, "fl oz")),
+        ("2 tbsp evoo", Ingredient("olive oil", 2.0, "tbsp")),
+        ("a pinch of kosher salt", Ingredient("salt", 1, "pinch")),
+        ("3 large eggs", Ingredient("egg", 3.0, None)),
+    ])
+    def test_amounts_and_aliases(self, line, expected):
+        """Test amounts, metric and imperial units, and aliases are normalized."""
+        assert normalize_line(line) == [expected]
+
+    def test_durations_are_not_amounts(self):
+        """Test a number that counts minutes isn't read as the ingredient's quantity."""
+        assert normalize_line("cook for 5 minutes then add onion") == [Ingredient("onion")]
+
+    def test_several_mentions(self):
+        """Test each mention reads only the amount after the previous one."""
+        assert normalize_line("2 cups rice, 1 tsp salt and pepper") == [
+            Ingredient("rice", 2.0, "cup"), Ingredient("salt", 1.0, "tsp"), Ingredient("black pepper"),
+        ]
+
+    def test_lines_keep_their_mentions(self):
+        """Test a batch of lines returns each line's mentions."""
+        assert normalize_lines(["2 eggs", "no ingredients here", "a handful of spinach"]) == [
+            [Ingredient("egg", 2.0, None)], [], [Ingredient("spinach", 1, "handful")],
+        ]
+
+
+class TestDisplay:
+    """Test cases for rendering normalized ingredients."""
+
+    @pytest.mark.parametrize("ingredient, expected", [
+        (Ingredient("all-purpose flour", 1.5, "cup"), "1 1/2 cups all-purpose flour"),
+        (Ingredient("onion", 0.5, None), "1/2 onion"),
+        (Ingredient("egg", 2.0, None), "2 eggs"),
+        (Ingredient("garlic", 3.0, "clove"), "3 cloves garlic"),
+        (Ingredient("salt", 1, "pinch"), "1 pinch salt"),
+        (Ingredient("butter", 200.0, "g"), "200 g butter"),
+        (Ingredient("salt"), "salt"),
+    ])
+    def test_display(self, ingredient, expected):
+        """Test quantities, unit plurals and counted names are rendered."""
+        assert ingredient.display() == expected
+
+    def test_format_quantity(self):
+        """Test common fractions are written as fractions."""
+        assert [format_quantity(q) for q in (2.0, 0.25, 1 / 3, 2.75, 1.1)] == ["2", "1/4", "1/3", "2 3/4", "1.1"]
@@ -0,0 +1,184 @@
+import time
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main
+from src.job_queue import (DONE, FAILED, PENDING, RUNNING, MemoryJobQueue, RedisJobQueue, SQLiteJobQueue,
+                           create_job_queue)
+
+LEASE_SECONDS = 0.2
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_queue(request, tmp_path):
+    """Builds queues of each backend; Redis is served by fakeredis."""
+    queues = []
+
+    def make(**options):
+        options = {"lease_seconds": LEASE_SECONDS, "max_attempts": 2, "result_ttl": 60, **options}
+        if request.param == "memory":
+            queue = MemoryJobQueue(**options)
+        elif request.param == "sqlite":
+            queue = SQLiteJobQueue(str(tmp_path / "jobs.db"), **options)
+        else:
+            queue = RedisJobQueue("", client=fakeredis.FakeRedis(decode_responses=True), **options)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+
+
+@pytest.fixture
+def queue(make_queue):
+    return make_queue()
+
+
+class TestJobQueue:
+    """Test cases for every job queue backend."""
+
+    def test_lease_runs_jobs_in_order(self, queue):
+        """Test jobs are leased once each, oldest first."""
+        first = queue.submit({"url": "a"})
+        second = queue.submit({"url": "b"})
+
+        job = queue.lease("w1")
+
+        assert (job.id, job.status, job.attempts, job.payload) == (first, RUNNING, 1, {"url": "a"})
+        assert queue.lease("w2").id == second
+        assert queue.lease("w3") is None
+        assert queue.depth() == 2
+
+    def test_only_the_lease_holder_updates_a_job(self, queue):
+        """Test heartbeats and results from another worker are refused."""
+        job_id = queue.submit({"url": "a"})
+        queue.lease("w1")
+
+        assert queue.heartbeat(job_id, "w1")
+        assert not queue.heartbeat(job_id, "w2")
+        assert not queue.complete(job_id, "w2", {"ok": False})
+        assert queue.complete(job_id, "w1", {"ok": True})
+        assert not queue.complete(job_id, "w1", {"ok": True})
+
+        job = queue.get(job_id)
+        assert (job.status, job.result) == (DONE, {"ok": True})
+        assert queue.depth() == 0
+
+    def test_expired_lease_goes_to_another_worker(self, queue):
+        """Test a job whose worker stopped renewing its lease is leased again."""
+        job_id = queue.submit({"url": "a"})
+        queue.lease("w1")
+        time.sleep(LEASE_SECONDS + 0.05)
+
+        job = queue.lease("w2")
+
+        assert (job.id, job.attempts) == (job_id, 2)
+        assert not queue.heartbeat(job_id, "w1")
+        assert not queue.complete(job_id, "w1", {"ok": True})
+
+    def test_heartbeat_keeps_the_lease(self, queue):
+        """Test a renewed lease outlives the original lease time."""
+        job_id = queue.submit({"url": "a"})
+        queue.lease("w1")
+        for _ in range(3):
+            time.sleep(LEASE_SECONDS / 2)
+            assert queue.heartbeat(job_id, "w1")
+
+        assert queue.lease("w2") is None
+        assert queue.get(job_id).status == RUNNING
+
+    def test_failed_job_is_retried_then_failed(self, queue):
+        """Test a failure requeues the job until max_attempts is reached."""
+        job_id = queue.submit({"url": "a"})
+        queue.lease("w1")
+
+        assert queue.fail(job_id, "w1", "first")
+        assert queue.get(job_id).status == PENDING
+        assert queue.lease("w2").attempts == 2
+        assert queue.fail(job_id, "w2", "second")
+
+        job = queue.get(job_id)
+        assert (job.status, job.error) == (FAILED, "second")
+        assert queue.lease("w3") is None
+
+    def test_lost_leases_count_as_attempts(self, queue):
+        """Test a job whose lease expires max_attempts times is failed."""
+        job_id = queue.submit({"url": "a"})
+        for worker in ("w1", "w2"):
+            assert queue.lease(worker).id == job_id
+            time.sleep(LEASE_SECONDS + 0.05)
+
+        assert queue.lease("w3") is None
+        job = queue.get(job_id)
+        assert (job.status, job.error) == (FAILED, "Lease expired")
+
+    def test_same_key_joins_the_job(self, queue):
+        """Test a key dedupes submits while the job is pending, running or done."""
+        job_id = queue.submit({"url": "a"}, key="a")
+        assert queue.submit({"url": "a"}, key="a") == job_id
+
+        queue.lease("w1")
+        assert queue.submit({"url": "a"}, key="a") == job_id
+
+        queue.complete(job_id, "w1", {"ok": True})
+        assert queue.submit({"url": "a"}, key="a") == job_id
+        assert queue.submit({"url": "b"}, key="b") != job_id
+        assert queue.submit({"url": "a"}) != job_id
+
+    def test_failed_job_is_not_joined(self, queue):
+        """Test a key whose job failed starts a new job."""
+        job_id = queue.submit({"url": "a"}, key="a")
+        for worker in ("w1", "w2"):
+            queue.lease(worker)
+            queue.fail(job_id, worker, "boom")
+
+        assert queue.submit({"url": "a"}, key="a") != job_id
+
+    def test_finished_jobs_expire(self, make_queue):
+        """Test done and failed jobs are dropped after result_ttl, with their keys."""
+        queue = make_queue(max_attempts=1, result_ttl=1)
+        done = queue.submit({"url": "a"}, key="a")
+        failed = queue.submit({"url": "b"}, key="b")
+        queue.lease("w1")
+        queue.complete(done, "w1", {"ok": True})
+        queue.lease("w1")
+        queue.fail(failed, "w1", "boom")
+        time.sleep(1.1)
+
+        assert queue.submit({"url": "a"}, key="a") != done
+        assert queue.get(done) is None
+        assert queue.get(failed) is None
+
+
+class TestCreateJobQueue:
+    """Test cases for choosing the backend."""
+
+    def test_backends(self, tmp_path):
+        """Test each configured backend name builds its queue."""
+        memory = create_job_queue("memory")
+        sqlite = create_job_queue("sqlite", str(tmp_path / "jobs.db"))
+
+        assert isinstance(memory, MemoryJobQueue)
+        assert isinstance(sqlite, SQLiteJobQueue)
+        sqlite.close()
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            create_job_queue("kafka")
+
+
+class TestFrontendMode:
+    """Test cases for starting the API as a queueing front end."""
+
+    def test_refuses_memory_queue(self, monkeypatch):
+        """Test the front end won't start on a queue its workers can't see."""
+        monkeypatch.setattr(main, "API_MODE", "frontend")
+        monkeypatch.setattr(main, "JOB_QUEUE", "memory")
+
+        with pytest.raises(RuntimeError, match="JOB_QUEUE"):
+            with TestClient(main.app):
+                pass
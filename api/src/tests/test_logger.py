@@ -0,0 +1,30 @@
+import logging
+import queue
+
+from src.logger import LazyQueueHandler
+
+
+def make_record(msg, *args):
+    return logging.LogRecord("experience_api", logging.INFO, __file__, 1, msg, args, None)
+
+
+class TestLazyQueueHandler:
+    """Test cases for formatting records off the calling thread."""
+
+    def test_immutable_args_stay_lazy(self):
+        """Test strings and numbers are left for the listener to format."""
+        handler = LazyQueueHandler(queue.Queue())
+        record = handler.prepare(make_record("Resuming transcription at %.1fs of %s", 30.0, "youtube-a"))
+
+        assert record.args == (30.0, "youtube-a")
+        assert record.getMessage() == "Resuming transcription at 30.0s of youtube-a"
+
+    def test_mutable_args_are_formatted_at_the_call(self):
+        """Test a dict changed after logging is logged as it was."""
+        handler = LazyQueueHandler(queue.Queue())
+        probe = {"language": "en"}
+        record = handler.prepare(make_record("Probed %s", probe))
+        probe["language"] = "de"
+
+        assert record.args is None
+        assert record.getMessage() == "Probed {'language': 'en'}"
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main, prefetch, video_pipeline
+from src.prefetch import Prefetcher
+from src.video_pipeline import cached_probe
+
+
+@pytest.fixture
+def probes(tmp_path, monkeypatch):
+    """Stubs probe_video, recording each URL it is called with; the probe cache goes under tmp_path."""
+    calls = []
+
+    def probe_video(url):
+        calls.append(url)
+        time.sleep(0.1)
+        return {"id": "abc", "extractor": "Youtube", "has_subtitles": False, "probe": len(calls)}
+
+    monkeypatch.setattr(video_pipeline, "probe_video", probe_video)
+    monkeypatch.setattr(video_pipeline, "SAVE_BASE_DIR", str(tmp_path))
+    return calls
+
+
+class TestCachedProbe:
+    """Test cases for the probe cache shared by prefetches and requests."""
+
+    def test_fresh_probe_is_reused(self, probes):
+        """Test a URL probed within PROBE_CACHE_TTL isn't probed again."""
+        first = cached_probe("https://youtu.be/abc")
+
+        assert cached_probe("https://youtu.be/abc") == first
+        assert probes == ["https://youtu.be/abc"]
+
+    def test_stale_probe_is_redone(self, probes):
+        """Test a probe older than PROBE_CACHE_TTL is replaced."""
+        cached_probe("https://youtu.be/abc")
+        stale = time.time() - video_pipeline.PROBE_CACHE_TTL - 1
+        cache_path = video_pipeline._probe_cache_path("https://youtu.be/abc")
+        os.utime(cache_path, (stale, stale))
+
+        assert cached_probe("https://youtu.be/abc")["probe"] == 2
+        assert len(probes) == 2
+
+    def test_urls_are_cached_separately(self, probes):
+        """Test each URL gets its own probe."""
+        cached_probe("https://youtu.be/abc")
+        cached_probe("https://youtu.be/def")
+
+        assert probes == ["https://youtu.be/abc", "https://youtu.be/def"]
+
+    def test_concurrent_probes_take_turns(self, probes):
+        """Test probes of one URL running at once call probe_video once between them."""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cached_probe("https://youtu.be/abc")))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(probes) == 1
+        assert all(result == results[0] for result in results)
+
+
+class TestPrefetcher:
+    """Test cases for the background prefetch pool."""
+
+    @pytest.fixture
+    def prefetched(self, monkeypatch):
+        """Stubs prefetch_video with one that waits for `release`, recording each URL."""
+        calls = []
+        release = threading.Event()
+
+        def prefetch_video(url):
+            calls.append(url)
+            release.wait(5)
+            if url == "broken":
+                raise RuntimeError("no formats")
+
+        monkeypatch.setattr(prefetch, "prefetch_video", prefetch_video)
+        yield calls, release
+        release.set()
+
+    def wait_idle(self, prefetcher):
+        deadline = time.time() + 5
+        while prefetcher._pending and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_url_is_queued_once_at_a_time(self, prefetched):
+        """Test a URL already queued is skipped until its prefetch finishes."""
+        calls, release = prefetched
+        prefetcher = Prefetcher(workers=1, max_pending=10)
+
+        assert prefetcher.submit("a")
+        assert not prefetcher.submit("a")
+        release.set()
+        self.wait_idle(prefetcher)
+
+        assert prefetcher.submit("a")
+        self.wait_idle(prefetcher)
+        assert calls == ["a", "a"]
+        prefetcher.close()
+
+    def test_backlog_is_capped(self, prefetched):
+        """Test URLs past max_pending are turned away."""
+        _, release = prefetched
+        prefetcher = Prefetcher(workers=1, max_pending=2)
+
+        assert prefetcher.submit("a")
+        assert prefetcher.submit("b")
+        assert not prefetcher.submit("c")
+        release.set()
+        prefetcher.close()
+
+    def test_failure_frees_the_url(self, prefetched):
+        """Test a failed prefetch is logged, not raised, and the URL can be queued again."""
+        _, release = prefetched
+        prefetcher = Prefetcher(workers=1, max_pending=10)
+        release.set()
+
+        assert prefetcher.submit("broken")
+        self.wait_idle(prefetcher)
+
+        assert prefetcher._pending == set()
+        assert prefetcher.submit("broken")
+        prefetcher.close()
+
+
+class TestPrefetchEndpoint:
+    """Test cases for POST /prefetch."""
+
+    class StubPrefetcher:
+        def __init__(self):
+            self.urls = []
+
+        def submit(self, url):
+            if url in self.urls:
+                return False
+            self.urls.append(url)
+            return True
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        # Without the lifespan, so no model is loaded
+        monkeypatch.setattr(main.app.state, "prefetcher", self.StubPrefetcher(), raising=False)
+        return TestClient(main.app)
+
+    def test_queued_then_skipped(self, client):
+        """Test the first prefetch of a URL is queued and a repeat is skipped."""
+        first = client.post("/prefetch", json={"video_url": "https://youtu.be/abc", "source": "discord_bot"})
+        again = client.post("/prefetch", json={"video_url": "https://youtu.be/abc", "source": "discord_bot"})
+
+        assert (first.status_code, first.json()) == (202, {"status": "queued"})
+        assert (again.status_code, again.json()) == (202, {"status": "skipped"})
+        assert main.app.state.prefetcher.urls == ["https://youtu.be/abc"]
+
+    def test_empty_url(self, client):
+        """Test an empty URL is rejected."""
+        assert client.post("/prefetch", json={"video_url": "", "source": "discord_bot"}).status_code == 400
+
+    def test_frontend_skips(self, client, monkeypatch):
+        """Test a front end, which has no prefetcher, skips every prefetch."""
+        monkeypatch.setattr(main.app.state, "prefetcher", None)
+
+        response = client.post("/prefetch", json={"video_url": "https://youtu.be/abc", "source": "discord_bot"})
+
+        assert (response.status_code, response.json()) == (202, {"status": "skipped"})
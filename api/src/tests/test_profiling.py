@@ -0,0 +1,150 @@
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import main, profiling
+from src.logger import log_context
+from src.profiling import SamplingProfiler, authorized, requested_profile_id, run_profiled, valid_profile_id
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    """Turns profiling on with TOKEN, saving profiles under tmp_path."""
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_INTERVAL", 0.001)
+    return tmp_path
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestAuthorization:
+    """Test cases for deciding which requests are profiled."""
+
+    def test_off_without_a_token(self, monkeypatch):
+        """Test nothing is profiled while PROFILE_TOKEN is unset, whatever the header says."""
+        monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+
+        for header in (None, "", "anything"):
+            assert not authorized(header)
+            assert requested_profile_id(header) is None
+
+    def test_token_is_compared_in_constant_time(self, profiles, monkeypatch):
+        """Test the header is checked with hmac.compare_digest."""
+        compared = []
+
+        def compare_digest(a, b):
+            compared.append((a, b))
+            return a == b
+
+        monkeypatch.setattr(profiling.hmac, "compare_digest", compare_digest)
+
+        assert authorized(TOKEN)
+        assert not authorized("s3cre")
+        assert compared == [(TOKEN, TOKEN), ("s3cre", TOKEN)]
+
+    def test_profile_id_is_a_safe_file_name(self, profiles):
+        """Test the request ID names the profile only when it is a plain name."""
+        with log_context(request_id="abc-123"):
+            assert requested_profile_id(TOKEN) == "abc-123"
+        with log_context(request_id="../x"):
+            profile_id = requested_profile_id(TOKEN)
+
+        assert valid_profile_id(profile_id) and profile_id != "../x"
+
+    @pytest.mark.parametrize("profile_id", ["../x", "..", "a/b", "a.folded", "", "x" * 65])
+    def test_unsafe_ids_are_rejected(self, profile_id):
+        """Test IDs that could leave PROFILE_DIR aren't valid."""
+        assert not valid_profile_id(profile_id)
+
+
+class TestRunProfiled:
+    """Test cases for sampling a pipeline run."""
+
+    def test_profile_is_saved(self, profiles):
+        """Test a run's stacks are written in the folded format."""
+        assert run_profiled("run1", lambda: busy(0.05) or "result") == "result"
+
+        lines = (profiles / "run1.folded").read_text().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) >= 1
+        assert "busy (" in stack
+
+    def test_profile_is_saved_when_fn_raises(self, profiles):
+        """Test a failed run still leaves its profile."""
+        def fail():
+            busy(0.02)
+            raise RuntimeError("pipeline failed")
+
+        with pytest.raises(RuntimeError, match="pipeline failed"):
+            run_profiled("failed", fail)
+
+        assert (profiles / "failed.folded").exists()
+
+    def test_old_profiles_are_pruned(self, profiles, monkeypatch):
+        """Test only the newest PROFILE_MAX_FILES profiles are kept."""
+        monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+        for index in range(4):
+            run_profiled(f"run{index}", lambda: None)
+            # mtimes must differ for the oldest to be told apart
+            os.utime(profiles / f"run{index}.folded", (index, index))
+
+        run_profiled("run4", lambda: None)
+
+        assert sorted(os.listdir(profiles)) == ["run3.folded", "run4.folded"]
+
+    def test_sampler_only_counts_its_thread(self):
+        """Test a sampler for a thread that isn't running records nothing."""
+        profiler = SamplingProfiler(thread_id=-1, interval=0.001)
+        profiler.start()
+        time.sleep(0.02)
+        profiler.stop()
+
+        assert profiler.samples == 0
+        assert profiler.folded() == ""
+
+
+class TestProfileEndpoint:
+    """Test cases for GET /profiles/{profile_id}."""
+
+    @pytest.fixture
+    def client(self, profiles):
+        (profiles / "run1.folded").write_text("main;busy 3\n")
+        # Without the lifespan, so no model is loaded
+        return TestClient(main.app)
+
+    def test_profile_is_served(self, client):
+        """Test the right token fetches a saved profile."""
+        response = client.get("/profiles/run1", headers={"X-Profile": TOKEN})
+
+        assert response.status_code == 200
+        assert response.text == "main;busy 3\n"
+
+    @pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+    def test_wrong_token_is_not_found(self, client, headers):
+        """Test a missing or wrong token gets the same 404 as a missing profile."""
+        assert client.get("/profiles/run1", headers=headers).status_code == 404
+
+    def test_off_without_a_token(self, client, monkeypatch):
+        """Test profiles aren't served while PROFILE_TOKEN is unset."""
+        monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+
+        assert client.get("/profiles/run1", headers={"X-Profile": ""}).status_code == 404
+
+    def test_invalid_ids_are_rejected(self, client, profiles):
+        """Test only plain IDs are looked up, even when a file by that name exists."""
+        (profiles / "a.b.folded").write_text("main 1\n")
+        (profiles.parent / "x.folded").write_text("secret 1\n")
+
+        # "a.b" reaches the handler; encoded slashes are already refused by routing
+        for profile_id in ("a.b", "..%2Fx", "%2E%2E%2Fx"):
+            assert client.get(f"/profiles/{profile_id}", headers={"X-Profile": TOKEN}).status_code == 404
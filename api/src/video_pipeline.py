@@ -1,88 +1,257 @@
 import yt_dlp
+import numpy as np
 # import whisper # No longer needed
 import os
 import json
+import fcntl
+import glob
+import hashlib
+import shutil
 import tempfile
-from typing import Dict, Any, Optional
-import re # Added for regex in convert_vtt_to_text, but will be removed
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, Union
+import re
+import time
+
+from .logger import setup_logger
+from .recipe_extractor import extract_recipe
+from .captions import captions_to_transcript
+from .fingerprint import fingerprint_windows
+from .audio_stream import SAMPLE_RATE, iter_audio_windows
+from .metrics import metrics
+
+logger = setup_logger()
 
 # Define a base directory for saving files
 # This will be relative to the working directory of the application
 SAVE_BASE_DIR = "data"
 
-def download_audio(url: str, output_path: str) -> str:
+# Audio is decoded and transcribed in windows sized to stay under this
+# budget, so memory doesn't grow with the length of the video
+AUDIO_MEMORY_LIMIT_MB = int(os.environ.get("AUDIO_MEMORY_LIMIT_MB", "256"))
+# faster-whisper's feature extraction peaks at ~64 bytes per 16 kHz sample,
+# on top of the 4-byte samples themselves
+AUDIO_BYTES_PER_SECOND = SAMPLE_RATE * 68
+# Up to one segment (30 s at most) is carried into the next window
+TRANSCRIBE_WINDOW_SECONDS = max(30.0, AUDIO_MEMORY_LIMIT_MB * 1024 * 1024 / AUDIO_BYTES_PER_SECOND - 30)
+# Trailing segments passed as the prompt of the next window, for continuity
+CONTEXT_SEGMENTS = 3
+
+# Seconds a probe is reused for the same URL, so a prefetch takes the extractor round trip off the request
+PROBE_CACHE_TTL = float(os.environ.get("PROBE_CACHE_TTL", "900"))
+
+# Lowest audio bitrate (kbps) picked for download; Whisper hears 16 kHz mono, so speech needs little more
+AUDIO_MIN_ABR = int(os.environ.get("AUDIO_MIN_ABR", "32"))
+# DASH/HLS fragments fetched in parallel
+DOWNLOAD_FRAGMENTS = int(os.environ.get("DOWNLOAD_FRAGMENTS", "4"))
+# Only this much of a longer video is downloaded and transcribed; 0 for no cap
+MAX_AUDIO_SECONDS = float(os.environ.get("MAX_AUDIO_SECONDS", "0"))
+# The lowest-bitrate audio-only format at or above the floor (`>=?` lets formats with
+# no reported bitrate through), else any audio-only one, else a small muxed video
+AUDIO_FORMAT = f"bestaudio[abr>=?{AUDIO_MIN_ABR}]/bestaudio/best[height<=?480]/best"
+# Containers download_audio can leave behind; the audio stream is kept as the site serves it
+AUDIO_EXTENSIONS = (".m4a", ".webm", ".opus", ".ogg", ".mp3", ".aac", ".mka", ".flac", ".wav")
+
+# Each stage leaves a checkpoint under SAVE_BASE_DIR/<video key>/ that a retry resumes from
+PIPELINE_STAGES = ("probe", "subtitles", "download", "decode", "transcribe", "save", "extract")
+
+fingerprint_lookups = metrics.counter("fingerprint_lookups_total", "Downloaded clips looked up in the fingerprint index")
+fingerprint_matches = metrics.counter("fingerprint_matches_total", "Clips whose transcript was reused from an earlier repost")
+transcription_seconds_saved = metrics.counter(
+    "transcription_seconds_saved_total", "Whisper time the reused transcripts originally took"
+)
+transcription_seconds = metrics.histogram("transcription_duration_seconds", "Whisper transcription time per clip")
+metrics.gauge(
+    "fingerprint_match_ratio", "Share of fingerprint lookups that found a repost",
+    fn=lambda: fingerprint_matches.value / fingerprint_lookups.value if fingerprint_lookups.value else 0.0
+)
+probe_cache_hits = metrics.counter("probe_cache_hits_total", "Probes answered from the probe cache")
+download_bytes = metrics.counter("audio_download_bytes_total", "Audio bytes downloaded, by platform")
+download_seconds = metrics.histogram("audio_download_duration_seconds", "Audio download wall time, by platform")
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+def download_audio(url: str, output_path: str, duration: Optional[float] = None) -> str:
     """
-    Downloads audio from a given URL using yt-dlp.
+    Downloads the audio of a video with yt-dlp, picking the smallest
+    audio-only format that still carries clear speech (AUDIO_FORMAT) and
+    fetching its fragments DOWNLOAD_FRAGMENTS at a time. The stream is
+    kept in its own container rather than re-encoded; a video with no
+    audio-only format has its audio copied out of the muxed file.
+
+    When the video is known, or might be, longer than MAX_AUDIO_SECONDS,
+    only that much is downloaded.
+
     Returns the path to the downloaded audio file.
     """
+    downloaded = {"bytes": 0}
+
+    def count_bytes(progress):
+        if progress["status"] == "finished":
+            downloaded["bytes"] += progress.get("total_bytes") or progress.get("downloaded_bytes") or 0
+
     ydl_opts = {
-        'format': 'bestaudio/best',
+        'format': AUDIO_FORMAT,
+        # Ascending bitrate, so "bestaudio" is the lowest one that passes the floor
+        'format_sort': ['+abr'],
+        'concurrent_fragment_downloads': DOWNLOAD_FRAGMENTS,
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
+            'preferredcodec': 'best',
         }],
-        'outtmpl': output_path,
+        'progress_hooks': [count_bytes],
+        'outtmpl': output_path + '.%(ext)s',
         'noplaylist': True,
         'quiet': True,
+        'noprogress': True,
         'no_warnings': True,
     }
+    if MAX_AUDIO_SECONDS and (duration is None or duration > MAX_AUDIO_SECONDS):
+        # Downloads through ffmpeg, which stops at the cap instead of fetching the rest
+        ydl_opts['download_ranges'] = yt_dlp.utils.download_range_func(None, [(0, MAX_AUDIO_SECONDS)])
+
+    started = time.perf_counter()
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info_dict = ydl.extract_info(url, download=True)
-            filename = ydl.prepare_filename(info_dict)
-            return os.path.splitext(filename)[0] + '.mp3'
     except Exception as e:
-        print(f"Error downloading audio: {e}")
+        logger.error("Error downloading audio: %s", e)
         raise
+    elapsed = time.perf_counter() - started
 
-def transcribe_audio(model, audio_path: str) -> Dict[str, Any]:
+    platform = (info_dict.get("extractor_key") or info_dict.get("extractor") or "unknown").lower()
+    download_bytes.inc(downloaded["bytes"], platform=platform)
+    download_seconds.observe(elapsed, platform=platform)
+    logger.info("Downloaded format %s (%s kbps, %s bytes) from %s", info_dict.get("format_id"), info_dict.get("abr"),
+                downloaded["bytes"], platform)
+
+    requested = info_dict.get("requested_downloads") or [{}]
+    return requested[0].get("filepath") or _find_file(os.path.dirname(output_path), os.path.basename(output_path),
+                                                      AUDIO_EXTENSIONS)
+
+def _load_chunks(checkpoint_dir: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str], float]:
+    """
+    Segments, language and audio offset saved by an interrupted
+    transcription. A chunk that can't be read is removed with every chunk
+    after it, so those windows are transcribed and numbered again.
     """
-    Transcribes audio from a given file using the Faster Whisper model.
+    segments, language, offset = [], None, 0.0
+    if checkpoint_dir:
+        paths = sorted(glob.glob(os.path.join(checkpoint_dir, "*.json")))
+        for index, path in enumerate(paths):
+            chunk = _load_json(path)
+            if chunk is None:
+                for stale in paths[index:]:
+                    os.remove(stale)
+                break
+            segments.extend(chunk["segments"])
+            language, offset = chunk["language"], chunk["offset"]
+    return segments, language, offset
+
+def transcribe_audio(model, audio_path: Union[str, np.ndarray], window_seconds: Optional[float] = None,
+                     checkpoint_dir: Optional[str] = None, language: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Transcribes audio from a given file, or already decoded 16 kHz samples,
+    using the Faster Whisper model.
+
+    Files are decoded and transcribed window by window. The last segment
+    of a window may be cut off mid-sentence, so it is transcribed again as
+    the start of the next window, with the segments before it as the
+    prompt. Peak memory is set by the window, not the length of the audio.
+
+    With a checkpoint_dir, each finished window's segments are saved there,
+    and a later call continues from the audio after the last saved window.
+    language, when known (say, from the video's metadata), skips detection
+    and picks the model; otherwise it is detected on the first window.
     Returns the transcription result.
     """
     try:
-        segments, info = model.transcribe(audio_path, beam_size=5)
+        # offset is the seconds of audio before the start of buffer
+        segments, saved_language, offset = _load_chunks(checkpoint_dir)
+        language = saved_language or language
+        chunk_index = len(glob.glob(os.path.join(checkpoint_dir, "*.json"))) if checkpoint_dir else 0
+        if offset:
+            logger.info("Resuming transcription at %.1fs", offset, extra={"stage": "transcribe"})
+
+        if isinstance(audio_path, np.ndarray):
+            windows = iter([audio_path[int(offset * SAMPLE_RATE):]])
+        else:
+            windows = iter_audio_windows(audio_path, window_seconds or TRANSCRIBE_WINDOW_SECONDS, start_seconds=offset)
+
+        buffer = next(windows, None)
+        while buffer is not None:
+            upcoming = next(windows, None)
+            prompt = "".join(segment["text"] for segment in segments[-CONTEXT_SEGMENTS:]) or None
+            # segments is a generator, so collect it once for both the text and the timings
+            window_segments, info = model.transcribe(buffer, beam_size=5, language=language, initial_prompt=prompt)
+            window_segments = list(window_segments)
+            language = language or info.language
+
+            # Unless this is the end of the audio, leave the last segment to the next window
+            committed = window_segments if upcoming is None or len(window_segments) < 2 else window_segments[:-1]
+            new_segments = [{"start": offset + s.start, "end": offset + s.end, "text": s.text} for s in committed]
+            segments.extend(new_segments)
+            if upcoming is None:
+                break
+            cut = int(committed[-1].end * SAMPLE_RATE) if len(committed) < len(window_segments) else len(buffer)
+            offset += cut / SAMPLE_RATE
+            buffer = np.concatenate([buffer[cut:], upcoming])
+            if checkpoint_dir:
+                _write_json(os.path.join(checkpoint_dir, f"{chunk_index:05d}.json"),
+                            {"segments": new_segments, "language": language, "offset": offset})
+                chunk_index += 1
         
-        full_text = ""
-        for segment in segments:
-            full_text += segment.text
+        full_text = "".join(segment["text"] for segment in segments)
         
-        return {"text": full_text, "language": info.language, "segments": [s._asdict() for s in segments]}
+        return {"text": full_text, "language": language, "segments": segments}
     except Exception as e:
-        print(f"Error transcribing audio: {e}")
+        logger.error("Error transcribing audio: %s", e)
         raise
 
+def _write_json(path: str, data: Any, indent: Optional[int] = None):
+    # Written beside the target and renamed over it, so a crash never leaves a half-written checkpoint
+    os.makedirs(os.path.dirname(path), exist_ok=True) # Ensure directory exists
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path), delete=False) as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(f.name, path)
+
 def save_transcript_to_json(transcript: Dict[str, Any], output_path: str):
     """
     Saves the transcription result to a JSON file.
     """
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True) # Ensure directory exists
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(transcript, f, ensure_ascii=False, indent=4)
-        print(f"Transcript saved to {output_path}")
+        _write_json(output_path, transcript, indent=4)
+        logger.info("Transcript saved to %s", output_path)
     except Exception as e:
-        print(f"Error saving transcript: {e}")
+        logger.error("Error saving transcript: %s", e)
         raise
 
+def extract_and_save_recipe(transcript: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+    """
+    Extracts structured recipe fields from a transcript and saves them
+    next to it.
+    """
+    started = time.perf_counter()
+    recipe = extract_recipe(transcript)
+    logger.info("Recipe extracted: %s ingredients, %s steps", len(recipe["ingredients"]), len(recipe["instructions"]),
+                extra={"stage": "extract", "latency_ms": _elapsed_ms(started)})
+    save_transcript_to_json(recipe, output_path)
+    return recipe
+
 def extract_subtitles(url: str, output_base_path: str) -> Optional[str]:
     """
     Extracts subtitles from a given URL using yt-dlp.
-    Returns the path to the downloaded subtitle file (e.g., .srt) if found, else None.
+    Returns the path to the downloaded subtitle file (.srt or .vtt) if found, else None.
     """
-    # yt-dlp will save subtitles with a name like <video_title>.<lang>.<ext>
-    # We'll let yt-dlp determine the filename and then find it.
-    
-    # Use a temporary output template that yt-dlp will use to name the file
-    # This will be in the same directory as output_base_path
-    temp_output_template = os.path.join(os.path.dirname(output_base_path), "%(title)s.%(ext)s")
-
+    # yt-dlp saves subtitles as <output_base_path>.<lang>.<ext>
     ydl_opts = {
+        'writesubtitles': True,
         'writeautomaticsub': True,
-        'subtitlesformat': 'srt',
+        # YouTube serves auto-captions as VTT only, and converting needs ffmpeg
+        'subtitlesformat': 'srt/vtt/best',
         'skip_download': True, # Don't download the video itself
-        'outtmpl': temp_output_template, # This sets the base name for the output file
+        'outtmpl': output_base_path, # This sets the base name for the output file
         'quiet': True,
         'no_warnings': True,
     }
@@ -91,84 +260,339 @@ def extract_subtitles(url: str, output_base_path: str) -> Optional[str]:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info_dict = ydl.extract_info(url, download=True)
             
-            # yt-dlp typically appends the language code and extension to the outtmpl.
-            # For example, if output_path is 'my_video_subtitles', and the language is 'en',
-            # the file might be saved as 'my_video_subtitles.en.srt'.
-            # We can try to infer the full path based on common yt-dlp behavior.
+            # yt-dlp appends the language code and extension to the outtmpl.
+            # For example, if output_base_path is 'my_video_subtitles', and the language is 'en',
+            # the file is saved as 'my_video_subtitles.en.srt'.
 
             # Get the base output directory and filename prefix
-            output_dir = os.path.dirname(output_path) if os.path.dirname(output_path) else '.'
-            filename_prefix = os.path.basename(output_path)
+            output_dir = os.path.dirname(output_base_path) if os.path.dirname(output_base_path) else '.'
+            filename_prefix = os.path.basename(output_base_path)
 
-            # Check for the expected .srt file in the output directory
-            # We'll look for files that start with our prefix and end with '.srt'
-            for filename in os.listdir(output_dir):
-                if filename.startswith(filename_prefix) and filename.endswith('.srt'):
+            # Look for files that start with our prefix and end with a subtitle extension
+            for filename in sorted(os.listdir(output_dir)):
+                if filename.startswith(filename_prefix) and filename.endswith(('.srt', '.vtt')):
                     return os.path.join(output_dir, filename)
 
     except yt_dlp.DownloadError as e:
-        print(f"Error downloading subtitles: {e}")
+        logger.warning("Error downloading subtitles: %s", e)
         return None
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.error("An unexpected error occurred: %s", e)
         return None
     
     return None
 
-def process_video_url(url: str, model=None) -> Dict[str, Any]:
+def index_transcript(search_index, run_id: str, transcript: Dict[str, Any], recipe: Dict[str, Any]):
+    """
+    Adds a saved transcript to the search index. Indexing problems are
+    logged rather than failing the request.
+    """
+    if search_index is None:
+        return
+    started = time.perf_counter()
+    try:
+        search_index.add(run_id, transcript.get("url"), transcript, recipe)
+        logger.info("Transcript indexed", extra={"stage": "index", "latency_ms": _elapsed_ms(started)})
+    except Exception as e:
+        logger.error("Error indexing transcript: %s", e)
+
+def fingerprint_audio(audio_file: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Fingerprints an audio file, decoding it one window at a time.
+    Returns the fingerprint, plus the decoded samples when the whole file
+    fit in a single window, so short clips aren't decoded twice.
+    """
+    kept = []
+
+    def windows():
+        for index, window in enumerate(iter_audio_windows(audio_file, TRANSCRIBE_WINDOW_SECONDS)):
+            if index == 0:
+                kept.append(window)
+            elif kept:
+                kept.clear()
+            yield window
+
+    fingerprint = fingerprint_windows(windows(), SAMPLE_RATE)
+    return fingerprint, (kept[0] if kept else None)
+
+def find_reposted_transcript(fingerprint_index, fingerprint) -> Optional[Dict[str, Any]]:
+    """
+    Looks a clip's fingerprint up in the index and loads the transcript of
+    the matching clip, if there is one and it is still on disk.
+    """
+    if fingerprint_index is None:
+        return None
+    fingerprint_lookups.inc()
+    match = fingerprint_index.lookup(fingerprint)
+    if match is None or not os.path.exists(match["transcript_path"]):
+        return None
+
+    with open(match["transcript_path"], "r", encoding="utf-8") as f:
+        transcript = json.load(f)
+    fingerprint_matches.inc()
+    transcription_seconds_saved.inc(match["transcribe_seconds"] or 0)
+    logger.info("Audio matches %s (bit error rate %s), reusing its transcript",
+                match["url"] or match["run_id"], match["bit_error_rate"], extra={"stage": "fingerprint"})
+    transcript["reused_from"] = match["url"] or match["run_id"]
+    return transcript
+
+def probe_video(url: str) -> Dict[str, Any]:
+    """
+    Looks a video up with yt-dlp without downloading anything.
+    Returns its ID, extractor, title, duration, language and whether it
+    has subtitles.
+    """
+    ydl_opts = {
+        'skip_download': True,
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info_dict = ydl.extract_info(url, download=False)
+    return {
+        "id": info_dict.get("id"),
+        "extractor": info_dict.get("extractor_key") or info_dict.get("extractor"),
+        "title": info_dict.get("title"),
+        "duration": info_dict.get("duration"),
+        "has_subtitles": bool(info_dict.get("subtitles") or info_dict.get("automatic_captions")),
+        # Spoken language as the site reports it ("en", "en-US"), often missing
+        "language": (info_dict.get("language") or "").split("-")[0].lower() or None,
+    }
+
+def _probe_cache_path(url: str) -> str:
+    return os.path.join(SAVE_BASE_DIR, "probes", hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".json")
+
+def cached_probe(url: str) -> Dict[str, Any]:
+    """
+    probe_video(), answered from the probe cache when the URL was probed
+    less than PROBE_CACHE_TTL seconds ago. Concurrent probes of one URL,
+    say a prefetch and the request behind it, take turns, so the second
+    is answered from the first's result.
+    """
+    cache_path = _probe_cache_path(url)
+    probe = _fresh_probe(cache_path)
+    if probe is not None:
+        return probe
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            probe = _fresh_probe(cache_path)
+            if probe is None:
+                probe = probe_video(url)
+                _write_json(cache_path, probe)
+            return probe
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _fresh_probe(cache_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        if time.time() - os.path.getmtime(cache_path) >= PROBE_CACHE_TTL:
+            return None
+    except OSError:
+        return None
+    probe = _load_json(cache_path)
+    if probe is not None:
+        probe_cache_hits.inc()
+    return probe
+
+def video_key(probe: Dict[str, Any], url: str) -> str:
+    """
+    Directory name for a video's checkpoints: the same for every URL
+    form of one video (youtu.be, shorts/, watch?v=), so a retry finds them.
+    """
+    if probe.get("id") and probe.get("extractor"):
+        return re.sub(r"[^A-Za-z0-9_-]", "_", f"{probe['extractor'].lower()}-{probe['id']}")
+    return "url-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+@contextmanager
+def _video_lock(save_dir: str, blocking: bool = True):
+    # Two requests for one video (say, in two workers) take turns; the second finds the first's results.
+    # Yields whether the lock was taken, which without blocking it may not be.
+    with open(os.path.join(save_dir, ".lock"), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _find_file(save_dir: str, prefix: str, extensions: Tuple[str, ...]) -> Optional[str]:
+    for filename in sorted(os.listdir(save_dir)):
+        if filename.startswith(prefix) and filename.endswith(extensions):
+            return os.path.join(save_dir, filename)
+    return None
+
+def _load_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def process_video_url(url: str, model=None, search_index=None, fingerprint_index=None) -> Dict[str, Any]:
     """
     Main pipeline to get transcript from URL.
     Prioritizes extracting subtitles, falls back to audio transcription.
-    Accepts a pre-loaded Whisper model.
+    Accepts a pre-loaded Whisper model, a SearchIndex to add the transcript
+    to once it is saved, and a FingerprintIndex used to reuse the
+    transcript of the same audio posted under another URL.
+
+    Runs as PIPELINE_STAGES, each leaving a checkpoint in a directory
+    keyed by video ID: probe.json, the subtitle or audio file,
+    fingerprint.npy, one file per transcribed window, transcript.json and
+    recipe.json. A retry after a timeout or a recycled instance resumes
+    after the last completed stage, and a video already processed is
+    answered from its saved results.
     """
-    import uuid
-    run_id = str(uuid.uuid4())
+    logger.info("Processing URL: %s", url, extra={"stage": "received"})
 
+    # 1. Probe: find the video's ID, which keys every checkpoint
+    started = time.perf_counter()
+    probe = cached_probe(url)
+    run_id = video_key(probe, url)
     save_dir = os.path.join(SAVE_BASE_DIR, run_id)
     os.makedirs(save_dir, exist_ok=True)
+    save_transcript_to_json(probe, os.path.join(save_dir, "probe.json"))
+    logger.info("Probed video %s", run_id, extra={"stage": "probe", "latency_ms": _elapsed_ms(started)})
+
+    with _video_lock(save_dir):
+        return _run_stages(url, run_id, save_dir, probe, model, search_index, fingerprint_index)
 
+def prefetch_video(url: str) -> bool:
+    """
+    Runs only the probe and subtitle stages, so that a later
+    process_video_url for the URL finds both checkpoints and starts at
+    the download or the extraction. Skips a video another request is
+    already working on.
+
+    Returns whether the subtitle stage ran.
+    """
+    probe = cached_probe(url)
+    run_id = video_key(probe, url)
+    save_dir = os.path.join(SAVE_BASE_DIR, run_id)
+    os.makedirs(save_dir, exist_ok=True)
+    save_transcript_to_json(probe, os.path.join(save_dir, "probe.json"))
+    if not probe.get("has_subtitles"):
+        return False
+
+    with _video_lock(save_dir, blocking=False) as locked:
+        if not locked or os.path.exists(os.path.join(save_dir, "transcript.json")):
+            return False
+        if _find_file(save_dir, "subtitle", (".srt", ".vtt")) is None:
+            started = time.perf_counter()
+            extract_subtitles(url, os.path.join(save_dir, "subtitle"))
+            logger.info("Subtitles prefetched", extra={"stage": "subtitles", "latency_ms": _elapsed_ms(started)})
+        return True
+
+def _run_stages(url: str, run_id: str, save_dir: str, probe: Dict[str, Any], model, search_index,
+                fingerprint_index) -> Dict[str, Any]:
     transcript_output_path = os.path.join(save_dir, "transcript.json")
-    
-    print(f"Processing URL: {url}")
-
-    # 1. Try to extract subtitles first
-    subtitle_file = extract_subtitles(url, os.path.join(save_dir, "subtitle"))
-    if subtitle_file:
-        print(f"Subtitles found and downloaded to: {subtitle_file}")
-        # Directly read the SRT file
-        with open(subtitle_file, 'r', encoding='utf-8') as f:
-            transcript_text = f.read()
-        
-        transcript = {"text": transcript_text, "source": "subtitles"}
-        save_transcript_to_json(transcript, transcript_output_path)
-        print(f"Transcript saved from subtitles to: {transcript_output_path}")
+    recipe_output_path = os.path.join(save_dir, "recipe.json")
+
+    transcript = _load_json(transcript_output_path)
+    recipe = _load_json(recipe_output_path)
+    if transcript is not None and recipe is not None:
+        logger.info("Video %s already processed, returning saved results", run_id, extra={"stage": "save"})
         return {
             "transcript": transcript,
+            "recipe": recipe,
             "transcript_file_path": transcript_output_path,
-            "source": "subtitles"
+            "source": transcript.get("source", "audio_transcription"),
         }
-    else:
-        print("No subtitles found, falling back to audio transcription.")
-        # 2. Fallback to audio download and transcription
-        # The model is passed from main.py, so no need to load it here
-        # if model is None:
-        #     print("Loading Whisper model for audio transcription...")
-        #     model = whisper.load_model("tiny")
-        #     print("Whisper model loaded.")
 
-        audio_output_path = os.path.join(save_dir, "audio")
-        audio_file = download_audio(url, audio_output_path)
-        print(f"Audio downloaded to: {audio_file}")
+    audio_file = None
+    if transcript is None:
+        # 2. Subtitles, when the video has any
+        subtitle_file = _find_file(save_dir, "subtitle", (".srt", ".vtt"))
+        if subtitle_file is None and probe.get("has_subtitles"):
+            started = time.perf_counter()
+            subtitle_file = extract_subtitles(url, os.path.join(save_dir, "subtitle"))
+            logger.info("Subtitle lookup finished", extra={"stage": "subtitles", "latency_ms": _elapsed_ms(started)})
 
-        transcript = transcribe_audio(model, audio_file)
-        print("Audio transcribed.")
+        if subtitle_file:
+            logger.info("Subtitles found and downloaded to: %s", subtitle_file)
+            with open(subtitle_file, 'r', encoding='utf-8') as f:
+                subtitle_text = f.read()
+            
+            # Plain text and timed segments, with auto-captions' rolling repeats removed
+            transcript = captions_to_transcript(subtitle_text)
+            if transcript["segments"]:
+                transcript["source"] = "subtitles"
+            else:
+                # Saving an empty transcript would mark the video done with no text
+                logger.warning("No cues could be parsed from %s, falling back to audio transcription.", subtitle_file)
+                transcript = None
+        else:
+            logger.info("No subtitles found, falling back to audio transcription.")
+        if transcript is None:
+            transcript, audio_file = _transcribe_stages(url, run_id, save_dir, model, fingerprint_index,
+                                                        probe.get("language"), probe.get("duration"))
 
+        # 6. Save: the transcript is the checkpoint that makes the audio stages unnecessary
+        transcript["url"] = url
         save_transcript_to_json(transcript, transcript_output_path)
-        print(f"Transcript saved from audio to: {transcript_output_path}")
+        logger.info("Transcript saved to: %s", transcript_output_path, extra={"stage": "save"})
+        shutil.rmtree(os.path.join(save_dir, "chunks"), ignore_errors=True)
+    else:
+        logger.info("Resuming %s from its saved transcript", run_id, extra={"stage": "save"})
 
-        return {
-            "transcript": transcript,
-            "audio_file_path": audio_file,
-            "transcript_file_path": transcript_output_path,
-            "source": "audio_transcription"
-        }
+    # 7. Extract
+    recipe = extract_and_save_recipe(transcript, recipe_output_path)
+    index_transcript(search_index, run_id, transcript, recipe)
+
+    result = {
+        "transcript": transcript,
+        "recipe": recipe,
+        "transcript_file_path": transcript_output_path,
+        "source": transcript.get("source", "audio_transcription"),
+    }
+    if audio_file:
+        result["audio_file_path"] = audio_file
+    return result
+
+def _transcribe_stages(url: str, run_id: str, save_dir: str, model, fingerprint_index,
+                       language: Optional[str] = None, duration: Optional[float] = None) -> Tuple[Dict[str, Any], str]:
+    """
+    Download, decode (fingerprint) and transcribe, each skipped when its
+    checkpoint is already in save_dir.
+    """
+    # 3. Download; yt-dlp also resumes a partial .part file left by an interrupted attempt
+    audio_file = _find_file(save_dir, "audio", AUDIO_EXTENSIONS)
+    if audio_file is None:
+        started = time.perf_counter()
+        audio_file = download_audio(url, os.path.join(save_dir, "audio"), duration)
+        logger.info("Audio downloaded to: %s", audio_file, extra={"stage": "download", "latency_ms": _elapsed_ms(started)})
+
+    # 4. Decode and fingerprint
+    fingerprint_path = os.path.join(save_dir, "fingerprint.npy")
+    samples = None
+    if os.path.exists(fingerprint_path):
+        fingerprint = np.load(fingerprint_path)
+    else:
+        started = time.perf_counter()
+        fingerprint, samples = fingerprint_audio(audio_file)
+        np.save(fingerprint_path, fingerprint)
+        logger.info("Audio fingerprinted", extra={"stage": "decode", "latency_ms": _elapsed_ms(started)})
+
+    transcript = find_reposted_transcript(fingerprint_index, fingerprint)
+    if transcript is not None:
+        transcript["source"] = "fingerprint_match"
+        return transcript, audio_file
+
+    # 5. Transcribe, checkpointing each window
+    started = time.perf_counter()
+    # Short audio was kept from the fingerprint pass; longer audio is decoded again, window by window
+    transcript = transcribe_audio(model, samples if samples is not None else audio_file,
+                                  checkpoint_dir=os.path.join(save_dir, "chunks"), language=language)
+    elapsed = time.perf_counter() - started
+    transcription_seconds.observe(elapsed)
+    logger.info("Audio transcribed.", extra={"stage": "transcribe", "latency_ms": _elapsed_ms(started)})
+    transcript["source"] = "audio_transcription"
+    if fingerprint_index is not None:
+        fingerprint_index.add(run_id, url, fingerprint, os.path.join(save_dir, "transcript.json"), elapsed)
+    return transcript, audio_file
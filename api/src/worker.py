@@ -0,0 +1,151 @@
+"""
+Runs /process-url jobs from the shared job queue.
+
+An API started with API_MODE=frontend only queues jobs and serves their
+results; workers started here do the pipeline work. Each worker loads
+the Whisper model once (or uses the shared one under src.serve) and runs
+--concurrency jobs at a time, renewing their leases until they finish.
+Scale them independently of the front end. Run from api/:
+
+    JOB_QUEUE=redis JOB_QUEUE_URL=redis://queue:6379/0 python -m src.worker --concurrency 2
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+
+from .fingerprint import FINGERPRINT_INDEX_PATH, FingerprintIndex
+from .inference import INFERENCE_ADDRESS, INFERENCE_AUTHKEY, RemoteWhisperModel, load_whisper_model
+from .job_queue import JOB_QUEUE, Job, JobQueue, create_job_queue
+from .logger import log_context, setup_logger
+from .responses import build_payload
+from .video_pipeline import process_video_url
+
+logger = setup_logger()
+
+# Seconds an idle worker waits before asking the queue again
+WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1"))
+
+
+class Worker:
+    """
+    Leases jobs from a queue and runs the pipeline on them in `concurrency`
+    threads. A separate thread renews the leases of running jobs every
+    third of the lease, so only a worker that died loses its jobs.
+    """
+
+    def __init__(self, queue: JobQueue, model, fingerprint_index=None, concurrency: int = 1,
+                 poll_interval: float = WORKER_POLL_INTERVAL):
+        self.queue = queue
+        self.model = model
+        self.fingerprint_index = fingerprint_index
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.id = f"{socket.gethostname()}-{os.getpid()}"
+        self.stopping = threading.Event()
+        self._stopped = threading.Event()
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Works until stop() is called, then returns once running jobs have finished."""
+        threads = [threading.Thread(target=self._work, name=f"job-{i}") for i in range(self.concurrency)]
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        for thread in threads:
+            thread.start()
+        heartbeat.start()
+        logger.info("Worker %s running %s job(s) at a time", self.id, self.concurrency)
+        for thread in threads:
+            thread.join()
+        self._stopped.set()
+        heartbeat.join()
+
+    def stop(self):
+        """Stops taking new jobs; jobs already running finish."""
+        self.stopping.set()
+
+    def _work(self):
+        while not self.stopping.is_set():
+            try:
+                job = self.queue.lease(self.id)
+            except Exception as e:
+                logger.error("Could not lease a job: %s", e)
+                job = None
+            if job is None:
+                self.stopping.wait(self.poll_interval)
+                continue
+            with self._lock:
+                self._held.add(job.id)
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._held.discard(job.id)
+
+    def _run(self, job: Job):
+        url = job.payload["url"]
+        with log_context(request_id=job.id[:12], url=url):
+            logger.info("Running job %s, attempt %s", job.id, job.attempts)
+            try:
+                result = process_video_url(url, self.model, None, self.fingerprint_index)
+                payload = build_payload(url, result)
+                # Lets the front end index the transcript for /search under its video ID
+                payload["run_id"] = os.path.basename(os.path.dirname(result["transcript_file_path"]))
+            except Exception as e:
+                logger.exception("Job %s failed: %s", job.id, e)
+                self.queue.fail(job.id, self.id, str(e))
+                return
+            if not self.queue.complete(job.id, self.id, payload):
+                logger.warning("Job %s finished after its lease was lost; the result was discarded", job.id)
+
+    def _heartbeat(self):
+        while not self._stopped.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                held = list(self._held)
+            for job_id in held:
+                try:
+                    if not self.queue.heartbeat(job_id, self.id):
+                        logger.warning("Lost the lease on job %s", job_id)
+                except Exception as e:
+                    logger.error("Could not renew the lease on job %s: %s", job_id, e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("WORKER_CONCURRENCY", "1")))
+    args = parser.parse_args()
+    if JOB_QUEUE == "memory":
+        parser.error("JOB_QUEUE must be sqlite or redis, shared with the API front end")
+
+    if INFERENCE_ADDRESS:
+        model = RemoteWhisperModel(INFERENCE_ADDRESS, bytes.fromhex(INFERENCE_AUTHKEY))
+    else:
+        logger.info("Loading Faster Whisper model...")
+        model = load_whisper_model(args.concurrency)
+    fingerprint_index = FingerprintIndex(FINGERPRINT_INDEX_PATH)
+    queue = create_job_queue()
+    worker = Worker(queue, model, fingerprint_index, args.concurrency)
+
+    # Finish the running jobs on SIGTERM; a second signal exits at once and
+    # their leases expire, handing them to another worker
+    def shut_down(signum, frame):
+        if worker.stopping.is_set():
+            sys.exit(1)
+        logger.info("Stopping after the running jobs")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, shut_down)
+    signal.signal(signal.SIGINT, shut_down)
+    try:
+        worker.run()
+    finally:
+        queue.close()
+        fingerprint_index.close()
+        if isinstance(model, RemoteWhisperModel):
+            model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,246 @@
 import aiohttp
+import asyncio
 import json
+import uuid
 from typing import Optional, Dict, Any
-import google.auth.transport.requests
-import google.oauth2.id_token
-from utils.logger import setup_logger
+from urllib.parse import urljoin
+from utils.logger import setup_logger, get_log_context
+from utils.retry import APIError, RetryBudget, RetryPolicy, hedged
 from config import Config
 
 logger = setup_logger()
 
+# Statuses where the API itself is unavailable, rather than failing on the video
+RETRYABLE_STATUSES = (502, 503, 504)
+
 class ExperienceAPIClient:
     """Client for communicating with the Experience API."""
-
+    
     def __init__(self):
         # Config should provide the full URL of the Cloud Run service, including 'https://'
         self.api_full_url = Config.API_BASE_URL
         self.timeout = Config.API_TIMEOUT
         self._session: Optional[aiohttp.ClientSession] = None # Initialize aiohttp session
         self._id_token: Optional[str] = None # To store the fetched ID token
-
+        self._session_lock = asyncio.Lock()
+        self.retry_policy = RetryPolicy(
+            max_attempts=Config.API_MAX_ATTEMPTS,
+            base_delay=Config.API_RETRY_BASE_DELAY,
+            max_delay=Config.API_RETRY_MAX_DELAY,
+            budget=RetryBudget(ratio=Config.API_RETRY_BUDGET_RATIO)
+        )
+    
+    def _fetch_id_token(self) -> Optional[str]:
+        """Fetch a Google ID token for the API. Blocking, so call it from an executor."""
+        # Imported lazily, google.auth pulls in requests and adds ~100ms to import time
+        import google.auth.transport.requests
+        import google.oauth2.id_token
+        
+        # The target audience for the ID token is the full URL of the Cloud Run service.
+        target_audience = self.api_full_url
+        auth_req = google.auth.transport.requests.Request()
+        return google.oauth2.id_token.fetch_id_token(auth_req, target_audience)
+    
     async def _get_authenticated_session(self) -> aiohttp.ClientSession:
         """
         Ensures an authenticated aiohttp session exists.
         Fetches a new ID token if one doesn't exist or if the session needs to be re-created.
         """
-        # Check if the session needs to be created or re-created
-        if self._session is None or self._session.closed:
-            logger.info("Creating a new authenticated aiohttp session.")
-            try:
-                # The target audience for the ID token is the full URL of the Cloud Run service.
-                # This call is synchronous, but typically fast and handled once per session creation.
-                target_audience = self.api_full_url
-                auth_req = google.auth.transport.requests.Request()
-                self._id_token = google.oauth2.id_token.fetch_id_token(auth_req, target_audience)
-
-                if not self._id_token:
-                    raise Exception("Failed to fetch ID token for authentication.")
-
-            except Exception as e:
-                logger.error(f"Error fetching ID token: {e}", exc_info=True)
-                raise 
-
-            headers = {
-                "Authorization": f"Bearer {self._id_token}",
-                "Content-Type": "application/json" # Essential for JSON payloads
-            }
-            # Create a new aiohttp ClientSession with the authentication headers and timeout
-            self._session = aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout))
-        return self._session
-
-    async def _make_request(self, method: str, endpoint: str, payload: Optional[Dict[Any, Any]] = None, retry_count: int = 0) -> Optional[Dict[Any, Any]]:
+        # Serialize creation so warm-up and a first request don't both fetch a token
+        async with self._session_lock:
+            # Check if the session needs to be created or re-created
+            if self._session is None or self._session.closed:
+                headers = {
+                    "Content-Type": "application/json" # Essential for JSON payloads
+                }
+                # A local API (development, load tests) takes requests without a token
+                if Config.API_AUTH != 'none':
+                    logger.info("Creating a new authenticated aiohttp session.")
+                    try:
+                        # The token fetch is a blocking network call, so run it off the event loop.
+                        loop = asyncio.get_running_loop()
+                        self._id_token = await loop.run_in_executor(None, self._fetch_id_token)
+                        
+                        if not self._id_token:
+                            raise Exception("Failed to fetch ID token for authentication.")
+                    
+                    except Exception as e:
+                        logger.error("Error fetching ID token: %s", e, exc_info=True)
+                        raise 
+                    
+                    headers["Authorization"] = f"Bearer {self._id_token}"
+                # Create a new aiohttp ClientSession with the authentication headers and timeout
+                self._session = aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout))
+            return self._session
+    
+    async def _make_request(self, method: str, endpoint: str, payload: Optional[Dict[Any, Any]] = None,
+                            params: Optional[Dict[str, Any]] = None,
+                            idempotency_key: Optional[str] = None) -> Optional[Dict[Any, Any]]:
+        """
+        Internal helper to make authenticated API requests, retried under
+        the client's RetryPolicy.
+        
+        POSTs carry an Idempotency-Key that stays the same across retries,
+        so a retry after a timeout or a dropped connection attaches to the
+        job the API is already running instead of starting it again.
         """
-        Internal helper to make authenticated API requests with retry logic.
+        full_endpoint_url = f'{self.api_full_url.rstrip("/")}{endpoint}'
+        
+        # Lets the API tag its logs with the same request ID
+        headers = {}
+        request_id = get_log_context('request_id')
+        if request_id:
+            headers["X-Request-ID"] = request_id
+        if method == "POST":
+            headers["Idempotency-Key"] = idempotency_key or uuid.uuid4().hex
+        
+        return await self.retry_policy.run(
+            lambda: self._send_request(method, full_endpoint_url, payload, params, headers)
+        )
+    
+    async def _send_request(self, method: str, url: str, payload: Optional[Dict[Any, Any]],
+                            params: Optional[Dict[str, Any]], headers: Dict[str, str]) -> Optional[Dict[Any, Any]]:
+        """
+        One attempt at a request. Failures are raised as APIErrors marked
+        retryable or not.
         """
         try:
             session = await self._get_authenticated_session()
-            full_endpoint_url = f'{self.api_full_url.rstrip("/")}{endpoint}'
-            logger.info(f"Sending {method} request to: {full_endpoint_url}")
-
-            async with session.request(method, full_endpoint_url, json=payload) as response:
-                logger.info(f"API response status: {response.status}")
-
+            logger.info("Sending %s request to: %s", method, url)
+            
+            async with session.request(method, url, json=payload, params=params, headers=headers) as response:
+                logger.info("API response status: %s", response.status)
+                
                 if response.status == 200:
                     return await response.json()
-                elif response.status == 401 and retry_count == 0:
-                    logger.warning("API token potentially expired (401). Attempting to refresh token and retry.")
-                    await self.close() # Force session and token refresh
-                    return await self._make_request(method, endpoint, payload, retry_count=1) # Retry once
-                elif response.status == 400:
-                    error_data = await response.text()
-                    logger.warning(f"Bad request to API (400): {error_data}")
-                    raise Exception(f"Invalid video URL or unsupported platform: {error_data}")
-                elif response.status == 404:
-                    logger.warning("API endpoint not found (404). Check API_FULL_URL and API_ENDPOINT.")
-                    raise Exception("API service unavailable or endpoint not found.")
-                elif response.status == 429:
-                    logger.warning("API rate limit exceeded (429).")
-                    raise Exception("Too many requests. Please try again later.")
-                elif response.status >= 500:
-                    error_text = await response.text()
-                    logger.error(f"API server error ({response.status}): {error_text}")
-                    raise Exception(f"API server error. Please try again later. Details: {error_text}")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Unexpected API response {response.status}: {error_text}")
-                    raise Exception(f"Unexpected API response: {response.status} - {error_text}")
-
+                if response.status != 202:
+                    await self._raise_for_status(response)
+                job = await response.json()
+                location = response.headers.get("Location", f"/jobs/{job['job_id']}")
+            
+            # Queued for a worker (API_MODE=frontend): poll the job until it finishes
+            return await self._wait_for_job(session, urljoin(url, location), params, headers)
+        
+        except APIError:
+            raise
+        # Checked before ClientError: aiohttp's timeout errors are both
+        except asyncio.TimeoutError:
+            logger.error("API request timed out.")
+            raise APIError("Request timed out. The video might be too long to process or the API is slow.",
+                           retryable=True)
+        except aiohttp.ClientConnectionError as e:
+            logger.warning("Network error during API request: %s", e)
+            raise APIError(f"Network error. Please check your connection. Details: {e}", retryable=True)
         except aiohttp.ClientError as e:
-            if isinstance(e, aiohttp.ClientTimeout):
-                logger.error("API request timed out.")
-                raise Exception("Request timed out. The video might be too long to process or the API is slow.")
-            elif retry_count == 0:
-                logger.warning(f"Network error during API request: {e}. Attempting to recreate session and retry.", exc_info=True)
-                await self.close() # Force session recreation
-                return await self._make_request(method, endpoint, payload, retry_count=1) # Retry once
-            else:
-                logger.error(f"Persistent network error during API request: {e}", exc_info=True)
-                raise Exception(f"Network error. Please check your connection. Details: {e}")
+            logger.error("API request failed: %s", e, exc_info=True)
+            raise APIError(f"Network error. Please check your connection. Details: {e}")
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON response from API: {e}", exc_info=True)
-            raise Exception("Invalid response from API: Expected JSON but received malformed data.")
+            logger.error("Invalid JSON response from API: %s", e, exc_info=True)
+            raise APIError("Invalid response from API: Expected JSON but received malformed data.")
         except Exception as e:
-            logger.error(f"An unexpected error occurred in API client: {e}", exc_info=True)
-            raise Exception(f"An unexpected error occurred during API call: {e}")
-
+            logger.error("An unexpected error occurred in API client: %s", e, exc_info=True)
+            raise APIError(f"An unexpected error occurred during API call: {e}")
+    
+    async def _raise_for_status(self, response: aiohttp.ClientResponse):
+        """Raises the APIError for a response that isn't a success."""
+        if response.status == 401:
+            logger.warning("API token potentially expired (401). Refreshing the token before retrying.")
+            await self.close() # Force session and token refresh
+            raise APIError("API rejected the request's credentials.", retryable=True, status=401)
+        elif response.status == 400:
+            error_data = await response.text()
+            logger.warning("Bad request to API (400): %s", error_data)
+            raise APIError(f"Invalid video URL or unsupported platform: {error_data}", status=400)
+        elif response.status == 404:
+            logger.warning("API endpoint not found (404). Check API_FULL_URL and API_ENDPOINT.")
+            raise APIError("API service unavailable or endpoint not found.", status=404)
+        elif response.status == 429:
+            logger.warning("API rate limit exceeded (429).")
+            raise APIError("Too many requests. Please try again later.", retryable=True, status=429)
+        elif response.status >= 500:
+            error_text = await response.text()
+            logger.error("API server error (%s): %s", response.status, error_text)
+            # 500 is the pipeline failing on this video; the rest are the service being unavailable
+            raise APIError(f"API server error. Please try again later. Details: {error_text}",
+                           retryable=response.status in RETRYABLE_STATUSES, status=response.status)
+        else:
+            error_text = await response.text()
+            logger.error("Unexpected API response %s: %s", response.status, error_text)
+            raise APIError(f"Unexpected API response: {response.status} - {error_text}", status=response.status)
+    
+    async def _wait_for_job(self, session: aiohttp.ClientSession, job_url: str, params: Optional[Dict[str, Any]],
+                            headers: Dict[str, str]) -> Optional[Dict[Any, Any]]:
+        """
+        Polls a job the API queued until it finishes, for up to API_JOB_TIMEOUT seconds.
+        
+        Returns:
+            The job's result, the same body a 200 from the original request carries
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.API_JOB_TIMEOUT
+        headers = {name: value for name, value in headers.items() if name != "Idempotency-Key"}
+        while loop.time() < deadline:
+            await asyncio.sleep(Config.API_POLL_INTERVAL)
+            async with session.get(job_url, params=params, headers=headers) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status != 202:
+                    await self._raise_for_status(response)
+        logger.error("Gave up waiting for API job %s", job_url)
+        raise APIError("The video is taking too long to process. Please try again later.")
+    
     async def process_video(self, video_url: str) -> Optional[Dict[Any, Any]]:
         """
         Sends a video URL to the Experience API for processing.
+        Only the fields in API_RESPONSE_FIELDS are requested, which keeps
+        the transcript of long videos out of the response.
         """
         payload = {
             "video_url": video_url,
             "source": "discord_bot"
         }
-        return await self._make_request("POST", Config.API_ENDPOINT, payload)
-
+        params = {"fields": Config.API_RESPONSE_FIELDS} if Config.API_RESPONSE_FIELDS else None
+        return await self._make_request("POST", Config.API_ENDPOINT, payload, params=params)
+    
+    async def prefetch(self, video_url: str) -> bool:
+        """
+        Asks the API to probe a video and fetch its subtitles ahead of the
+        process_video call for it. Best effort: one attempt, and failures
+        are logged, not raised.
+        
+        Returns:
+            Whether the API accepted the prefetch
+        """
+        url = f'{self.api_full_url.rstrip("/")}/prefetch'
+        try:
+            session = await self._get_authenticated_session()
+            async with session.post(url, json={"video_url": video_url, "source": "discord_bot"},
+                                    timeout=aiohttp.ClientTimeout(total=Config.API_PREFETCH_TIMEOUT)) as response:
+                return response.status == 202
+        except Exception as e:
+            logger.debug("Prefetch of %s failed: %s", video_url, e)
+            return False
+    
+    async def search(self, query: str, limit: int = 5) -> Optional[Dict[Any, Any]]:
+        """
+        Searches transcripts the API has already processed.
+        """
+        # Searches are cheap reads, so a slow one is raced against a second copy
+        return await hedged(
+            lambda: self._make_request("GET", "/search", params={"q": query, "limit": limit}),
+            Config.API_HEDGE_DELAY
+        )
+    
+    async def warm_up(self):
+        """
+        Fetch the ID token and open the session ahead of the first request.
+        Failures are logged and retried lazily on the first real request.
+        """
+        try:
+            await self._get_authenticated_session()
+        except Exception as e:
+            logger.warning("API client warm-up failed, will retry on first request: %s", e)
+    
     async def health_check(self) -> bool:
         """
         Performs a health check on the Experience API.
@@ -123,9 +251,9 @@ class ExperienceAPIClient:
             response_data = await self._make_request("GET", "/health")
             return response_data is not None # If request succeeds, it's healthy
         except Exception as e:
-            logger.error(f"Health check failed due to exception: {e}", exc_info=True)
+            logger.error("Health check failed due to exception: %s", e, exc_info=True)
             return False
-
+    
     async def close(self):
         """Closes the aiohttp session if it's open."""
         if self._session and not self._session.closed:
@@ -0,0 +1,45 @@
+"""
+Measure how long it takes to import the bot's modules.
+
+Each module is imported in a fresh interpreter so nothing is cached between
+runs. Run from discord-bot/src:
+
+    python -m benchmarks.bench_startup --runs 5
+
+Time-to-gateway-ready is logged by the bot itself on startup
+("Gateway ready ...s after process start").
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ['config', 'utils.logger', 'utils.url_detector', 'url_processor', 'bot']
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+def time_import(module: str) -> float:
+    """Import a module in a fresh interpreter and return the elapsed seconds."""
+    result = subprocess.run(
+        [sys.executable, '-c', SNIPPET.format(module=module)],
+        capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<22}{'median ms':>12}{'max ms':>10}")
+    for module in MODULES:
+        timings = [time_import(module) * 1000 for _ in range(args.runs)]
+        print(f"{module:<22}{statistics.median(timings):>12.1f}{max(timings):>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Stand-ins for discord.py objects, used to drive URLProcessor without a gateway.
+"""
+import asyncio
+import itertools
+import random
+from typing import Any, Dict, List, Optional
+
+_ids = itertools.count(1)
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.bot = False
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.me = FakeUser(0)
+        self.sent: List[Dict[str, Any]] = []
+    
+    async def send(self, content=None, embeds=None, embed=None):
+        self.sent.append({'content': content, 'embeds': embeds or [embed]})
+        return FakeMessage(self, self.me, content or '')
+
+
+class FakeMessage:
+    def __init__(self, channel: FakeChannel, author: FakeUser, content: str):
+        self.id = next(_ids)
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.guild = None
+        self.reactions: List[str] = []
+    
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+    
+    async def remove_reaction(self, emoji, member):
+        if emoji in self.reactions:
+            self.reactions.remove(emoji)
+    
+    async def edit(self, content=None, embeds=None):
+        self.content = content
+
+
+class MessageStream:
+    """
+    Generates synthetic chat messages containing video links.
+    
+    Args:
+        video_pool: Number of distinct videos links are drawn from
+        repost_rate: Probability a link reposts an already-seen video
+        link_rate: Probability a message contains a link at all
+        channels: Number of channels messages are spread over
+        seed: Random seed so runs are repeatable
+        platform_mix: Relative weight of each PLATFORM_URLS form, uniform by default
+        cross_post_rate: Probability a new link is a seen video uploaded again
+            under another ID, so only its audio matches
+    """
+    
+    PLATFORM_URLS = [
+        "https://www.youtube.com/watch?v={id}",
+        "https://youtu.be/{id}",
+        "https://www.instagram.com/reel/{id}/",
+    ]
+    
+    def __init__(self, video_pool: int = 1000, repost_rate: float = 0.3, link_rate: float = 1.0,
+                 channels: int = 50, seed: int = 0, platform_mix: Optional[List[float]] = None,
+                 cross_post_rate: float = 0.0):
+        self.video_pool = video_pool
+        self.repost_rate = repost_rate
+        self.link_rate = link_rate
+        self.platform_mix = platform_mix or [1.0] * len(self.PLATFORM_URLS)
+        self.cross_post_rate = cross_post_rate
+        self.random = random.Random(seed)
+        self.channels = [FakeChannel(1000 + i) for i in range(channels)]
+        self.seen: List[str] = []
+    
+    def next_message(self) -> FakeMessage:
+        channel = self.random.choice(self.channels)
+        author = FakeUser(self.random.randint(1, 10_000))
+        if self.random.random() >= self.link_rate:
+            return FakeMessage(channel, author, "what's for dinner tonight?")
+        
+        if self.seen and self.random.random() < self.repost_rate:
+            video_id = self.random.choice(self.seen)
+        elif self.seen and self.random.random() < self.cross_post_rate:
+            # Keeps the original's number, which the fixture API maps to the same audio
+            video_id = f"re{len(self.seen)}-{self.random.choice(self.seen).split('-')[-1]}"
+            self.seen.append(video_id)
+        else:
+            video_id = f"vid{self.random.randrange(self.video_pool):07d}"
+            self.seen.append(video_id)
+        template = self.random.choices(self.PLATFORM_URLS, weights=self.platform_mix)[0]
+        url = template.format(id=video_id)
+        return FakeMessage(channel, author, f"look at this {url}")
+
+
+def stub_process_video(latency: float = 0.0):
+    """Build a replacement for ExperienceAPIClient.process_video."""
+    async def process_video(video_url: str):
+        if latency:
+            await asyncio.sleep(latency)
+        return {
+            "url": video_url,
+            "recipe": {"title": "Stub Recipe", "ingredients": ["1 cup rice"], "instructions": ["Cook"]},
+            "source": "subtitles",
+        }
+    return process_video
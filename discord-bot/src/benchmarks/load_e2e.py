@@ -0,0 +1,236 @@
+"""
+End-to-end load test: synthetic messages through the bot into the real API.
+
+Starts the API with yt-dlp and Whisper replaced by local fixtures
+(api/src/benchmarks/fixture_server.py), then feeds a URLProcessor bursty
+synthetic traffic through URLProcessor.process_message. Requests take the
+whole real path: work queue, result cache, ExperienceAPIClient, HTTP,
+/process-url, probing, captions or download, decoding, fingerprinting,
+transcription in the shared inference process, and recipe extraction.
+Runs fully offline. Reports throughput, p50/p95/p99 latency per stage on
+both sides, and error rates. Run from discord-bot/src:
+
+    python -m benchmarks.load_e2e --messages 300 --rate 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'api')
+# API log stages, in pipeline order
+API_STAGES = ('probe', 'subtitles', 'download', 'decode', 'transcribe', 'extract', 'index', 'response')
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_api(args, port: int, log_path: str) -> subprocess.Popen:
+    """Start the fixture API and wait until it answers /health."""
+    command = [
+        sys.executable, '-m', 'src.benchmarks.fixture_server', '--port', str(port),
+        '--clips', str(args.clips), '--clip-seconds', str(args.clip_seconds),
+        '--subtitle-share', str(args.subtitle_share), '--platform-latency', str(args.platform_latency),
+        '--download-latency', str(args.download_latency), '--whisper-rtf', str(args.whisper_rtf),
+        '--error-rate', str(args.error_rate), '--seed', str(args.seed),
+    ]
+    env = {**os.environ, 'LOG_LEVEL': 'INFO', 'LOG_FILE': log_path}
+    server = subprocess.Popen(command, cwd=API_DIR, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Fixture API exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Fixture API did not become healthy")
+
+def api_stage_latencies(log_path: str):
+    """Latencies the API logged per stage, in milliseconds."""
+    stages = defaultdict(list)
+    with open(log_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('stage') in API_STAGES and 'latency_ms' in entry:
+                stages[entry['stage']].append(entry['latency_ms'])
+    return stages
+
+def arrivals(count: int, rate: float, burst: float, rng: random.Random):
+    """
+    Offsets in seconds for count messages at rate per second on average,
+    arriving in bursts of burst messages on average.
+    """
+    offsets, now = [], 0.0
+    while len(offsets) < count:
+        now += rng.expovariate(rate / burst)
+        size = 1 + int(rng.expovariate(1 / (burst - 1))) if burst > 1 else 1
+        offsets.extend(now + rng.uniform(0, 0.05) for _ in range(size))
+    return sorted(offsets[:count])
+
+def run_bot(args, port: int, state_dir: str):
+    """Drive a URLProcessor against the API and time each bot-side stage."""
+    os.environ.update({
+        'API_BASE_URL': f'http://127.0.0.1:{port}',
+        'API_AUTH': 'none',
+        'API_TIMEOUT': str(args.api_timeout),
+        'WORK_QUEUE_PATH': os.path.join(state_dir, 'queue.db'),
+        'WORK_QUEUE_WORKERS': str(args.concurrency),
+        'WORK_QUEUE_MAX_DEPTH': str(args.max_depth),
+        'WORK_QUEUE_RETRY_BACKOFF': str(args.retry_backoff),
+        'DISCORD_ACK_DELAY': '0',
+        'DISCORD_EDIT_INTERVAL': '0',
+        'DISCORD_CHANNEL_MIN_INTERVAL': '0',
+        # Injected failures would log every retry; the report counts them instead
+        'LOG_LEVEL': 'CRITICAL',
+        'LOG_FILE': '',
+    })
+    from url_processor import URLProcessor, queue_rejected_total, queue_retries_total
+    from benchmarks.fakes import MessageStream
+
+    processor = URLProcessor()
+    stream = MessageStream(video_pool=args.videos, repost_rate=args.repost_rate, link_rate=args.link_rate,
+                           seed=args.seed, platform_mix=args.platform_mix, cross_post_rate=args.cross_post_rate)
+    messages = [stream.next_message() for _ in range(args.messages)]
+    offsets = arrivals(args.messages, args.rate, args.burst, random.Random(args.seed))
+    stages = defaultdict(list)
+    received = {}
+    # errors: attempts that raised and were retried; failed: URLs answered with an error embed
+    outcomes = {'urls': 0, 'errors': 0, 'failed': 0}
+
+    run_job = processor._run_job
+    async def timed_run_job(job):
+        stages['queue_wait'].append((time.perf_counter() - received[job.message_id]) * 1000)
+        await run_job(job)
+    processor._run_job = timed_run_job
+
+    process_single_url = processor._process_single_url
+    async def timed_process_single_url(url, raise_errors=False):
+        started = time.perf_counter()
+        try:
+            embed, failed = await process_single_url(url, raise_errors)
+        except Exception:
+            outcomes['errors'] += 1
+            raise
+        stages['url'].append((time.perf_counter() - started) * 1000)
+        outcomes['urls'] += 1
+        outcomes['failed'] += failed
+        return embed, failed
+    processor._process_single_url = timed_process_single_url
+
+    process_video = processor.api_client.process_video
+    async def timed_process_video(video_url):
+        started = time.perf_counter()
+        try:
+            return await process_video(video_url)
+        finally:
+            stages['api'].append((time.perf_counter() - started) * 1000)
+    processor.api_client.process_video = timed_process_video
+
+    complete_job = processor._complete_job
+    async def timed_complete_job(job):
+        stages['message'].append((time.perf_counter() - received[job.message_id]) * 1000)
+        await complete_job(job)
+    processor._complete_job = timed_complete_job
+
+    async def drive():
+        await processor.start(bot=None)
+        started = time.perf_counter()
+        for message, offset in zip(messages, offsets):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            received[message.id] = time.perf_counter()
+            await processor.process_message(message)
+        while await processor.work_queue.depth():
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        await processor.stop()
+        await processor.api_client.close()
+        return elapsed
+
+    elapsed = asyncio.run(drive())
+    counts = {
+        **outcomes,
+        'messages': len(messages),
+        'rejected': queue_rejected_total.value,
+        'retries': queue_retries_total.value,
+        'cache_hit_rate': processor.result_cache.hit_rate,
+    }
+    return elapsed, stages, counts
+
+def print_table(title: str, stages, order):
+    print(f"\n{title}")
+    print(f"{'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in order:
+        values = stages.get(stage)
+        if values:
+            print(f"{stage:<14}{len(values):>7}{percentile(values, 0.5):>10.0f}"
+                  f"{percentile(values, 0.95):>10.0f}{percentile(values, 0.99):>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=5, help='Messages per second on average')
+    parser.add_argument('--burst', type=float, default=4, help='Average messages per burst, 1 for Poisson arrivals')
+    parser.add_argument('--videos', type=int, default=200, help='Distinct videos links are drawn from')
+    parser.add_argument('--repost-rate', type=float, default=0.3)
+    parser.add_argument('--cross-post-rate', type=float, default=0.1,
+                        help='Share of new links that re-upload a seen video under another ID')
+    parser.add_argument('--link-rate', type=float, default=0.8, help='Share of messages with a link')
+    parser.add_argument('--platform-mix', type=float, nargs=3, default=[0.5, 0.2, 0.3],
+                        metavar=('WATCH', 'SHORT', 'REEL'), help='Weights of youtube.com, youtu.be and Instagram links')
+    parser.add_argument('--concurrency', type=int, default=8, help='Bot queue workers')
+    parser.add_argument('--max-depth', type=int, default=200, help='Queue depth beyond which links are rejected')
+    parser.add_argument('--retry-backoff', type=float, default=0.5, help='Seconds before the first retry')
+    parser.add_argument('--api-timeout', type=int, default=120)
+    parser.add_argument('--clips', type=int, default=50, help='Distinct fixture clips on the API side')
+    parser.add_argument('--clip-seconds', type=float, default=20)
+    parser.add_argument('--subtitle-share', type=float, default=0.4)
+    parser.add_argument('--platform-latency', type=float, default=0.2)
+    parser.add_argument('--download-latency', type=float, default=0.5)
+    parser.add_argument('--whisper-rtf', type=float, default=0.15)
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Share of platform calls that fail')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        log_path = os.path.join(tmp, 'api.log')
+        server = start_api(args, port, log_path)
+        try:
+            elapsed, stages, counts = run_bot(args, port, tmp)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        api_stages = api_stage_latencies(log_path)
+
+    print(f"{counts['messages']} messages, {counts['urls']} URLs answered in {elapsed:.1f}s: "
+          f"{counts['urls'] / elapsed:.2f} URLs/s, bot cache hit rate {counts['cache_hit_rate']:.0%}")
+    print_table('Bot', stages, ('queue_wait', 'api', 'url', 'message'))
+    print_table('API', api_stages, API_STAGES)
+    attempts = counts['urls'] + counts['errors']
+    print(f"\nerrors {counts['errors']} ({counts['errors'] / max(attempts, 1):.1%} of URL attempts), "
+          f"job retries {counts['retries']:.0f}, URLs failed for the user {counts['failed']} "
+          f"({counts['failed'] / max(counts['urls'], 1):.1%}), rejected messages {counts['rejected']:.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure message handling throughput per shard process.
+
+Each process stands in for one shard: it builds a URLProcessor, swaps the
+API client for a stub with fixed latency and feeds it synthetic messages
+through URLProcessor.process_message, then waits for the work queue to
+drain. All processes share one SQLite state store, as they would under
+launcher.py, and each has its own work queue file. Run from discord-bot/src:
+
+    python -m benchmarks.load_shards --shards 4 --messages 2000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+def run_shard(index: int, args, state_path: str, results):
+    """Process args.messages synthetic messages and report messages/sec."""
+    os.environ.update({
+        'STATE_STORE': 'sqlite',
+        'STATE_STORE_PATH': state_path,
+        'WORK_QUEUE_PATH': os.path.join(os.path.dirname(state_path), f'queue-{index}.db'),
+        'WORK_QUEUE_WORKERS': str(args.concurrency),
+        'WORK_QUEUE_MAX_DEPTH': str(args.messages),
+        'DISCORD_ACK_DELAY': '0',
+        'DISCORD_EDIT_INTERVAL': '0',
+        'DISCORD_CHANNEL_MIN_INTERVAL': '0',
+        'LOG_LEVEL': 'WARNING',
+        'LOG_FILE': '',
+    })
+    from url_processor import URLProcessor
+    from benchmarks.fakes import MessageStream, stub_process_video
+
+    processor = URLProcessor()
+    processor.api_client.process_video = stub_process_video(args.api_latency)
+    stream = MessageStream(repost_rate=args.repost_rate, seed=index)
+    messages = [stream.next_message() for _ in range(args.messages)]
+
+    async def drive():
+        await processor.start(bot=None)
+        started = time.perf_counter()
+        for message in messages:
+            await processor.process_message(message)
+        while await processor.work_queue.depth():
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        await processor.stop()
+        return elapsed
+
+    elapsed = asyncio.run(drive())
+    results.put((index, args.messages / elapsed, processor.result_cache.hit_rate))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shards', type=int, default=2)
+    parser.add_argument('--messages', type=int, default=2000, help='Messages per shard')
+    parser.add_argument('--concurrency', type=int, default=100, help='Queue workers per shard')
+    parser.add_argument('--api-latency', type=float, default=0.05, help='Stub API latency in seconds')
+    parser.add_argument('--repost-rate', type=float, default=0.3)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = os.path.join(tmp, 'state.db')
+        processes = [
+            context.Process(target=run_shard, args=(index, args, state_path, results))
+            for index in range(args.shards)
+        ]
+        for process in processes:
+            process.start()
+        rows = sorted(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+
+    print(f"{'shard':<8}{'msgs/sec':>12}{'cache hit rate':>18}")
+    for index, rate, hit_rate in rows:
+        print(f"{index:<8}{rate:>12.1f}{hit_rate:>18.0%}")
+    print(f"{'total':<8}{sum(rate for _, rate, _ in rows):>12.1f}")
+
+if __name__ == '__main__':
+    main()
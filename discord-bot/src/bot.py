@@ -1,11 +1,18 @@
+import time
+
+# Taken before the heavier imports so startup timings include them
+_START_TIME = time.perf_counter()
+
 import discord
 from discord.ext import commands
 import asyncio
 import logging
+import math
 from config import Config
 from url_processor import URLProcessor
 from utils.logger import setup_logger
-import aiohttp.web
+from utils.metrics import metrics
+from health_server import HealthServer
 
 # Setup logging
 logger = setup_logger()
@@ -16,14 +23,44 @@ intents.reactions = True
 intents.dm_messages = True
 intents.dm_reactions = True
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+# AutoShardedBot runs several gateway shards in this process; launcher.py
+# splits shards across processes by setting SHARD_IDS for each one
+if Config.ENABLE_SHARDING:
+    bot = commands.AutoShardedBot(
+        command_prefix='!',
+        intents=intents,
+        help_command=None,
+        shard_count=Config.SHARD_COUNT or None,
+        shard_ids=Config.SHARD_IDS or None
+    )
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
 url_processor = URLProcessor()
+health_server = HealthServer(bot, port=Config.HEALTH_PORT)
+
+message_handling_seconds = metrics.histogram(
+    'on_message_duration_seconds', 'Time spent handling one message in on_message'
+)
+metrics.gauge(
+    'gateway_latency_seconds', 'Discord gateway heartbeat latency',
+    fn=lambda: bot.latency if math.isfinite(bot.latency) else -1  # -1 until the first heartbeat
+)
+metrics.gauge('guilds', 'Guilds visible to this process', fn=lambda: len(bot.guilds))
+
+@bot.event
+async def setup_hook():
+    """Start the health server and the URL workers on the bot's own event loop."""
+    await health_server.start()
+    await url_processor.start(bot)
 
 @bot.event
 async def on_ready():
     """Called when the bot is ready and connected to Discord."""
-    logger.info(f'{bot.user} has connected to Discord!')
-    logger.info(f'Bot is in {len(bot.guilds)} guilds')
+    logger.info('%s has connected to Discord!', bot.user)
+    logger.info('Gateway ready %.2fs after process start', time.perf_counter() - _START_TIME)
+    logger.info('Bot is in %s guilds', len(bot.guilds))
+    if bot.shard_count:
+        logger.info('Running shards %s of %s', getattr(bot, 'shard_ids', None) or [bot.shard_id], bot.shard_count)
     
     # Set bot status
     activity = discord.Activity(type=discord.ActivityType.watching, name="for recipe links 🍽️")
@@ -32,9 +69,9 @@ async def on_ready():
     # Sync commands globally for user installs and DMs
     try:
         synced = await bot.tree.sync()
-        logger.info(f'Synced {len(synced)} command(s) globally')
+        logger.info('Synced %s command(s) globally', len(synced))
     except Exception as e:
-        logger.error(f'Failed to sync commands: {e}')
+        logger.error('Failed to sync commands: %s', e)
 
 @bot.event
 async def on_message(message):
@@ -45,21 +82,24 @@ async def on_message(message):
     if message.author.bot:
         return
     
+    started = time.perf_counter()
     try:
         await url_processor.process_message(message)
     except Exception as e:
-        logger.error(f"Error processing message: {e}")
+        logger.error("Error processing message: %s", e)
         try:
             await message.add_reaction("❌")
         except discord.errors.Forbidden:
             logger.warning("Cannot add reaction - missing permissions")
+    finally:
+        message_handling_seconds.observe(time.perf_counter() - started)
     
     await bot.process_commands(message)
 
 @bot.event
 async def on_error(event, *args, **kwargs):
     """Handle bot errors."""
-    logger.error(f"An error occurred in event {event}: {args}, {kwargs}")
+    logger.error("An error occurred in event %s: %s, %s", event, args, kwargs)
 
 @bot.command(name='help')
 async def help_command(ctx):
@@ -82,9 +122,15 @@ async def help_command(ctx):
         inline=False
     )
     
+    embed.add_field(
+        name="Commands:",
+        value="`!search <words>` Find recipes from videos already shared\n`!status` Bot status",
+        inline=False
+    )
+    
     embed.add_field(
         name="Reactions:",
-        value="🔄 Processing your video\n✅ Recipe extracted successfully\n❌ Error occurred",
+        value="🔄 Processing your video\n✅ Recipe extracted successfully\n❌ Error occurred\n⏳ Too busy right now, try again shortly",
         inline=False
     )
     
@@ -99,6 +145,26 @@ async def help_command(ctx):
     
     await ctx.send(embed=embed)
 
+@bot.command(name='search')
+async def search_command(ctx, *, query: str = ''):
+    """Search recipes from videos that were already processed."""
+    if not query.strip():
+        await ctx.send("Usage: `!search <words>`, e.g. `!search gochujang butter`")
+        return
+    if len(query) > Config.SEARCH_QUERY_MAX_LENGTH:
+        await ctx.send(f"Searches are limited to {Config.SEARCH_QUERY_MAX_LENGTH} characters.")
+        return
+    
+    try:
+        response = await url_processor.api_client.search(query, limit=Config.SEARCH_RESULT_LIMIT)
+    except Exception as e:
+        logger.error("Search failed for %r: %s", query, e)
+        await ctx.send(embed=url_processor.embed_builder.create_error_embed("Search is unavailable right now."))
+        return
+    
+    results = (response or {}).get('results', [])
+    await ctx.send(embed=url_processor.embed_builder.create_search_embed(query, results))
+
 @bot.command(name='status')
 async def status_command(ctx):
     """Display bot status information."""
@@ -109,49 +175,78 @@ async def status_command(ctx):
     
     embed.add_field(name="Latency", value=f"{round(bot.latency * 1000)}ms", inline=True)
     embed.add_field(name="Guilds", value=len(bot.guilds), inline=True)
+    if bot.shard_count:
+        embed.add_field(name="Shard", value=f"{ctx.guild.shard_id if ctx.guild else 0} of {bot.shard_count}", inline=True)
     embed.add_field(name="API Status", value="🟢 Connected", inline=True)
     
+    cache_stats = url_processor.result_cache.stats()
+    embed.add_field(
+        name="Result Cache",
+        value=f"{cache_stats['hit_rate']:.0%} hit rate ({cache_stats['hits']} hits, "
+              f"{cache_stats['misses']} misses) • {cache_stats['size']} entries",
+        inline=False
+    )
+    
+    counters = metrics.snapshot()
+    embed.add_field(
+        name="Discord Rate Limits",
+        value=f"{int(counters.get('discord_rate_limited_total', 0))} × 429 • "
+              f"{counters.get('discord_bucket_wait_seconds_total', 0):.1f}s paced",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="Work Queue",
+        value=f"{int(counters.get('work_queue_depth', 0))} queued • "
+              f"{int(counters.get('work_queue_retries_total', 0))} retries • "
+              f"{int(counters.get('work_queue_rejected_total', 0))} turned away",
+        inline=False
+    )
+    
     await ctx.send(embed=embed)
 
+async def start_bot():
+    """Resolve secrets and warm up the API client concurrently, then connect."""
+    await asyncio.gather(
+        Config.load_secrets(),
+        url_processor.api_client.warm_up()
+    )
+    logger.info("Startup dependencies resolved in %.2fs", time.perf_counter() - _START_TIME)
+    
+    # Validate configuration before starting
+    Config.validate()
+    logger.info("Configuration validated successfully")
+    
+    # Log bot configuration
+    logger.info("Bot intents: %s", intents)
+    logger.info("API URL: %s", Config.get_full_api_url())
+    logger.info("Log level: %s", Config.LOG_LEVEL)
+    
+    logger.info("Starting ReelMeals Discord Bot...")
+    try:
+        async with bot:
+            await bot.start(Config.DISCORD_TOKEN)
+    finally:
+        await url_processor.stop()
+        await health_server.stop()
+
 def main():
     """Main function to run the bot."""
     try:
-        # Validate configuration before starting
-        Config.validate()
-        logger.info("Configuration validated successfully")
-        
-        # Log bot configuration
-        logger.info(f"Bot intents: {intents}")
-        logger.info(f"API URL: {Config.get_full_api_url()}")
-        logger.info(f"Log level: {Config.LOG_LEVEL}")
-        
-        logger.info("Starting ReelMeals Discord Bot...")
-        bot.run(Config.DISCORD_TOKEN)
+        # bot.run() would set this up for us; bot.start() does not
+        discord.utils.setup_logging()
+        asyncio.run(start_bot())
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         print(f"Configuration error: {e}")
     except discord.LoginFailure:
         logger.error("Invalid Discord token provided")
         print("Invalid Discord token provided")
     except Exception as e:
-        logger.error(f"Failed to start bot: {e}")
+        logger.error("Failed to start bot: %s", e)
         print(f"Failed to start bot: {e}")
         import traceback
         traceback.print_exc()
 
-# for cloud run
-async def health_check_handler(request):
-    return aiohttp.web.Response(text="OK")
-
-async def start_web_server():
-    app = aiohttp.web.Application()
-    app.add_routes([aiohttp.web.get('/', health_check_handler)])
-    runner = aiohttp.web.AppRunner(app)
-    await runner.setup()
-    site = aiohttp.web.TCPSite(runner, '0.0.0.0', 8080)
-    await site.start()
-    logger.info("Web server started on port 8080")
-
 if __name__ == "__main__":
-    asyncio.run(start_web_server())
     main()
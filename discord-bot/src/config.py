@@ -1,32 +1,98 @@
 import os
+import json
+import asyncio
 from dotenv import load_dotenv
-from google.cloud import secretmanager
 
 # Load environment variables from .env file
 load_dotenv()
 
-def access_secret_version(secret_id: str, version_id: str = "latest") -> str:
+# Config attributes resolved from Secret Manager, mapped to their secret IDs
+SECRETS = {
+    'DISCORD_TOKEN': 'discord-token',
+}
 
+def access_secret_version(secret_id: str, version_id: str = "latest") -> str:
+    # Imported lazily so importing config stays free of the gRPC stack and credentials
+    from google.cloud import secretmanager
+    
     client = secretmanager.SecretManagerServiceClient()
     name = f"projects/{os.environ['GOOGLE_CLOUD_PROJECT']}/secrets/{secret_id}/versions/{version_id}"
     response = client.access_secret_version(name=name)
     return response.payload.data.decode('UTF-8')
 
+def parse_shard_ids(value: str):
+    """Parse a shard list such as '0-3' or '0,2,5-7' into a list of IDs."""
+    shard_ids = []
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        if '-' in part:
+            first, last = part.split('-', 1)
+            shard_ids.extend(range(int(first), int(last) + 1))
+        else:
+            shard_ids.append(int(part))
+    return shard_ids
+
 class Config:
     """Configuration settings for the Discord bot."""
     
     # Discord Bot Configuration
-    DISCORD_TOKEN = access_secret_version('discord-token')
+    # Set DISCORD_TOKEN in the environment to skip Secret Manager, otherwise it is
+    # resolved by load_secrets() at startup
+    DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
+    SECRETS_CACHE_FILE = os.getenv('SECRETS_CACHE_FILE', '')  # Optional local cache for offline runs
     
     # Experience API Configuration
     API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
     API_ENDPOINT = os.getenv('API_ENDPOINT', '/process-url')
     API_TIMEOUT = int(os.getenv('API_TIMEOUT', '30'))  # Timeout in seconds
+    API_AUTH = os.getenv('API_AUTH', 'google').lower()  # 'google' ID tokens, or 'none' for a local API
+    API_MAX_ATTEMPTS = int(os.getenv('API_MAX_ATTEMPTS', '3'))  # Per request, including the first
+    API_RETRY_BASE_DELAY = float(os.getenv('API_RETRY_BASE_DELAY', '0.5'))  # Seconds, doubled per attempt
+    API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '8'))
+    API_RETRY_BUDGET_RATIO = float(os.getenv('API_RETRY_BUDGET_RATIO', '0.2'))  # Retries allowed per request sent
+    API_HEDGE_DELAY = float(os.getenv('API_HEDGE_DELAY', '1.0'))  # Seconds before racing a slow search, 0 disables
+    API_POLL_INTERVAL = float(os.getenv('API_POLL_INTERVAL', '2'))  # Seconds between polls of a queued job
+    API_JOB_TIMEOUT = int(os.getenv('API_JOB_TIMEOUT', '900'))  # Seconds to wait for a queued job to finish
+    API_PREFETCH = os.getenv('API_PREFETCH', 'true').lower() == 'true'  # Warm the API's caches as links arrive
+    API_PREFETCH_TIMEOUT = float(os.getenv('API_PREFETCH_TIMEOUT', '5'))
+    # Response fields requested from /process-url; the bot only renders the recipe
+    API_RESPONSE_FIELDS = os.getenv('API_RESPONSE_FIELDS', 'url,source,recipe')
+    SEARCH_RESULT_LIMIT = int(os.getenv('SEARCH_RESULT_LIMIT', '5'))  # Results shown by !search
+    SEARCH_QUERY_MAX_LENGTH = 200  # Longest query the API's /search accepts
     
     # Bot Behavior Configuration
     MAX_URLS_PER_MESSAGE = int(os.getenv('MAX_URLS_PER_MESSAGE', '3'))
     ENABLE_REACTIONS = os.getenv('ENABLE_REACTIONS', 'true').lower() == 'true'
     
+    # Discord Dispatch Configuration (seconds)
+    DISCORD_ACK_DELAY = float(os.getenv('DISCORD_ACK_DELAY', '0.75'))  # Wait before posting a processing embed
+    DISCORD_EDIT_INTERVAL = float(os.getenv('DISCORD_EDIT_INTERVAL', '1.0'))  # Coalesce edits within this window
+    DISCORD_CHANNEL_MIN_INTERVAL = float(os.getenv('DISCORD_CHANNEL_MIN_INTERVAL', '0.25'))  # Pacing per channel
+    
+    # Result Cache Configuration
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '512'))
+    RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', '86400'))  # TTL in seconds
+    
+    # Shared State Configuration
+    # 'sqlite' shares the result cache and rate limits between shard processes on one host
+    STATE_STORE = os.getenv('STATE_STORE', 'memory').lower()  # 'memory' or 'sqlite'
+    STATE_STORE_PATH = os.getenv('STATE_STORE_PATH', 'state/bot-state.db')
+    USER_RATE_LIMIT = int(os.getenv('USER_RATE_LIMIT', '0'))  # Links per user per minute, 0 disables
+    
+    # Work Queue Configuration
+    # Links wait here between detection and processing, so they survive restarts
+    WORK_QUEUE_PATH = os.getenv('WORK_QUEUE_PATH', f"state/work-queue-{os.getenv('SHARD_PROCESS_INDEX', '0')}.db")
+    WORK_QUEUE_WORKERS = int(os.getenv('WORK_QUEUE_WORKERS', '4'))  # Jobs processed concurrently
+    WORK_QUEUE_MAX_DEPTH = int(os.getenv('WORK_QUEUE_MAX_DEPTH', '100'))  # New links are turned away beyond this
+    WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv('WORK_QUEUE_MAX_ATTEMPTS', '3'))
+    WORK_QUEUE_RETRY_BACKOFF = float(os.getenv('WORK_QUEUE_RETRY_BACKOFF', '5'))  # Seconds, doubled per attempt
+    WORK_QUEUE_FAILED_TTL = float(os.getenv('WORK_QUEUE_FAILED_TTL', '604800'))  # Seconds failed jobs are kept
+    
+    # Sharding Configuration
+    ENABLE_SHARDING = os.getenv('ENABLE_SHARDING', 'false').lower() == 'true'
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0'))  # 0 uses Discord's recommended count
+    SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS', ''))  # Shards owned by this process, empty for all
+    SHARD_PROCESSES = int(os.getenv('SHARD_PROCESSES', '1'))  # Processes started by launcher.py
+    
     # Supported Platforms
     SUPPORTED_PLATFORMS = {
         'youtube': os.getenv('ENABLE_YOUTUBE', 'true').lower() == 'true',
@@ -37,9 +103,64 @@ class Config:
     ALLOWED_CHANNELS = os.getenv('ALLOWED_CHANNELS', '').split(',') if os.getenv('ALLOWED_CHANNELS') else []
     BLOCKED_CHANNELS = os.getenv('BLOCKED_CHANNELS', '').split(',') if os.getenv('BLOCKED_CHANNELS') else []
     
+    # Health Server Configuration
+    # Each shard process started by launcher.py serves on the next port up
+    HEALTH_PORT = int(os.getenv('HEALTH_PORT', os.getenv('PORT', '8080'))) + int(os.getenv('SHARD_PROCESS_INDEX', '0'))
+    
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'bot.log')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()  # 'json' or 'text'
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # Rotate after this size
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+    
+    @classmethod
+    async def load_secrets(cls):
+        """
+        Resolve secrets that are not already set.
+        
+        Environment variables win, then the local secrets cache file, and
+        anything left is fetched from Secret Manager concurrently.
+        """
+        cached = cls._read_secrets_cache()
+        pending = {}
+        for attr, secret_id in SECRETS.items():
+            if getattr(cls, attr):
+                continue
+            if secret_id in cached:
+                setattr(cls, attr, cached[secret_id])
+            else:
+                pending[attr] = secret_id
+        
+        if not pending:
+            return
+        
+        loop = asyncio.get_running_loop()
+        values = await asyncio.gather(*(
+            loop.run_in_executor(None, access_secret_version, secret_id)
+            for secret_id in pending.values()
+        ))
+        for attr, value in zip(pending, values):
+            setattr(cls, attr, value)
+        
+        if cls.SECRETS_CACHE_FILE:
+            cached.update(zip(pending.values(), values))
+            cls._write_secrets_cache(cached)
+    
+    @classmethod
+    def _read_secrets_cache(cls):
+        """Read the local secrets cache file, if configured."""
+        if not cls.SECRETS_CACHE_FILE or not os.path.exists(cls.SECRETS_CACHE_FILE):
+            return {}
+        with open(cls.SECRETS_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    @classmethod
+    def _write_secrets_cache(cls, secrets):
+        """Write resolved secrets to the local cache file, readable by the owner only."""
+        fd = os.open(cls.SECRETS_CACHE_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(secrets, f)
     
     @classmethod
     def validate(cls):
@@ -50,6 +171,12 @@ class Config:
         if not cls.API_BASE_URL:
             raise ValueError("API_BASE_URL is required")
         
+        if cls.SHARD_IDS and not cls.SHARD_COUNT:
+            raise ValueError("SHARD_COUNT is required when SHARD_IDS is set")
+        
+        if any(shard_id >= cls.SHARD_COUNT for shard_id in cls.SHARD_IDS):
+            raise ValueError("SHARD_IDS must be lower than SHARD_COUNT")
+        
         return True
     
     @classmethod
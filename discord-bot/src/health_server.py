@@ -0,0 +1,61 @@
+import math
+import aiohttp.web
+from utils.metrics import metrics
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+class HealthServer:
+    """
+    Serves liveness, readiness and Prometheus metrics on the bot's event loop.
+    
+    Started from the bot's setup_hook so it lives exactly as long as the bot:
+    Cloud Run's port check passes as soon as the process is up, and
+    readiness only reports OK once the gateway is connected.
+    """
+    
+    def __init__(self, bot, host: str = '0.0.0.0', port: int = 8080):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self._runner = None
+        
+        self.app = aiohttp.web.Application()
+        self.app.add_routes([
+            aiohttp.web.get('/', self.liveness),
+            aiohttp.web.get('/healthz', self.liveness),
+            aiohttp.web.get('/readyz', self.readiness),
+            aiohttp.web.get('/metrics', self.serve_metrics),
+        ])
+    
+    async def start(self):
+        """Bind the port and start serving."""
+        self._runner = aiohttp.web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = aiohttp.web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info("Health server started on port %s", self.port)
+    
+    async def stop(self):
+        """Stop serving and release the port."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    def is_ready(self) -> bool:
+        """The gateway is connected and heartbeating."""
+        return self.bot.is_ready() and not self.bot.is_closed() and math.isfinite(self.bot.latency)
+    
+    async def liveness(self, request):
+        return aiohttp.web.Response(text="OK")
+    
+    async def readiness(self, request):
+        if self.is_ready():
+            return aiohttp.web.Response(text="READY")
+        return aiohttp.web.Response(text="NOT READY", status=503)
+    
+    async def serve_metrics(self, request):
+        return aiohttp.web.Response(
+            body=metrics.render().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
@@ -0,0 +1,99 @@
+"""
+Runs the bot as several processes, each owning a contiguous range of shards.
+
+    ENABLE_SHARDING=true SHARD_COUNT=8 SHARD_PROCESSES=2 STATE_STORE=sqlite python src/launcher.py
+
+Each child process runs an AutoShardedBot for its own SHARD_IDS, so gateway
+traffic is spread over several event loops. Use STATE_STORE=sqlite so the
+result cache and per-user rate limits are shared between the processes.
+"""
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict, List
+
+from config import Config
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+RESTART_BACKOFF_MAX = 60
+
+def split_shards(shard_count: int, processes: int) -> List[List[int]]:
+    """Split shard IDs 0..shard_count-1 into contiguous ranges, one per process."""
+    processes = max(1, min(processes, shard_count))
+    base, extra = divmod(shard_count, processes)
+    ranges = []
+    start = 0
+    for index in range(processes):
+        size = base + (1 if index < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+def run_shard_process(shard_ids: List[int], shard_count: int, index: int):
+    """Entry point for a child process. Config is read after the env is set."""
+    os.environ['ENABLE_SHARDING'] = 'true'
+    os.environ['SHARD_COUNT'] = str(shard_count)
+    os.environ['SHARD_IDS'] = ','.join(str(shard_id) for shard_id in shard_ids)
+    os.environ['SHARD_PROCESS_INDEX'] = str(index)
+    
+    import bot
+    bot.main()
+
+def main():
+    """Start one process per shard range and restart any that exit."""
+    if not Config.SHARD_COUNT:
+        raise SystemExit("SHARD_COUNT is required to run multiple shard processes")
+    
+    context = multiprocessing.get_context('spawn')
+    shard_ranges = split_shards(Config.SHARD_COUNT, Config.SHARD_PROCESSES)
+    processes: Dict[int, multiprocessing.Process] = {}
+    started_at: Dict[int, float] = {}
+    backoff: Dict[int, float] = {}
+    stopping = False
+    
+    def start(index: int):
+        process = context.Process(
+            target=run_shard_process,
+            args=(shard_ranges[index], Config.SHARD_COUNT, index),
+            name=f"mealbot-shards-{index}"
+        )
+        process.start()
+        processes[index] = process
+        started_at[index] = time.monotonic()
+        logger.info("Started process %s for shards %s", process.pid, shard_ranges[index])
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes.values():
+            process.terminate()
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    for index in range(len(shard_ranges)):
+        start(index)
+    
+    while not stopping:
+        time.sleep(1)
+        for index, process in list(processes.items()):
+            if process.is_alive() or stopping:
+                continue
+            # A process that stayed up for a while gets a fresh backoff
+            if time.monotonic() - started_at[index] > RESTART_BACKOFF_MAX:
+                backoff[index] = 1
+            delay = backoff.get(index, 1)
+            logger.warning("Shard process for %s exited with %s, restarting in %ss",
+                           shard_ranges[index], process.exitcode, delay)
+            time.sleep(delay)
+            backoff[index] = min(delay * 2, RESTART_BACKOFF_MAX)
+            start(index)
+    
+    for process in processes.values():
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import asyncio
+import time
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from api_client import ExperienceAPIClient
+from config import Config
+from utils.retry import APIError, RetryBudget, RetryPolicy, hedged
+
+
+class StubAPI:
+    """
+    Local stand-in for the Experience API that fails on purpose.
+    
+    Each request takes the next fault from the script: an HTTP status to
+    return, 'slow' to outlast the client timeout, 'drop' to close the
+    connection without answering, or 'queued' to answer 202 with a job to
+    poll at /jobs/1. Once the script is used up, requests succeed.
+    """
+    
+    def __init__(self, faults=()):
+        self.faults = list(faults)
+        self.requests = []
+        self.app = web.Application()
+        self.app.router.add_post('/process-url', self.handle)
+        self.app.router.add_get('/search', self.handle)
+        self.app.router.add_get('/jobs/{job_id}', self.handle)
+        self.app.router.add_post('/prefetch', self.handle_prefetch)
+    
+    async def handle(self, request):
+        self.requests.append(dict(request.headers))
+        fault = self.faults.pop(0) if self.faults else None
+        if fault == 'slow':
+            await asyncio.sleep(1)
+        elif fault == 'drop':
+            request.transport.close()
+            return web.Response()
+        elif fault == 'queued':
+            return web.json_response({'job_id': '1', 'status': 'pending'}, status=202, headers={'Location': '/jobs/1'})
+        elif fault is not None:
+            return web.Response(status=fault, text='injected')
+        return web.json_response({'recipe': {'title': 'Stub'}, 'attempt': len(self.requests)})
+    
+    async def handle_prefetch(self, request):
+        self.requests.append(dict(request.headers))
+        fault = self.faults.pop(0) if self.faults else None
+        if fault is not None:
+            return web.Response(status=fault, text='injected')
+        return web.json_response({'status': 'queued'}, status=202)
+
+
+@pytest.fixture
+def no_auth(monkeypatch):
+    monkeypatch.setattr(Config, 'API_AUTH', 'none')
+
+
+async def make_client(stub, max_attempts=3, budget=None, timeout=0.3):
+    server = TestServer(stub.app)
+    await server.start_server()
+    client = ExperienceAPIClient()
+    client.api_full_url = str(server.make_url(''))
+    client.timeout = timeout
+    client.retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=0.01, max_delay=0.02, budget=budget)
+    return client, server
+
+
+class TestExperienceAPIClient:
+    """Test cases for API retries against a stub server that injects faults."""
+    
+    @pytest.mark.asyncio
+    async def test_retries_unavailable_with_one_idempotency_key(self, no_auth):
+        """Test 503s are retried and every attempt carries the same Idempotency-Key."""
+        stub = StubAPI([503, 503])
+        client, server = await make_client(stub)
+        try:
+            response = await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert response['attempt'] == 3
+        keys = {headers.get('Idempotency-Key') for headers in stub.requests}
+        assert len(keys) == 1 and None not in keys
+    
+    @pytest.mark.asyncio
+    async def test_timeout_is_classified_and_retried(self, no_auth):
+        """Test a request that outlasts the timeout is reported as a timeout and retried."""
+        stub = StubAPI(['slow', 'slow'])
+        client, server = await make_client(stub, max_attempts=2)
+        try:
+            with pytest.raises(APIError) as error:
+                await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert error.value.retryable
+        assert 'timed out' in str(error.value)
+        assert len(stub.requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_dropped_connection_is_retried(self, no_auth):
+        """Test a connection closed mid-request is retried."""
+        stub = StubAPI(['drop'])
+        client, server = await make_client(stub)
+        try:
+            response = await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert response['attempt'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_client_and_pipeline_errors_are_not_retried(self, no_auth):
+        """Test 400 and 500 fail on the first attempt."""
+        for status in (400, 500):
+            stub = StubAPI([status])
+            client, server = await make_client(stub)
+            try:
+                with pytest.raises(APIError) as error:
+                    await client.process_video('https://youtu.be/a')
+            finally:
+                await client.close()
+                await server.close()
+            
+            assert (error.value.status, error.value.retryable) == (status, False)
+            assert len(stub.requests) == 1
+    
+    @pytest.mark.asyncio
+    async def test_spent_budget_stops_retries(self, no_auth):
+        """Test retries stop once the budget has no tokens left."""
+        stub = StubAPI([503] * 10)
+        client, server = await make_client(stub, max_attempts=5, budget=RetryBudget(ratio=0, minimum=1))
+        try:
+            with pytest.raises(APIError):
+                await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        # The first attempt plus the one retry the budget allowed
+        assert len(stub.requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_slow_search_is_hedged(self, no_auth, monkeypatch):
+        """Test a slow search is raced against a second request that answers first."""
+        monkeypatch.setattr(Config, 'API_HEDGE_DELAY', 0.1)
+        stub = StubAPI(['slow'])
+        client, server = await make_client(stub, max_attempts=1, timeout=5)
+        try:
+            started = time.perf_counter()
+            response = await client.search('pasta')
+            elapsed = time.perf_counter() - started
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert response['attempt'] == 2
+        assert elapsed < 0.8
+    
+    @pytest.mark.asyncio
+    async def test_queued_job_is_polled_until_done(self, no_auth, monkeypatch):
+        """Test a 202 is followed by polling the job's Location until it returns the result."""
+        monkeypatch.setattr(Config, 'API_POLL_INTERVAL', 0.01)
+        stub = StubAPI(['queued', 'queued', 'queued'])
+        client, server = await make_client(stub)
+        try:
+            response = await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert response['attempt'] == 4
+        # Polls are GETs of the job, without the POST's Idempotency-Key
+        assert all('Idempotency-Key' not in headers for headers in stub.requests[1:])
+    
+    @pytest.mark.asyncio
+    async def test_failed_job_is_not_retried(self, no_auth, monkeypatch):
+        """Test a job that fails while being polled fails the request without resubmitting it."""
+        monkeypatch.setattr(Config, 'API_POLL_INTERVAL', 0.01)
+        stub = StubAPI(['queued', 202, 500])
+        client, server = await make_client(stub)
+        try:
+            with pytest.raises(APIError) as error:
+                await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert error.value.status == 500
+        assert len(stub.requests) == 3
+    
+    @pytest.mark.asyncio
+    async def test_job_wait_is_bounded(self, no_auth, monkeypatch):
+        """Test polling gives up after API_JOB_TIMEOUT."""
+        monkeypatch.setattr(Config, 'API_POLL_INTERVAL', 0.01)
+        monkeypatch.setattr(Config, 'API_JOB_TIMEOUT', 0.1)
+        stub = StubAPI(['queued'] + [202] * 100)
+        client, server = await make_client(stub)
+        try:
+            with pytest.raises(APIError) as error:
+                await client.process_video('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert not error.value.retryable
+        assert 'taking too long' in str(error.value)
+    
+    @pytest.mark.asyncio
+    async def test_prefetch_is_one_best_effort_attempt(self, no_auth):
+        """Test a prefetch reports acceptance, and a failed one returns False without a retry."""
+        stub = StubAPI([503])
+        client, server = await make_client(stub)
+        try:
+            failed = await client.prefetch('https://youtu.be/a')
+            accepted = await client.prefetch('https://youtu.be/a')
+        finally:
+            await client.close()
+            await server.close()
+        
+        assert (failed, accepted) == (False, True)
+        assert len(stub.requests) == 2
+
+
+class TestRetryPolicy:
+    """Test cases for backoff delays and the retry budget."""
+    
+    def test_delay_is_jittered_and_capped(self):
+        """Test delays double per attempt, stay within the jitter range and respect the cap."""
+        policy = RetryPolicy(base_delay=1, max_delay=4)
+        for attempt, ceiling in ((1, 1), (2, 2), (3, 4), (6, 4)):
+            delay = policy.delay(attempt)
+            assert ceiling / 2 <= delay <= ceiling
+    
+    def test_budget_refills_per_request(self):
+        """Test each request earns a share of a retry, up to the minimum banked."""
+        budget = RetryBudget(ratio=0.5, minimum=2)
+        assert budget.try_spend() and budget.try_spend()
+        assert not budget.try_spend()
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_spend()
+        for _ in range(10):
+            budget.record_request()
+        assert budget.tokens == 2
+
+
+class TestHedged:
+    """Test cases for hedged requests."""
+    
+    @pytest.mark.parametrize("delay", [0, 0.05])
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_cancels_the_request(self, delay):
+        """Test cancelling the caller before the hedge starts cancels the first request too."""
+        requests = []
+        
+        async def call():
+            request = asyncio.current_task()
+            requests.append(request)
+            await asyncio.sleep(10)
+        
+        caller = asyncio.create_task(hedged(call, delay=delay))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        
+        assert len(requests) == 1
+        assert requests[0].cancelled()
+    
+    @pytest.mark.asyncio
+    async def test_first_success_wins(self):
+        """Test the hedge's answer is returned and the slow first request cancelled."""
+        requests = []
+        
+        async def call():
+            requests.append(asyncio.current_task())
+            await asyncio.sleep(10 if len(requests) == 1 else 0.01)
+            return len(requests)
+        
+        assert await hedged(call, delay=0.02) == 2
+        await asyncio.sleep(0)
+        assert requests[0].cancelled()
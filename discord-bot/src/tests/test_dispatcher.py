@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+import discord
+import pytest
+from utils.dispatcher import DiscordDispatcher, RateLimitObserver, rate_limit_wait_seconds, rate_limited_total
+
+
+class FakeMessage:
+    """Records the Discord calls made against a message."""
+    
+    def __init__(self, calls):
+        self.calls = calls
+        self.guild = None
+        self.channel = FakeChannel(calls)
+    
+    async def add_reaction(self, emoji):
+        self.calls.append(('add_reaction', emoji))
+    
+    async def remove_reaction(self, emoji, member):
+        self.calls.append(('remove_reaction', emoji))
+    
+    async def edit(self, content=None, embeds=None):
+        self.calls.append(('edit', len(embeds)))
+
+
+class FakeChannel:
+    def __init__(self, calls):
+        self.id = 1
+        self.me = object()
+        self.calls = calls
+    
+    async def send(self, content=None, embeds=None):
+        self.calls.append(('send', len(embeds)))
+        return FakeMessage(self.calls)
+
+
+class FakeEmbedBuilder:
+    def create_processing_embed(self, url):
+        return f"processing {url}"
+
+
+class TestDiscordDispatcher:
+    """Test cases for response batching and reaction coalescing."""
+    
+    @pytest.mark.asyncio
+    async def test_fast_results_send_once(self):
+        """Test results ready before the ack delay go out as one message and one reaction."""
+        calls = []
+        dispatcher = DiscordDispatcher(min_interval=0, ack_delay=0.2, edit_interval=0.05)
+        batch = dispatcher.create_batch(FakeMessage(calls), FakeEmbedBuilder(), ["a", "b"])
+        batch.start()
+        batch.set_result(0, "recipe a")
+        batch.set_result(1, "recipe b")
+        await batch.finish()
+        
+        assert calls == [('send', 2), ('add_reaction', '✅')]
+    
+    @pytest.mark.asyncio
+    async def test_slow_results_edit_in_place(self):
+        """Test slow batches post processing embeds once and edit that message."""
+        calls = []
+        dispatcher = DiscordDispatcher(min_interval=0, ack_delay=0.01, edit_interval=0.05)
+        batch = dispatcher.create_batch(FakeMessage(calls), FakeEmbedBuilder(), ["a", "b"])
+        batch.start()
+        await asyncio.sleep(0.05)
+        batch.set_result(0, "recipe a")
+        batch.set_result(1, "error b", failed=True)
+        await batch.finish()
+        
+        assert calls == [
+            ('send', 2),
+            ('add_reaction', '🔄'),
+            ('edit', 2),
+            ('remove_reaction', '🔄'),
+            ('add_reaction', '✅'),
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_all_failed_uses_error_reaction(self):
+        """Test a batch where every URL failed ends with the error reaction."""
+        calls = []
+        dispatcher = DiscordDispatcher(min_interval=0, ack_delay=0.2)
+        batch = dispatcher.create_batch(FakeMessage(calls), FakeEmbedBuilder(), ["a"])
+        batch.start()
+        batch.set_result(0, "error a", failed=True)
+        await batch.finish()
+        
+        assert calls[-1] == ('add_reaction', '❌')
+    
+    @pytest.mark.asyncio
+    async def test_fail_remaining_keeps_results(self):
+        """Test giving up only replaces the embeds of URLs without a result."""
+        calls = []
+        dispatcher = DiscordDispatcher(min_interval=0, ack_delay=0.2)
+        batch = dispatcher.create_batch(FakeMessage(calls), FakeEmbedBuilder(), ["a", "b"])
+        batch.start()
+        batch.set_result(0, "recipe a")
+        batch.fail_remaining("error")
+        await batch.finish()
+        
+        assert batch.embeds == ["recipe a", "error"]
+        assert batch.failed == [False, True]
+        assert calls == [('send', 2), ('add_reaction', '✅')]
+    
+    @pytest.mark.asyncio
+    async def test_failed_ack_still_sends_the_reply(self):
+        """Test a processing message that couldn't be sent doesn't stop the final reply."""
+        calls = []
+        message = FakeMessage(calls)
+        sends = []
+        
+        async def send(content=None, embeds=None):
+            sends.append(len(embeds))
+            if len(sends) == 1:
+                await asyncio.sleep(0.05)
+                raise discord.HTTPException(SimpleNamespace(status=500, reason="Server Error"), "unavailable")
+            calls.append(('send', len(embeds)))
+            return FakeMessage(calls)
+        
+        message.channel.send = send
+        dispatcher = DiscordDispatcher(min_interval=0, ack_delay=0.01, edit_interval=0.05)
+        batch = dispatcher.create_batch(message, FakeEmbedBuilder(), ["a"])
+        batch.start()
+        await asyncio.sleep(0.02)
+        batch.set_result(0, "recipe a")
+        await batch.finish()
+        
+        assert sends == [1, 1]
+        assert calls == [('send', 1), ('add_reaction', '✅')]
+    
+    def test_rate_limits_counted_once(self):
+        """Test each 429 discord.py logs is counted once, however many dispatchers exist."""
+        DiscordDispatcher()
+        DiscordDispatcher()
+        count, waited = rate_limited_total.value, rate_limit_wait_seconds.value
+        
+        http_logger = logging.getLogger('discord.http')
+        http_logger.warning('We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+                            'POST', '/channels/1/messages', 1.5)
+        http_logger.warning('We are being rate limited. %s %s responded with 429. Timeout of %.2f was too long, '
+                            'erroring instead.', 'POST', '/channels/1/messages', 90.0)
+        
+        assert rate_limited_total.value == count + 2
+        assert rate_limit_wait_seconds.value == waited + 1.5
+        assert sum(isinstance(f, RateLimitObserver) for f in http_logger.filters) == 1
@@ -0,0 +1,60 @@
+import pytest
+from utils.embeds import EMBED_LIMIT, FIELD_VALUE_LIMIT, TITLE_LIMIT, RecipeEmbedBuilder
+
+
+@pytest.fixture
+def builder():
+    return RecipeEmbedBuilder()
+
+
+class TestSearchEmbed:
+    """Test cases for the !search results embed."""
+    
+    def test_results_become_fields(self, builder):
+        """Test each result shows its title, snippet and video link."""
+        embed = builder.create_search_embed("gochujang", [
+            {'title': 'Gochujang Pasta', 'snippet': 'stir in the **gochujang**', 'url': 'https://youtu.be/a'},
+            {'title': None, 'snippet': '', 'url': None},
+        ])
+        
+        assert embed.title == '🔎 Results for "gochujang"'
+        assert [field.name for field in embed.fields] == ['Gochujang Pasta', 'Recipe from Video']
+        assert embed.fields[0].value == 'stir in the **gochujang**\n[Watch Video](https://youtu.be/a)'
+        assert embed.fields[1].value == '\u200b'
+    
+    def test_no_results(self, builder):
+        """Test an empty result list says so."""
+        embed = builder.create_search_embed("nothing", [])
+        
+        assert embed.description == "No processed videos match that search yet."
+        assert not embed.fields
+    
+    def test_long_query_title(self, builder):
+        """Test the title is cut to Discord's limit and still closes its quote."""
+        embed = builder.create_search_embed("x" * 500, [])
+        
+        assert len(embed.title) == TITLE_LIMIT
+        assert embed.title.endswith('…"')
+    
+    def test_long_snippet_drops_whole_lines(self, builder):
+        """Test an overlong value loses whole snippet lines and keeps the link."""
+        lines = [f"line {n} with **bold** " + "word " * 40 for n in range(10)]
+        embed = builder.create_search_embed("bold", [
+            {'title': 'Long', 'snippet': "\n".join(lines), 'url': 'https://youtu.be/a'},
+        ])
+        
+        value = embed.fields[0].value
+        assert len(value) <= FIELD_VALUE_LIMIT
+        assert value.endswith('[Watch Video](https://youtu.be/a)')
+        assert all(line in lines for line in value.splitlines()[:-1])
+    
+    def test_total_length_limit(self, builder):
+        """Test results that would push the embed past Discord's total limit are left out."""
+        results = [
+            {'title': 'T' * 256, 'snippet': 's' * 900, 'url': 'https://youtu.be/a'}
+            for _ in range(10)
+        ]
+        embed = builder.create_search_embed("many", results)
+        
+        assert len(embed) <= EMBED_LIMIT
+        assert 0 < len(embed.fields) < len(results)
@@ -0,0 +1,38 @@
+import logging
+import queue
+from utils.logger import LazyQueueHandler
+
+
+def make_record(msg, *args):
+    return logging.LogRecord('mealbot', logging.INFO, __file__, 1, msg, args, None)
+
+
+class TestLazyQueueHandler:
+    """Test cases for formatting records off the calling thread."""
+    
+    def test_immutable_args_stay_lazy(self):
+        """Test strings and numbers are left for the listener to format."""
+        handler = LazyQueueHandler(queue.Queue())
+        record = handler.prepare(make_record("Processed %s in %.1f ms (%d tries)", "https://youtu.be/a", 12.5, 2))
+        
+        assert record.args == ("https://youtu.be/a", 12.5, 2)
+        assert record.getMessage() == "Processed https://youtu.be/a in 12.5 ms (2 tries)"
+    
+    def test_mutable_args_are_formatted_at_the_call(self):
+        """Test a list changed after logging is logged as it was."""
+        handler = LazyQueueHandler(queue.Queue())
+        urls = ["https://youtu.be/a"]
+        record = handler.prepare(make_record("Queued %s", urls))
+        urls.append("https://youtu.be/b")
+        
+        assert record.args is None
+        assert record.getMessage() == "Queued ['https://youtu.be/a']"
+    
+    def test_named_args_are_formatted_at_the_call(self):
+        """Test a mapping of named arguments is formatted before it can change."""
+        handler = LazyQueueHandler(queue.Queue())
+        fields = {'count': 1}
+        record = handler.prepare(make_record("%(count)s jobs", fields))
+        fields['count'] = 2
+        
+        assert record.getMessage() == "1 jobs"
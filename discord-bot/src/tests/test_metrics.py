@@ -0,0 +1,31 @@
+import pytest
+from utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test cases for the Prometheus metrics registry."""
+    
+    def test_counter_and_gauge_render(self):
+        """Test counters and callback gauges appear in the exposition output."""
+        registry = MetricsRegistry()
+        registry.counter('requests_total', 'Requests').inc(2)
+        registry.gauge('hit_ratio', 'Hit ratio', fn=lambda: 0.5)
+        
+        output = registry.render()
+        assert '# TYPE mealbot_requests_total counter' in output
+        assert 'mealbot_requests_total 2.0' in output
+        assert 'mealbot_hit_ratio 0.5' in output
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets count every observation at or below their bound."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        
+        output = registry.render()
+        assert 'mealbot_latency_seconds_bucket{le="0.1"} 1' in output
+        assert 'mealbot_latency_seconds_bucket{le="1"} 2' in output
+        assert 'mealbot_latency_seconds_bucket{le="+Inf"} 3' in output
+        assert 'mealbot_latency_seconds_count 3' in output
@@ -0,0 +1,116 @@
+import threading
+import time
+import pytest
+from utils.result_cache import ResultCache
+from utils.state_store import SQLiteStateStore, create_state_store
+
+
+class TestResultCache:
+    """Test cases for the bot-side result cache."""
+    
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits and misses."""
+        cache = ResultCache(max_size=4, ttl=60)
+        
+        assert await cache.get("youtube:abc") is None
+        await cache.set("youtube:abc", {"title": "Soup"})
+        assert await cache.get("youtube:abc") == {"title": "Soup"}
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['size'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_contains_is_not_counted(self, tmp_path):
+        """Test checking for an entry doesn't move the hit and miss counters."""
+        store = SQLiteStateStore(str(tmp_path / "state.db"))
+        cache = ResultCache(max_size=4, ttl=60, store=store)
+        await cache.set("a", {"n": 1})
+        cache._entries.clear()
+        
+        assert await cache.contains("a")
+        assert not await cache.contains("b")
+        assert (cache.hits, cache.misses) == (0, 0)
+        store.close()
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = ResultCache(max_size=2, ttl=60)
+        await cache.set("a", {"n": 1})
+        await cache.set("b", {"n": 2})
+        await cache.get("a")
+        await cache.set("c", {"n": 3})
+        
+        assert await cache.get("b") is None
+        assert await cache.get("a") == {"n": 1}
+        assert await cache.get("c") == {"n": 3}
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, monkeypatch):
+        """Test expired entries are treated as misses."""
+        cache = ResultCache(max_size=2, ttl=10)
+        await cache.set("a", {"n": 1})
+        
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 11)
+        
+        assert await cache.get("a") is None
+        assert cache.stats()['size'] == 0
+    
+    @pytest.mark.asyncio
+    async def test_store_persistence(self, tmp_path):
+        """Test entries survive a restart and are shared through a SQLite state store."""
+        db_path = str(tmp_path / "state.db")
+        cache = ResultCache(max_size=4, ttl=60, store=SQLiteStateStore(db_path))
+        await cache.set("instagram:XYZ", {"title": "Dumplings"})
+        cache.store.close()
+        
+        reloaded = ResultCache(max_size=4, ttl=60, store=SQLiteStateStore(db_path))
+        assert await reloaded.get("instagram:XYZ") == {"title": "Dumplings"}
+        assert reloaded.stats()['hits'] == 1
+        reloaded.store.close()
+    
+    @pytest.mark.asyncio
+    async def test_store_calls_leave_the_event_loop(self, tmp_path):
+        """Test the blocking store is only called from executor threads."""
+        store = SQLiteStateStore(str(tmp_path / "state.db"))
+        threads = []
+        
+        class RecordingStore:
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return store.get(key)
+            
+            def set(self, key, value, ttl):
+                threads.append(threading.get_ident())
+                store.set(key, value, ttl)
+        
+        cache = ResultCache(max_size=4, ttl=60, store=RecordingStore())
+        await cache.set("a", {"n": 1})
+        cache._entries.clear()
+        assert await cache.get("a") == {"n": 1}
+        
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
+        store.close()
+
+
+class TestStateStore:
+    """Test cases for the shared state stores."""
+    
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_incr_window(self, backend, tmp_path, monkeypatch):
+        """Test counters increment within their window and reset after it."""
+        store = create_state_store(backend, str(tmp_path / "state.db"))
+        
+        assert store.incr("user:1", ttl=60) == 1
+        assert store.incr("user:1", ttl=60) == 2
+        
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        assert store.incr("user:1", ttl=60) == 1
+        store.close()
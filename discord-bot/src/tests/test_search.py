@@ -0,0 +1,73 @@
+import pytest
+from config import Config
+
+
+class FakeContext:
+    """Collects what a command sends back."""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send(self, content=None, embed=None):
+        self.sent.append(content if embed is None else embed)
+
+
+@pytest.fixture
+def bot_module(tmp_path, monkeypatch):
+    # Importing the bot opens its work queue under the working directory
+    monkeypatch.chdir(tmp_path)
+    import bot
+    return bot
+
+
+class TestSearchCommand:
+    """Test cases for the !search command."""
+    
+    @pytest.mark.asyncio
+    async def test_search_shows_results(self, bot_module, monkeypatch):
+        """Test results from the API are shown as a search embed."""
+        calls = []
+        
+        async def search(query, limit):
+            calls.append((query, limit))
+            return {'results': [{'title': 'Soup', 'snippet': 'hot **soup**', 'url': 'https://youtu.be/a'}]}
+        
+        monkeypatch.setattr(bot_module.url_processor.api_client, 'search', search)
+        ctx = FakeContext()
+        await bot_module.search_command.callback(ctx, query='soup')
+        
+        assert calls == [('soup', Config.SEARCH_RESULT_LIMIT)]
+        assert ctx.sent[0].fields[0].name == 'Soup'
+    
+    @pytest.mark.asyncio
+    async def test_long_query_is_rejected(self, bot_module, monkeypatch):
+        """Test queries the API would reject aren't sent to it."""
+        async def search(query, limit):
+            pytest.fail("search should not be called")
+        
+        monkeypatch.setattr(bot_module.url_processor.api_client, 'search', search)
+        ctx = FakeContext()
+        await bot_module.search_command.callback(ctx, query='x' * (Config.SEARCH_QUERY_MAX_LENGTH + 1))
+        
+        assert ctx.sent == [f"Searches are limited to {Config.SEARCH_QUERY_MAX_LENGTH} characters."]
+    
+    @pytest.mark.asyncio
+    async def test_empty_query_shows_usage(self, bot_module):
+        """Test a bare !search explains how to use it."""
+        ctx = FakeContext()
+        await bot_module.search_command.callback(ctx, query='  ')
+        
+        assert ctx.sent[0].startswith("Usage:")
+    
+    @pytest.mark.asyncio
+    async def test_api_failure(self, bot_module, monkeypatch):
+        """Test a failing search answers with an error embed."""
+        async def search(query, limit):
+            raise RuntimeError("down")
+        
+        monkeypatch.setattr(bot_module.url_processor.api_client, 'search', search)
+        ctx = FakeContext()
+        await bot_module.search_command.callback(ctx, query='soup')
+        
+        assert ctx.sent[0].title == "❌ Processing Error"
+        assert ctx.sent[0].description == "Search is unavailable right now."
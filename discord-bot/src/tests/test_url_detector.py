@@ -87,6 +87,21 @@ class TestURLDetector:
         assert len(urls) == 1
         assert urls[0] == clean_url
     
+    def test_canonical_video_id(self):
+        """Test different URL shapes map to the same video key."""
+        same_video = [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtu.be/dQw4w9WgXcQ",
+            "https://m.youtube.com/watch?v=dQw4w9WgXcQ&t=42",
+            "https://youtube.com/shorts/dQw4w9WgXcQ"
+        ]
+        
+        for url in same_video:
+            assert self.detector.get_video_id(url) == 'youtube:dQw4w9WgXcQ'
+        
+        assert self.detector.get_video_id("https://www.instagram.com/reel/ABC123/") == 'instagram:ABC123'
+        assert self.detector.get_video_id("https://www.google.com") is None
+    
     def test_platform_validation(self):
         """Test platform validation."""
         assert self.detector.is_supported_platform('youtube') == True
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import pytest
+from utils.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield os.path.join(tmp, 'queue.db')
+
+
+class TestWorkQueue:
+    """Test cases for the durable URL work queue."""
+    
+    @pytest.mark.asyncio
+    async def test_claim_and_complete(self, queue_path):
+        """Test jobs are claimed in order and removed once complete."""
+        queue = WorkQueue(queue_path)
+        await queue.enqueue(1, 10, ["https://youtu.be/a"], "notice")
+        await queue.enqueue(1, 11, ["https://youtu.be/b"])
+        
+        job = await queue.claim()
+        assert (job.message_id, job.urls, job.notice, job.attempts) == (10, ["https://youtu.be/a"], "notice", 1)
+        assert await queue.depth() == 2
+        
+        await queue.complete(job)
+        assert await queue.depth() == 1
+        assert (await queue.claim()).message_id == 11
+        assert await queue.claim() is None
+    
+    @pytest.mark.asyncio
+    async def test_retry_backs_off(self, queue_path):
+        """Test a retried job waits for its backoff and gives up after max attempts."""
+        queue = WorkQueue(queue_path, max_attempts=2, base_backoff=0)
+        await queue.enqueue(1, 10, ["https://youtu.be/a"])
+        
+        job = await queue.claim()
+        assert await queue.retry(job, "API timeout")
+        
+        job = await queue.claim()
+        assert job.attempts == 2
+        assert not await queue.retry(job, "API timeout")
+        assert await queue.claim() is None
+        assert await queue.depth() == 0
+        queue.close()
+        
+        queue = WorkQueue(queue_path, base_backoff=60)
+        await queue.enqueue(1, 11, ["https://youtu.be/b"])
+        assert await queue.retry(await queue.claim(), "API timeout")
+        assert await queue.claim() is None
+        queue.close()
+    
+    @pytest.mark.asyncio
+    async def test_failed_jobs_are_purged(self, queue_path, monkeypatch):
+        """Test jobs that gave up are kept for finished_ttl, then deleted."""
+        queue = WorkQueue(queue_path, max_attempts=1, finished_ttl=60)
+        await queue.enqueue(1, 10, ["https://youtu.be/a"])
+        assert not await queue.retry(await queue.claim(), "API timeout")
+        
+        def failed_rows():
+            return queue._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'failed'").fetchone()[0]
+        
+        assert failed_rows() == 1
+        
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 61)
+        await queue.enqueue(1, 11, ["https://youtu.be/b"])
+        assert not await queue.retry(await queue.claim(), "API timeout")
+        assert failed_rows() == 1
+        queue.close()
+        
+        restarted = WorkQueue(queue_path, finished_ttl=0)
+        assert restarted._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+        restarted.close()
+    
+    @pytest.mark.asyncio
+    async def test_replay_after_restart(self, queue_path):
+        """Test jobs running when the process stopped are claimed again on replay."""
+        queue = WorkQueue(queue_path)
+        await queue.enqueue(1, 10, ["https://youtu.be/a"])
+        await queue.claim()
+        queue.close()
+        
+        restarted = WorkQueue(queue_path)
+        assert await restarted.claim() is None
+        assert await restarted.replay() == 1
+        
+        job = await restarted.claim()
+        assert job.message_id == 10
+        assert job.attempts == 2
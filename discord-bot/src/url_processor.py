@@ -1,13 +1,28 @@
 import discord
 import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional, Set
 from utils.url_detector import URLDetector
 from api_client import ExperienceAPIClient
 from utils.embeds import RecipeEmbedBuilder
-from utils.logger import setup_logger
+from utils.result_cache import ResultCache
+from utils.state_store import create_state_store
+from utils.dispatcher import DiscordDispatcher, ResponseBatch, BUSY_REACTION
+from utils.work_queue import WorkQueue, Job
+from utils.metrics import metrics
+from utils.logger import setup_logger, log_context
 from config import Config
 
 logger = setup_logger()
 
+urls_in_flight = metrics.gauge('urls_in_flight', 'URLs currently being processed')
+api_call_seconds = metrics.histogram('api_call_duration_seconds', 'Experience API round trip per URL')
+queue_depth = metrics.gauge('work_queue_depth', 'Jobs pending or running in the work queue')
+queue_rejected_total = metrics.counter('work_queue_rejected_total', 'Messages turned away because the queue was full')
+queue_retries_total = metrics.counter('work_queue_retries_total', 'Jobs rescheduled after a failed attempt')
+queue_replayed_total = metrics.counter('work_queue_replayed_total', 'Jobs picked up again after a restart')
+
 class URLProcessor:
     """Handles processing of messages containing video URLs."""
     
@@ -15,6 +30,37 @@ class URLProcessor:
         self.url_detector = URLDetector()
         self.api_client = ExperienceAPIClient()
         self.embed_builder = RecipeEmbedBuilder()
+        self.state_store = create_state_store(Config.STATE_STORE, Config.STATE_STORE_PATH)
+        self.result_cache = ResultCache(
+            max_size=Config.RESULT_CACHE_SIZE,
+            ttl=Config.RESULT_CACHE_TTL,
+            # A memory store would only duplicate the cache's own LRU
+            store=self.state_store if Config.STATE_STORE != 'memory' else None
+        )
+        self.dispatcher = DiscordDispatcher(
+            min_interval=Config.DISCORD_CHANNEL_MIN_INTERVAL,
+            ack_delay=Config.DISCORD_ACK_DELAY,
+            edit_interval=Config.DISCORD_EDIT_INTERVAL
+        )
+        self.work_queue = WorkQueue(
+            Config.WORK_QUEUE_PATH,
+            max_attempts=Config.WORK_QUEUE_MAX_ATTEMPTS,
+            base_backoff=Config.WORK_QUEUE_RETRY_BACKOFF,
+            finished_ttl=Config.WORK_QUEUE_FAILED_TTL
+        )
+        self.bot = None
+        self._workers: List[asyncio.Task] = []
+        # Reply batches for messages handled by this process, keyed by message ID
+        self._batches: Dict[int, ResponseBatch] = {}
+        # Fire-and-forget prefetch requests, referenced until they finish
+        self._prefetches: Set[asyncio.Task] = set()
+        
+        metrics.gauge('result_cache_hit_ratio', 'Share of lookups answered by the result cache',
+                      fn=lambda: self.result_cache.hit_rate)
+        metrics.gauge('result_cache_hits', 'Result cache hits since start',
+                      fn=lambda: self.result_cache.hits)
+        metrics.gauge('result_cache_misses', 'Result cache misses since start',
+                      fn=lambda: self.result_cache.misses)
     
     async def process_message(self, message):
         """Process a Discord message for video URLs."""
@@ -26,63 +72,225 @@ class URLProcessor:
         if not urls:
             return
         
+        if await self._is_user_rate_limited(message.author):
+            logger.info("Rate limit reached for user %s, ignoring %s URL(s)", message.author.id, len(urls))
+            return
+        
+        notice = None
         if len(urls) > Config.MAX_URLS_PER_MESSAGE:
             urls = urls[:Config.MAX_URLS_PER_MESSAGE]
-            await message.channel.send(
-                f"⚠️ Too many URLs detected. Processing only the first {Config.MAX_URLS_PER_MESSAGE} URLs."
-            )
+            notice = f"⚠️ Too many URLs detected. Processing only the first {Config.MAX_URLS_PER_MESSAGE} URLs."
         
+        # Back-pressure: past the limit, say so instead of queueing work we can't get to
+        depth = await self.work_queue.depth()
+        queue_depth.set(depth)
+        if depth >= Config.WORK_QUEUE_MAX_DEPTH:
+            logger.warning("Work queue full (%s jobs), rejecting %s URL(s)", depth, len(urls))
+            queue_rejected_total.inc()
+            if Config.ENABLE_REACTIONS:
+                try:
+                    await self.dispatcher.call(message.channel.id, lambda: message.add_reaction(BUSY_REACTION))
+                except discord.errors.Forbidden:
+                    logger.warning("Cannot add reaction - missing permissions")
+            return
+        
+        self._prefetch(urls)
+        
+        # All results for this message go into one reply that is edited in place.
+        # Registered before enqueueing so a worker never sees the job without it.
+        self._batches[message.id] = self._create_batch(message, urls, notice)
+        await self.work_queue.enqueue(message.channel.id, message.id, urls, notice)
+        queue_depth.inc()
+    
+    def _prefetch(self, urls: List[str]):
+        """
+        Let the API probe the videos and fetch their subtitles while the
+        job waits in the queue, so processing starts past those stages.
+        """
+        if not Config.API_PREFETCH:
+            return
         for url in urls:
-            await self._process_single_url(message, url)
+            task = asyncio.create_task(self._prefetch_one(url))
+            self._prefetches.add(task)
+            task.add_done_callback(self._prefetches.discard)
     
-    async def _process_single_url(self, message, url):
-        """Process a single video URL."""
+    async def _prefetch_one(self, url: str):
+        # A cached video is answered without the API, so there is nothing to warm
+        if await self.result_cache.contains(self.url_detector.get_video_id(url) or url):
+            return
+        await self.api_client.prefetch(url)
+    
+    async def start(self, bot):
+        """
+        Replay jobs left over from a previous run and start the workers.
+        
+        Args:
+            bot: The bot, used to fetch the messages of replayed jobs
+        """
+        self.bot = bot
+        replayed = await self.work_queue.replay()
+        if replayed:
+            logger.info("Replaying %s queued job(s) from the last run", replayed)
+            queue_replayed_total.inc(replayed)
+        queue_depth.set(replayed)
+        
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(Config.WORK_QUEUE_WORKERS)]
+    
+    async def stop(self):
+        """Stop the workers. Jobs they were running are replayed on the next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def _worker(self):
+        """Drain the work queue, one job at a time."""
+        while True:
+            job = await self.work_queue.claim()
+            if job is None:
+                await self.work_queue.wait_for_work(timeout=1.0)
+                continue
+            try:
+                await self._run_job(job)
+            except Exception as e:
+                logger.error("Error running job %s: %s", job.id, e)
+                await self._retry_job(job, e)
+    
+    async def _run_job(self, job: Job):
+        """Process every URL of a job and deliver the reply."""
+        batch = self._batches.get(job.message_id)
+        if batch is None:
+            batch = await self._restore_batch(job)
+            if batch is None:
+                # The message is gone or unreachable, nothing left to reply to
+                await self._complete_job(job)
+                return
+        
+        # Earlier attempts cached what they got, so a retry only re-requests what failed
+        final_attempt = job.attempts >= self.work_queue.max_attempts
+        for index, url in enumerate(job.urls):
+            try:
+                embed, failed = await self._process_single_url(url, raise_errors=not final_attempt)
+            except Exception as e:
+                await self._retry_job(job, e)
+                return
+            batch.set_result(index, embed, failed)
+        
         try:
-            if Config.ENABLE_REACTIONS:
-                await message.add_reaction("🔄")
-            
-            logger.info(f"Processing URL: {url}")
-            
-            if await self.api_client.health_check():
-                await message.channel.send("exa healthy")
-            else:
-                await message.channel.send("❌ exa unhealthy")
-            # recipe_data = await self.api_client.process_video(url)
-            
-            # if recipe_data:
-            #     embed = self.embed_builder.create_recipe_embed(recipe_data, url)
-            #     await message.channel.send(embed=embed)
-                
-            #     # Update reaction to success
-            #     if Config.ENABLE_REACTIONS:
-            #         await message.remove_reaction("🔄", message.guild.me)
-            #         await message.add_reaction("✅")
-                
-            #     logger.info(f"Successfully processed URL: {url}")
-            # else:
-            #     # Handle case where API returns no data
-            #     await self._handle_processing_error(message, "No recipe data found in video")
-        
-        except Exception as e:
-            logger.error(f"Error processing URL {url}: {e}")
-            await self._handle_processing_error(message, str(e))
+            await batch.finish()
+        except discord.errors.Forbidden:
+            logger.warning("Cannot send message - missing permissions")
+        await self._complete_job(job)
+    
+    async def _retry_job(self, job: Job, error: Exception):
+        if await self.work_queue.retry(job, str(error)):
+            logger.info("Retrying job %s later (attempt %s of %s failed)",
+                        job.id, job.attempts, self.work_queue.max_attempts)
+            queue_retries_total.inc()
+        else:
+            logger.error("Giving up on job %s after %s attempts", job.id, job.attempts)
+            batch = self._batches.get(job.message_id)
+            if batch is not None:
+                # Replace the processing embeds so the reply doesn't look stuck
+                batch.fail_remaining(self.embed_builder.create_error_embed(str(error)))
+                try:
+                    await batch.finish()
+                except discord.HTTPException as e:
+                    logger.warning("Could not send the failure reply for job %s: %s", job.id, e)
+            self._batches.pop(job.message_id, None)
+            queue_depth.dec()
     
-    async def _handle_processing_error(self, message, error_msg):
-        """Handle errors during URL processing."""
+    async def _complete_job(self, job: Job):
+        await self.work_queue.complete(job)
+        self._batches.pop(job.message_id, None)
+        queue_depth.dec()
+    
+    async def _restore_batch(self, job: Job) -> Optional[ResponseBatch]:
+        """Fetch the message of a replayed job and start a new reply batch for it."""
+        if self.bot is None:
+            return None
         try:
-            # Update reaction to error
-            if Config.ENABLE_REACTIONS:
-                await message.remove_reaction("🔄", message.guild.me)
-                await message.add_reaction("❌")
-            
-            # Send error embed
-            embed = self.embed_builder.create_error_embed(error_msg)
-            await message.channel.send(embed=embed)
+            channel = self.bot.get_channel(job.channel_id) or await self.bot.fetch_channel(job.channel_id)
+            message = await channel.fetch_message(job.message_id)
+        except discord.HTTPException as e:
+            logger.warning("Dropping job %s, message %s unavailable: %s", job.id, job.message_id, e)
+            return None
+        
+        batch = self._create_batch(message, job.urls, job.notice)
+        self._batches[job.message_id] = batch
+        return batch
+    
+    def _create_batch(self, message, urls, notice) -> ResponseBatch:
+        batch = self.dispatcher.create_batch(message, self.embed_builder, urls, notice)
+        batch.start(enable_reactions=Config.ENABLE_REACTIONS)
+        return batch
+    
+    async def _process_single_url(self, url, raise_errors=False):
+        """
+        Process a single video URL.
+        
+        Args:
+            url: Video URL to process
+            raise_errors: Re-raise API errors so the job can be retried,
+                instead of returning an error embed
+        
+        Returns:
+            Tuple of the embed to show for the URL and whether it failed
+        """
+        with log_context(request_id=uuid.uuid4().hex[:12], url=url):
+            started = time.perf_counter()
+            urls_in_flight.inc()
+            try:
+                logger.info("Processing URL: %s", url, extra={'stage': 'received'})
+                
+                # Reposts of the same video share a key, so answer them from the cache
+                cache_key = self.url_detector.get_video_id(url) or url
+                response = await self.result_cache.get(cache_key)
+                if response is not None:
+                    logger.info("Result cache hit for %s", cache_key, extra={'stage': 'cache'})
+                else:
+                    api_started = time.perf_counter()
+                    try:
+                        response = await self.api_client.process_video(url)
+                    finally:
+                        api_elapsed = time.perf_counter() - api_started
+                        api_call_seconds.observe(api_elapsed)
+                    logger.info("API call finished", extra={
+                        'stage': 'api',
+                        'latency_ms': round(api_elapsed * 1000, 1)
+                    })
+                    if response:
+                        await self.result_cache.set(cache_key, response)
+                
+                # The API returns the transcript plus the recipe extracted from it
+                recipe_data = (response or {}).get('recipe')
+                if not recipe_data or not (recipe_data.get('ingredients') or recipe_data.get('instructions')):
+                    # Handle case where API returns no data
+                    return self.embed_builder.create_error_embed("No recipe data found in video"), True
+                
+                logger.info("Successfully processed URL: %s", url, extra={
+                    'stage': 'done',
+                    'latency_ms': round((time.perf_counter() - started) * 1000, 1)
+                })
+                return self.embed_builder.create_recipe_embed(recipe_data, url), False
             
-        except discord.errors.Forbidden:
-            logger.warning("Cannot add reaction or send message - missing permissions")
-        except Exception as e:
-            logger.error(f"Error handling processing error: {e}")
+            except Exception as e:
+                logger.error("Error processing URL %s: %s", url, e, extra={'stage': 'failed'})
+                if raise_errors:
+                    raise
+                return self.embed_builder.create_error_embed(str(e)), True
+            finally:
+                urls_in_flight.dec()
+    
+    async def _is_user_rate_limited(self, user):
+        """Check the per-user limit, counted in the shared store across all shards."""
+        if not Config.USER_RATE_LIMIT:
+            return False
+        
+        # A SQLite store blocks, possibly on another shard's write lock
+        loop = asyncio.get_running_loop()
+        count = await loop.run_in_executor(None, self.state_store.incr, f"ratelimit:user:{user.id}", 60)
+        return count > Config.USER_RATE_LIMIT
     
     def _is_channel_allowed(self, channel):
         """Check if the channel is allowed for processing."""
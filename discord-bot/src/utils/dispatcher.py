@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from utils.metrics import metrics
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+PROCESSING_REACTION = "🔄"
+SUCCESS_REACTION = "✅"
+ERROR_REACTION = "❌"
+BUSY_REACTION = "⏳"
+
+# Discord allows at most 10 embeds per message
+MAX_EMBEDS_PER_MESSAGE = 10
+
+rate_limited_total = metrics.counter(
+    'discord_rate_limited_total', 'Discord 429 responses seen by discord.py'
+)
+rate_limit_wait_seconds = metrics.counter(
+    'discord_rate_limit_wait_seconds_total', 'Seconds discord.py slept after 429 responses'
+)
+bucket_wait_seconds = metrics.counter(
+    'discord_bucket_wait_seconds_total', 'Seconds outbound calls waited for their channel bucket'
+)
+outbound_calls_total = metrics.counter(
+    'discord_outbound_calls_total', 'Sends, edits and reaction changes made by the dispatcher'
+)
+
+
+class RateLimitObserver(logging.Filter):
+    """
+    Counts 429s from discord.py's HTTP client.
+    
+    discord.py retries rate-limited requests internally and only reports
+    them through warnings on the 'discord.http' logger, so this filter
+    watches for those records. Every rate-limit 429 is logged there,
+    including the ones discord.py gives up on and raises, so this is the
+    only place they are counted.
+    """
+    
+    def filter(self, record):
+        if isinstance(record.msg, str) and record.msg.startswith('We are being rate limited.'):
+            rate_limited_total.inc()
+            # Only retries sleep; a retry_after that was too long errors at once
+            if 'Retrying in' in record.msg and record.args and isinstance(record.args[-1], (int, float)):
+                rate_limit_wait_seconds.inc(record.args[-1])
+        return True
+
+
+# One observer per process; a filter per dispatcher would count each 429 several times
+logging.getLogger('discord.http').addFilter(RateLimitObserver())
+
+
+class DiscordDispatcher:
+    """
+    Paces outbound Discord calls per channel.
+    
+    Each channel gets a minimum interval between calls so a burst of links
+    waits locally instead of draining the channel's rate-limit bucket and
+    collecting 429s.
+    """
+    
+    def __init__(self, min_interval: float = 0.25, ack_delay: float = 0.75, edit_interval: float = 1.0):
+        self.min_interval = min_interval
+        self.ack_delay = ack_delay
+        self.edit_interval = edit_interval
+        self._channel_locks: Dict[int, asyncio.Lock] = {}
+        self._last_call: Dict[int, float] = {}
+    
+    async def call(self, channel_id: int, action: Callable[[], Awaitable]):
+        """
+        Run one outbound Discord call, waiting for the channel's pacing slot.
+        
+        Args:
+            channel_id: Channel the call targets
+            action: Zero-argument coroutine function making the call
+        
+        Returns:
+            Whatever the call returns
+        """
+        lock = self._channel_locks.setdefault(channel_id, asyncio.Lock())
+        async with lock:
+            wait = self._last_call.get(channel_id, 0.0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                bucket_wait_seconds.inc(wait)
+                await asyncio.sleep(wait)
+            try:
+                outbound_calls_total.inc()
+                return await action()
+            finally:
+                self._last_call[channel_id] = time.monotonic()
+    
+    def create_batch(self, message, embed_builder, urls: List[str], notice: Optional[str] = None) -> 'ResponseBatch':
+        """
+        Start collecting the replies for one message's URLs.
+        
+        Args:
+            message: Message the URLs were posted in
+            embed_builder: RecipeEmbedBuilder used for the processing embeds
+            urls: URLs being processed, one embed each
+            notice: Optional text sent alongside the embeds
+        
+        Returns:
+            A ResponseBatch that owns the reply message and status reaction
+        """
+        return ResponseBatch(self, message, embed_builder, urls[:MAX_EMBEDS_PER_MESSAGE], notice)
+
+
+class ResponseBatch:
+    """
+    One reply message holding an embed per URL, plus the status reaction.
+    
+    Nothing is sent until ack_delay passes, so results answered quickly
+    (e.g. from the result cache) go out as a single message with a single
+    reaction. Slower batches post one message of processing embeds and
+    edit it in place as results arrive, coalescing edits that land within
+    edit_interval of each other.
+    """
+    
+    def __init__(self, dispatcher: DiscordDispatcher, message, embed_builder, urls: List[str], notice: Optional[str]):
+        self.dispatcher = dispatcher
+        self.message = message
+        self.notice = notice
+        self.embeds = [embed_builder.create_processing_embed(url) for url in urls]
+        self.failed = [False] * len(urls)
+        self.settled = [False] * len(urls)
+        self.enable_reactions = True
+        
+        self._reply: Optional[discord.Message] = None
+        self._reaction: Optional[str] = None
+        self._ack_task: Optional[asyncio.Task] = None
+        self._acking = False
+        self._edit_task: Optional[asyncio.Task] = None
+    
+    def start(self, enable_reactions: bool = True):
+        """Schedule the processing acknowledgement."""
+        self.enable_reactions = enable_reactions
+        self._ack_task = asyncio.create_task(self._acknowledge())
+    
+    def set_result(self, index: int, embed: discord.Embed, failed: bool = False):
+        """
+        Replace the embed for one URL with its result.
+        
+        Args:
+            index: Position of the URL in the batch
+            embed: Recipe or error embed
+            failed: Whether processing this URL failed
+        """
+        if index >= len(self.embeds):
+            return
+        self.embeds[index] = embed
+        self.failed[index] = failed
+        self.settled[index] = True
+        
+        if self._reply is not None and self._edit_task is None:
+            self._edit_task = asyncio.create_task(self._edit_later())
+    
+    def fail_remaining(self, embed: discord.Embed):
+        """Give every URL still showing its processing embed a failure result."""
+        for index, settled in enumerate(self.settled):
+            if not settled:
+                self.set_result(index, embed, failed=True)
+    
+    async def finish(self):
+        """Send or edit the final message and set the final reaction."""
+        final_reaction = ERROR_REACTION if all(self.failed) else SUCCESS_REACTION
+        
+        if self._ack_task is not None:
+            if self._acking:
+                # Already sending, wait so the reply isn't posted twice
+                try:
+                    await self._ack_task
+                except discord.HTTPException as e:
+                    # The final reply below still goes out, sent fresh if the ack never was
+                    logger.warning("Processing acknowledgement failed: %s", e)
+            else:
+                self._ack_task.cancel()
+        
+        if self._edit_task is not None:
+            self._edit_task.cancel()
+            self._edit_task = None
+        
+        if self._reply is None:
+            self._reply = await self._send(self.embeds)
+        else:
+            await self._edit()
+        
+        await self._set_reaction(final_reaction)
+    
+    async def _acknowledge(self):
+        await asyncio.sleep(self.dispatcher.ack_delay)
+        self._acking = True
+        self._reply = await self._send(self.embeds)
+        await self._set_reaction(PROCESSING_REACTION)
+    
+    async def _edit_later(self):
+        await asyncio.sleep(self.dispatcher.edit_interval)
+        self._edit_task = None
+        await self._edit()
+    
+    async def _send(self, embeds: List[discord.Embed]):
+        channel = self.message.channel
+        return await self.dispatcher.call(
+            channel.id,
+            lambda: channel.send(content=self.notice, embeds=list(embeds))
+        )
+    
+    async def _edit(self):
+        reply = self._reply
+        await self.dispatcher.call(
+            self.message.channel.id,
+            lambda: reply.edit(content=self.notice, embeds=list(self.embeds))
+        )
+    
+    async def _set_reaction(self, emoji: str):
+        """Move the status reaction to emoji, skipping calls that change nothing."""
+        if not self.enable_reactions or self._reaction == emoji:
+            return
+        
+        channel = self.message.channel
+        try:
+            if self._reaction is not None:
+                previous = self._reaction
+                me = self.message.guild.me if self.message.guild else channel.me
+                await self.dispatcher.call(channel.id, lambda: self.message.remove_reaction(previous, me))
+            await self.dispatcher.call(channel.id, lambda: self.message.add_reaction(emoji))
+            self._reaction = emoji
+        except discord.errors.Forbidden:
+            logger.warning("Cannot change reaction - missing permissions")
@@ -1,6 +1,13 @@
 import discord
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+# Discord rejects embeds with longer titles, field names and values, or
+# with more text than EMBED_LIMIT in total
+TITLE_LIMIT = 256
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+EMBED_LIMIT = 6000
 
 class RecipeEmbedBuilder:
     """Builds Discord embeds for recipe data and other responses."""
@@ -26,8 +33,9 @@ class RecipeEmbedBuilder:
             Discord embed with recipe information
         """
         # Extract recipe information (adjust based on your API response structure)
-        title = recipe_data.get('title', 'Recipe from Video')
-        description = recipe_data.get('description', 'Recipe extracted from video')
+        # Fields the extractor couldn't find come back as None
+        title = recipe_data.get('title') or 'Recipe from Video'
+        description = recipe_data.get('description') or 'Recipe extracted from video'
         ingredients = recipe_data.get('ingredients', [])
         instructions = recipe_data.get('instructions', [])
         prep_time = recipe_data.get('prep_time')
@@ -151,6 +159,45 @@ class RecipeEmbedBuilder:
         
         return embed
     
+    def create_search_embed(self, query: str, results: List[Dict[str, Any]]) -> discord.Embed:
+        """
+        Create an embed listing search results.
+        
+        Args:
+            query: Search query
+            results: Results from the API's /search endpoint
+            
+        Returns:
+            Discord embed with one field per result
+        """
+        title = f"🔎 Results for \"{query}\""
+        if len(title) > TITLE_LIMIT:
+            title = title[:TITLE_LIMIT - 2] + "…\""
+        embed = discord.Embed(
+            title=title,
+            color=self.colors['info'],
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text="ReelMeals Bot")
+        
+        if not results:
+            embed.description = "No processed videos match that search yet."
+        
+        for result in results:
+            name = (result.get('title') or 'Recipe from Video')[:FIELD_NAME_LIMIT]
+            link = f"[Watch Video]({result['url']})" if result.get('url') else ''
+            # Drop whole snippet lines, so a cut never splits the link or a **bold** match
+            lines = (result.get('snippet') or '').splitlines()
+            while lines and len("\n".join(lines + [link])) > FIELD_VALUE_LIMIT:
+                lines.pop()
+            value = "\n".join(line for line in lines + [link] if line) or '\u200b'
+            # Results past Discord's total limit are left out rather than cut short
+            if len(embed) + len(name) + len(value) > EMBED_LIMIT:
+                break
+            embed.add_field(name=name, value=value, inline=False)
+        
+        return embed
+    
     def _format_ingredients(self, ingredients) -> str:
         """Format ingredients list for display."""
         if isinstance(ingredients, list):
@@ -1,10 +1,96 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from config import Config
 
+# Structured fields attached to every record logged inside a log_context() block
+CONTEXT_FIELDS = ('request_id', 'url', 'stage')
+_context = {field: contextvars.ContextVar(field, default=None) for field in CONTEXT_FIELDS}
+
+# Extra fields copied into JSON records when passed via `extra=`
+EXTRA_FIELDS = CONTEXT_FIELDS + ('latency_ms',)
+
+# Log arguments of these types can't change before the listener thread formats them
+IMMUTABLE_ARG_TYPES = (str, int, float, bytes, type(None))
+
+_listener = None
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attach structured fields (request_id, url, stage) to every record logged
+    in this block, including from tasks it spawns.
+    """
+    tokens = [(_context[name], _context[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def get_log_context(field):
+    """Return the current value of a structured logging field."""
+    return _context[field].get()
+
+class ContextFilter(logging.Filter):
+    """Copies the current log_context() fields onto each record."""
+    
+    def filter(self, record):
+        for field, var in _context.items():
+            if getattr(record, field, None) is None:
+                setattr(record, field, var.get())
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+    
+    The stock handler merges msg and args on the calling thread; here the
+    record is enqueued as-is so %-style arguments are only formatted off the
+    event loop, and only if a handler actually emits the record. That is
+    only safe for immutable arguments: a record with any other argument (a
+    list, a dict, an exception) is formatted here, so it logs the values
+    they had at the call.
+    """
+    
+    def prepare(self, record):
+        record = copy.copy(record)
+        # A mapping of named arguments is itself mutable
+        lazy = isinstance(record.args, tuple) and all(isinstance(arg, IMMUTABLE_ARG_TYPES) for arg in record.args)
+        if record.args and not lazy:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+    
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 def setup_logger():
     """Set up logging configuration for the bot."""
+    global _listener
     
     # Create logger
     logger = logging.getLogger('mealbot')
@@ -18,18 +104,21 @@ def setup_logger():
     logger.setLevel(log_level)
     
     # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if Config.LOG_FORMAT == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     
     # Console handler - always add this for immediate feedback
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
-    # File handler (optional)
+    # Rotating file handler (optional)
     if Config.LOG_FILE:
         try:
             # Ensure logs directory exists
@@ -37,16 +126,29 @@ def setup_logger():
             if log_dir != '.' and not os.path.exists(log_dir):
                 os.makedirs(log_dir)
             
-            file_handler = logging.FileHandler(Config.LOG_FILE, encoding='utf-8')
+            file_handler = logging.handlers.RotatingFileHandler(
+                Config.LOG_FILE,
+                maxBytes=Config.LOG_MAX_BYTES,
+                backupCount=Config.LOG_BACKUP_COUNT,
+                encoding='utf-8'
+            )
             file_handler.setLevel(log_level)
             file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-            
-            # Test log file creation
-            logger.info(f"Log file created: {Config.LOG_FILE}")
+            handlers.append(file_handler)
         except Exception as e:
             print(f"Could not create file handler: {e}")
-            logger.warning(f"Could not create file handler: {e}")
+    
+    # Handlers run on a background thread so disk and stdout stalls never
+    # block the event loop; the logger itself only enqueues records
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
     
     # Set discord.py logging to INFO to see connection issues
     discord_logger = logging.getLogger('discord')
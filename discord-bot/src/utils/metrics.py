@@ -0,0 +1,197 @@
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds, from fast cache answers to multi-minute transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    """A monotonically increasing value."""
+    
+    type = 'counter'
+    
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        # Start at zero so the series is scraped before the first increment
+        self._values: Dict[LabelKey, float] = {(): 0.0}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the counter by amount."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    @property
+    def value(self) -> float:
+        """Total across all label sets."""
+        return sum(self._values.values())
+    
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge:
+    """A value that can go up and down, or be read from a callback when scraped."""
+    
+    type = 'gauge'
+    
+    def __init__(self, name: str, description: str, fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.description = description
+        self.fn = fn
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+    
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+    
+    @property
+    def value(self) -> float:
+        if self.fn is not None:
+            return float(self.fn())
+        return sum(self._values.values())
+    
+    def samples(self) -> List[str]:
+        if self.fn is not None:
+            return [f"{self.name} {self.value}"]
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram:
+    """Counts observations into cumulative buckets, Prometheus style."""
+    
+    type = 'histogram'
+    
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        """Record one observation."""
+        key = _label_key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+    
+    @property
+    def value(self) -> float:
+        """Number of observations across all label sets."""
+        return sum(count for _, _, count in self._values.values())
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', str(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the bot's named metrics."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+    
+    def counter(self, name: str, description: str = '') -> Counter:
+        """
+        Get or create a counter.
+        
+        Args:
+            name: Metric name, e.g. 'discord_rate_limited_total'
+            description: Help text for the metric
+        
+        Returns:
+            The counter registered under name
+        """
+        return self._get_or_create(name, lambda: Counter(name, description))
+    
+    def gauge(self, name: str, description: str = '', fn: Optional[Callable[[], float]] = None) -> Gauge:
+        """
+        Get or create a gauge.
+        
+        Args:
+            name: Metric name
+            description: Help text for the metric
+            fn: Optional callback read at scrape time instead of a stored value
+        
+        Returns:
+            The gauge registered under name
+        """
+        gauge = self._get_or_create(name, lambda: Gauge(name, description, fn))
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+    
+    def histogram(self, name: str, description: str = '', buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get or create a histogram.
+        
+        Args:
+            name: Metric name, e.g. 'api_request_duration_seconds'
+            description: Help text for the metric
+            buckets: Upper bounds of the buckets in seconds
+        
+        Returns:
+            The histogram registered under name
+        """
+        return self._get_or_create(name, lambda: Histogram(name, description, buckets))
+    
+    def snapshot(self) -> Dict[str, float]:
+        """Return the current value of every metric."""
+        return {name: metric.value for name, metric in self._metrics.items()}
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            full_name = f"mealbot_{metric.name}"
+            lines.append(f"# HELP {full_name} {metric.description}")
+            lines.append(f"# TYPE {full_name} {metric.type}")
+            lines.extend(f"mealbot_{sample}" for sample in metric.samples())
+        return '\n'.join(lines) + '\n'
+    
+    def _get_or_create(self, name, factory):
+        if name not in self._metrics:
+            self._metrics[name] = factory()
+        return self._metrics[name]
+
+
+# Shared registry for the whole bot process
+metrics = MetricsRegistry()
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils.state_store import StateStore
+
+
+class ResultCache:
+    """
+    In-process LRU cache of processed video results with a TTL.
+    
+    Entries are keyed by the canonical video ID from
+    URLDetector.get_video_id, so reposts of the same video are answered
+    without calling the API. When a StateStore is given, entries are
+    written through to it and read back on a local miss, so the cache
+    survives restarts and is shared with other shard processes. Store
+    calls block on SQLite, so they run in the default executor rather
+    than on the event loop.
+    """
+    
+    KEY_PREFIX = 'result:'
+    
+    def __init__(self, max_size: int = 512, ttl: float = 86400, store: Optional[StateStore] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        
+        # key -> (expires_at, value), most recently used last
+        self._entries: "OrderedDict[str, Tuple[float, Dict[Any, Any]]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[Dict[Any, Any]]:
+        """
+        Look up a cached result.
+        
+        Args:
+            key: Canonical video key
+        
+        Returns:
+            The cached result, or None if missing or expired
+        """
+        value = await self._lookup(key)
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+    
+    async def contains(self, key: str) -> bool:
+        """
+        Check for a fresh cached result without counting a hit or miss.
+        
+        Args:
+            key: Canonical video key
+        
+        Returns:
+            True if get would answer from the cache
+        """
+        return await self._lookup(key) is not None
+    
+    async def set(self, key: str, value: Dict[Any, Any]):
+        """
+        Store a processed result.
+        
+        Args:
+            key: Canonical video key
+            value: Result returned by the API
+        """
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        
+        if self.store is not None:
+            await self._run(self.store.set, self.KEY_PREFIX + key, json.dumps([expires_at, value]), self.ttl)
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'size': len(self._entries),
+        }
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    async def _lookup(self, key: str) -> Optional[Dict[Any, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                return value
+            self._entries.pop(key, None)
+        
+        # Another shard, or a previous run, may have stored it
+        if self.store is not None:
+            stored = await self._run(self.store.get, self.KEY_PREFIX + key)
+            if stored is not None:
+                expires_at, value = json.loads(stored)
+                self._remember(key, expires_at, value)
+                return value
+        
+        return None
+    
+    def _remember(self, key: str, expires_at: float, value: Dict[Any, Any]):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,152 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+from utils.logger import setup_logger
+from utils.metrics import metrics
+
+logger = setup_logger()
+
+retries_total = metrics.counter('api_retries_total', 'API requests sent again after a retryable failure')
+retries_denied_total = metrics.counter('api_retries_denied_total', 'Retries skipped because the retry budget was spent')
+hedges_total = metrics.counter('api_hedged_requests_total', 'Second requests sent because the first was slow')
+
+
+class APIError(Exception):
+    """
+    An Experience API request that failed.
+    
+    Args:
+        message: Shown to the user when the URL can't be processed
+        retryable: Whether sending the same request again may succeed
+        status: HTTP status of the response, if there was one
+    """
+    
+    def __init__(self, message: str, retryable: bool = False, status: Optional[int] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status = status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, dropped connections and APIErrors marked retryable."""
+    if isinstance(error, APIError):
+        return error.retryable
+    # aiohttp's own timeout errors are both ClientErrors and TimeoutErrors
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+class RetryBudget:
+    """
+    Caps retries at a share of recent requests, so a struggling API sees
+    at most ratio extra load rather than every request repeated.
+    
+    Each request earns ratio of a token, up to minimum tokens banked, and
+    each retry spends one. The minimum lets a quiet bot still retry.
+    """
+    
+    def __init__(self, ratio: float = 0.2, minimum: float = 10):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.tokens = minimum
+    
+    def record_request(self):
+        self.tokens = min(self.minimum, self.tokens + self.ratio)
+    
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RetryPolicy:
+    """
+    Retries failed calls with jittered exponential backoff.
+    
+    Args:
+        max_attempts: Attempts per call, including the first
+        base_delay: Seconds before the first retry, doubled per attempt
+        max_delay: Upper bound on a single delay
+        budget: Optional RetryBudget shared by every call
+    """
+    
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 budget: Optional[RetryBudget] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+    
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the given failed attempt, jittered so clients don't retry in lockstep."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+    
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await call(), calling it again after retryable failures.
+        
+        Returns:
+            The result of the first successful attempt
+        
+        Raises:
+            The last error, once it isn't retryable, the attempts are used
+            up or the budget is spent
+        """
+        if self.budget is not None:
+            self.budget.record_request()
+        attempt = 1
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_attempts:
+                    raise
+                if self.budget is not None and not self.budget.try_spend():
+                    logger.warning("Retry budget spent, not retrying: %s", e)
+                    retries_denied_total.inc()
+                    raise
+                delay = self.delay(attempt)
+                logger.warning("API attempt %s of %s failed, retrying in %.1fs: %s",
+                               attempt, self.max_attempts, delay, e)
+                retries_total.inc()
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: float) -> Any:
+    """
+    Await call(), starting a second identical call if the first hasn't
+    finished after delay seconds, and return whichever succeeds first.
+    Only for requests that are cheap and safe to send twice.
+    
+    Args:
+        call: Starts one request
+        delay: Seconds to wait before hedging, 0 to never hedge
+    """
+    first = asyncio.ensure_future(call())
+    pending = {first}
+    error = None
+    try:
+        if not delay:
+            return await first
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+        
+        hedges_total.inc()
+        pending.add(asyncio.ensure_future(call()))
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Also reached when the caller is cancelled mid-wait, so no request outlives it
+        for task in pending:
+            task.cancel()
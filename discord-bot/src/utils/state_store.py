@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+
+class StateStore(ABC):
+    """
+    Key/value store for state shared between bot processes.
+    
+    Shard processes each run their own event loop, so anything that must
+    be consistent across shards (the result cache, per-user rate limits)
+    goes through this interface instead of process memory.
+    """
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the value for key, or None if missing or expired."""
+    
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float):
+        """Store value under key for ttl seconds."""
+    
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove key if present."""
+    
+    @abstractmethod
+    def incr(self, key: str, ttl: float) -> int:
+        """
+        Atomically increment a counter.
+        
+        The counter expires ttl seconds after it was created, which makes
+        it usable as a fixed-window rate limit.
+        
+        Returns:
+            The counter value after incrementing
+        """
+    
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class MemoryStateStore(StateStore):
+    """State store for a single process."""
+    
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self._data.pop(key, None)
+            return None
+        return value
+    
+    def set(self, key: str, value: str, ttl: float):
+        self._data[key] = (time.time() + ttl, value)
+    
+    def delete(self, key: str):
+        self._data.pop(key, None)
+    
+    def incr(self, key: str, ttl: float) -> int:
+        with self._lock:
+            current = self.get(key)
+            if current is None:
+                self._data[key] = (time.time() + ttl, '1')
+                return 1
+            expires_at, _ = self._data[key]
+            value = int(current) + 1
+            self._data[key] = (expires_at, str(value))
+            return value
+
+
+class SQLiteStateStore(StateStore):
+    """
+    State store backed by a local SQLite file in WAL mode.
+    
+    Every shard process on the host opens the same file, which gives them
+    a shared cache and shared counters without an external service.
+    """
+    
+    def __init__(self, path: str):
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM state WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM state WHERE key = ?", (key,))
+    
+    def incr(self, key: str, ttl: float) -> int:
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front so concurrent
+            # processes can't both read the same value
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("DELETE FROM state WHERE key = ? AND expires_at <= ?", (key, now))
+                self._db.execute(
+                    "INSERT INTO state (key, value, expires_at) VALUES (?, '0', ?) "
+                    "ON CONFLICT(key) DO NOTHING",
+                    (key, now + ttl)
+                )
+                self._db.execute(
+                    "UPDATE state SET value = CAST(value AS INTEGER) + 1 WHERE key = ?", (key,)
+                )
+                row = self._db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return int(row[0])
+    
+    def close(self):
+        self._db.close()
+
+
+def create_state_store(backend: str, path: str = '') -> StateStore:
+    """
+    Build the configured state store.
+    
+    Args:
+        backend: 'memory' or 'sqlite'
+        path: SQLite file path, required for the 'sqlite' backend
+    
+    Returns:
+        A StateStore instance
+    """
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("STATE_STORE_PATH is required for the sqlite state store")
+        return SQLiteStateStore(path)
+    if backend == 'memory':
+        return MemoryStateStore()
+    raise ValueError(f"Unknown state store backend: {backend}")
@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import List, Optional
 from config import Config
 
 class URLDetector:
@@ -9,15 +9,15 @@ class URLDetector:
         # URL patterns for different platforms
         self.patterns = {
             'youtube': [
-                r'https?://(?:www\.)?youtube\.com/watch\?v=[\w-]+',
-                r'https?://(?:www\.)?youtube\.com/shorts/[\w-]+',
-                r'https?://youtu\.be/[\w-]+',
-                r'https?://(?:m\.)?youtube\.com/watch\?v=[\w-]+',
+                r'https?://(?:www\.)?youtube\.com/watch\?v=(?P<id>[\w-]+)',
+                r'https?://(?:www\.)?youtube\.com/shorts/(?P<id>[\w-]+)',
+                r'https?://youtu\.be/(?P<id>[\w-]+)',
+                r'https?://(?:m\.)?youtube\.com/watch\?v=(?P<id>[\w-]+)',
             ],
             'instagram': [
-                r'https?://(?:www\.)?instagram\.com/reel/[\w-]+',
-                r'https?://(?:www\.)?instagram\.com/p/[\w-]+',
-                r'https?://(?:www\.)?instagram\.com/tv/[\w-]+',
+                r'https?://(?:www\.)?instagram\.com/reel/(?P<id>[\w-]+)',
+                r'https?://(?:www\.)?instagram\.com/p/(?P<id>[\w-]+)',
+                r'https?://(?:www\.)?instagram\.com/tv/(?P<id>[\w-]+)',
             ]
         }
         
@@ -101,6 +101,27 @@ class URLDetector:
         
         return 'unknown'
     
+    def get_video_id(self, url: str) -> Optional[str]:
+        """
+        Build a canonical video key for a URL.
+        
+        Different URL shapes for the same video (youtu.be links, shorts,
+        mobile links, extra query parameters) map to the same key.
+        
+        Args:
+            url: URL to check
+            
+        Returns:
+            Key in the form '<platform>:<video id>', or None if unsupported
+        """
+        for platform, patterns in self.compiled_patterns.items():
+            for pattern in patterns:
+                match = pattern.match(url)
+                if match:
+                    return f"{platform}:{match.group('id')}"
+        
+        return None
+    
     def is_supported_platform(self, platform: str) -> bool:
         """
         Check if a platform is supported and enabled.
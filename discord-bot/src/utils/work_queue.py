@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class Job:
+    """One message's worth of URLs waiting to be processed."""
+    id: int
+    channel_id: int
+    message_id: int
+    urls: List[str]
+    notice: Optional[str]
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Durable queue of URL jobs backed by a SQLite file in WAL mode.
+    
+    Jobs survive restarts: anything still pending or running when the bot
+    stops is picked up again by replay() on the next start. All database
+    calls run in a worker thread so the event loop never waits on disk.
+    Jobs that gave up are kept for finished_ttl seconds, for inspection,
+    then purged.
+    """
+    
+    def __init__(self, path: str, max_attempts: int = 3, base_backoff: float = 5.0, max_backoff: float = 300.0,
+                 finished_ttl: float = 7 * 86400):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.finished_ttl = finished_ttl
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Condition] = None
+        
+        db_dir = os.path.dirname(path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "channel_id INTEGER NOT NULL, "
+            "message_id INTEGER NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, "
+            "last_error TEXT, "
+            "created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_attempt_at)")
+        self._purge()
+    
+    async def enqueue(self, channel_id: int, message_id: int, urls: List[str], notice: Optional[str] = None) -> int:
+        """
+        Add a job for a message's URLs.
+        
+        Returns:
+            The job ID
+        """
+        payload = json.dumps({'urls': urls, 'notice': notice})
+        job_id = await self._run(self._insert, channel_id, message_id, payload)
+        # Wake a single idle worker rather than the whole pool
+        async with self._condition():
+            self._condition().notify()
+        return job_id
+    
+    async def claim(self) -> Optional[Job]:
+        """Take the next due job and mark it running, or return None."""
+        return await self._run(self._claim)
+    
+    async def wait_for_work(self, timeout: float):
+        """Sleep until a job is enqueued or the timeout passes."""
+        condition = self._condition()
+        async with condition:
+            try:
+                await asyncio.wait_for(condition.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def complete(self, job: Job):
+        """Mark a job done."""
+        await self._run(self._update, job.id, DONE, None, None)
+    
+    async def retry(self, job: Job, error: str) -> bool:
+        """
+        Schedule a failed job again with jittered exponential backoff.
+        
+        Returns:
+            False if the job has used all its attempts and was marked failed
+        """
+        if job.attempts >= self.max_attempts:
+            await self._run(self._update, job.id, FAILED, None, error)
+            return False
+        
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (job.attempts - 1))
+        delay = random.uniform(delay / 2, delay)
+        await self._run(self._update, job.id, PENDING, time.time() + delay, error)
+        return True
+    
+    async def replay(self) -> int:
+        """
+        Return jobs left running by a previous process to the queue.
+        
+        Returns:
+            Number of jobs waiting to be processed
+        """
+        return await self._run(self._replay)
+    
+    async def depth(self) -> int:
+        """Number of jobs pending or running."""
+        return await self._run(self._depth)
+    
+    def close(self):
+        self._db.close()
+    
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running loop
+        if self._wakeup is None:
+            self._wakeup = asyncio.Condition()
+        return self._wakeup
+    
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, fn, *args)
+    
+    def _insert(self, channel_id: int, message_id: int, payload: str) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (channel_id, message_id, payload, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (channel_id, message_id, payload, PENDING, now, now)
+            )
+            return cursor.lastrowid
+    
+    def _claim(self) -> Optional[Job]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id, channel_id, message_id, payload, attempts FROM jobs "
+                    "WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at, id LIMIT 1",
+                    (PENDING, time.time())
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1 WHERE id = ?", (RUNNING, row[0])
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        
+        if row is None:
+            return None
+        job_id, channel_id, message_id, payload, attempts = row
+        data: Dict[str, Any] = json.loads(payload)
+        return Job(job_id, channel_id, message_id, data['urls'], data.get('notice'), attempts + 1)
+    
+    def _update(self, job_id: int, status: str, next_attempt_at: Optional[float], error: Optional[str]):
+        with self._lock:
+            if status == DONE:
+                # Finished jobs aren't needed for replay, keep the file small
+                self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, next_attempt_at = COALESCE(?, next_attempt_at), last_error = ? "
+                    "WHERE id = ?",
+                    (status, next_attempt_at, error, job_id)
+                )
+        if status == FAILED:
+            self._purge()
+    
+    def _purge(self):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND created_at <= ?",
+                (DONE, FAILED, time.time() - self.finished_ttl)
+            )
+    
+    def _replay(self) -> int:
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)).fetchone()[0]
+    
+    def _depth(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (PENDING, RUNNING)
+            ).fetchone()[0]